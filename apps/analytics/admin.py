@@ -1,14 +1,19 @@
 from django.contrib import admin
 
+from utils.admin import LargeTableAdmin
+
 from .models import CartEvent
 
 
 @admin.register(CartEvent)
-class CartEventAdmin(admin.ModelAdmin):
+class CartEventAdmin(LargeTableAdmin):
     list_display = ("event_type", "user", "product", "quantity_changed", "timestamp")
     list_filter = ("event_type", "timestamp")
+    list_select_related = ("user", "product")
     search_fields = ("user__email", "product__name", "cart__id")
     readonly_fields = ("id", "timestamp")
+    raw_id_fields = ("cart", "user", "product")
+    date_hierarchy = "timestamp"
 
     fieldsets = (
         (
@@ -5,3 +5,6 @@ class AnalyticsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.analytics"
     verbose_name = "Analytics & Tracking"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,289 @@
+import gzip
+import hashlib
+import heapq
+import json
+import os
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CartEvent
+from .partitions import EventPartitionManager, add_months, month_bounds
+
+MANIFEST_NAME = "manifest.json"
+EVENTS_SEGMENT_PREFIX = "cart_events-"
+ARCHIVE_FIELDS = (
+    "id",
+    "cart_id",
+    "user_id",
+    "product_id",
+    "event_type",
+    "quantity_changed",
+    "timestamp",
+    "session_duration_seconds",
+)
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _decode(row):
+    row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+    for field in ("id", "cart_id", "user_id", "product_id"):
+        if row[field] is not None:
+            row[field] = uuid.UUID(row[field])
+    return row
+
+
+class EventArchive:
+    """Gzip-compressed NDJSON month segments of archived cart events
+
+    Each segment holds one month, or a later part of one, ordered by user
+    and time. ``manifest.json`` lists the segments with their row counts
+    and checksums.
+    """
+
+    _manifest_cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or settings.ANALYTICS_ARCHIVE_DIR)
+
+    @property
+    def manifest_path(self):
+        return self.directory / MANIFEST_NAME
+
+    def load_manifest(self):
+        """Return the manifest, re-reading it only when the file changed"""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return {"segments": []}
+
+        key = str(self.manifest_path)
+        with self._lock:
+            cached = self._manifest_cache.get(key)
+            if cached and cached[0] == mtime:
+                return cached[1]
+        with open(self.manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        with self._lock:
+            self._manifest_cache[key] = (mtime, manifest)
+        return manifest
+
+    def _save_manifest(self, manifest):
+        manifest["segments"].sort(
+            key=lambda segment: (segment["month"], segment.get("part", 1))
+        )
+        temporary = self.manifest_path.with_suffix(".tmp")
+        with open(temporary, "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(temporary, self.manifest_path)
+
+    def archived_months(self):
+        return sorted(
+            {
+                datetime.strptime(segment["month"], "%Y-%m").date()
+                for segment in self.load_manifest()["segments"]
+            }
+        )
+
+    def horizon(self):
+        """End of the latest archived month, or None if nothing is archived"""
+        months = self.archived_months()
+        if not months:
+            return None
+        return month_bounds(max(months))[1]
+
+    def archive_month(self, month):
+        """Write a month of events to a new segment and drop them from the table
+
+        A month archived before gets another part rather than having its
+        segment rewritten. A month with its own partition is locked against
+        writes until it is dropped; otherwise only the rows written to the
+        segment are deleted, and later arrivals wait for the next run.
+        Returns the number of archived rows.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        start, end = month_bounds(month)
+        label = month.strftime("%Y-%m")
+
+        with transaction.atomic():
+            partitioned = EventPartitionManager.lock_month(month)
+            manifest = self.load_manifest()
+            part = sum(segment["month"] == label for segment in manifest["segments"])
+            while True:
+                part += 1
+                suffix = "" if part == 1 else f"-part{part}"
+                segment_path = (
+                    self.directory / f"{EVENTS_SEGMENT_PREFIX}{label}{suffix}.ndjson.gz"
+                )
+                if not segment_path.exists():
+                    break
+
+            count, first, last = self._write_segment(segment_path, start, end)
+            if count:
+                digest = hashlib.sha256()
+                with open(segment_path, "rb") as segment:
+                    for block in iter(lambda: segment.read(1 << 20), b""):
+                        digest.update(block)
+
+                manifest["segments"].append(
+                    {
+                        "month": label,
+                        "part": part,
+                        "file": segment_path.name,
+                        "rows": count,
+                        "min_timestamp": _encode(first),
+                        "max_timestamp": _encode(last),
+                        "sha256": digest.hexdigest(),
+                        "archived_at": timezone.now().isoformat(),
+                    }
+                )
+                self._save_manifest(manifest)
+            else:
+                segment_path.unlink()
+
+            if partitioned:
+                EventPartitionManager.drop_month(month)
+            elif count:
+                EventPartitionManager.drop_month(
+                    month, ids=self._segment_ids(segment_path)
+                )
+        return count
+
+    def _write_segment(self, path, start, end):
+        """Write the live events of ``[start, end)`` to ``path``
+
+        Returns the row count and the first and last timestamps.
+        """
+        rows = (
+            CartEvent.objects.filter(timestamp__gte=start, timestamp__lt=end)
+            .order_by("user_id", "timestamp")
+            .values_list(*ARCHIVE_FIELDS)
+            .iterator(chunk_size=5000)
+        )
+        count = 0
+        first = last = None
+        temporary = path.with_suffix(".tmp")
+        with gzip.open(temporary, "wt", encoding="utf-8") as segment:
+            for values in rows:
+                record = {
+                    field: _encode(value)
+                    for field, value in zip(ARCHIVE_FIELDS, values)
+                }
+                segment.write(json.dumps(record) + "\n")
+                count += 1
+                timestamp = values[ARCHIVE_FIELDS.index("timestamp")]
+                first = timestamp if first is None else min(first, timestamp)
+                last = timestamp if last is None else max(last, timestamp)
+        os.replace(temporary, path)
+        return count, first, last
+
+    @staticmethod
+    def _segment_ids(path):
+        with gzip.open(path, "rt", encoding="utf-8") as segment:
+            for line in segment:
+                yield uuid.UUID(json.loads(line)["id"])
+
+    def _segments_between(self, start, end):
+        for segment in self.load_manifest()["segments"]:
+            month = datetime.strptime(segment["month"], "%Y-%m").date()
+            month_start_at, month_end_at = month_bounds(month)
+            if month_start_at < end and month_end_at > start:
+                yield self.directory / segment["file"]
+
+    def _iter_segment(self, path, start, end):
+        with gzip.open(path, "rt", encoding="utf-8") as segment:
+            for line in segment:
+                row = _decode(json.loads(line))
+                if start <= row["timestamp"] < end:
+                    yield row
+
+    def iter_rows(self, start, end):
+        """Yield archived events in ``[start, end)`` ordered by user and time"""
+        streams = [
+            self._iter_segment(path, start, end)
+            for path in self._segments_between(start, end)
+        ]
+        return heapq.merge(*streams, key=lambda row: (row["user_id"], row["timestamp"]))
+
+    def reaches(self, start):
+        """Whether a window starting at ``start`` includes archived months"""
+        horizon = self.horizon()
+        return horizon is not None and start < horizon
+
+    def count_by_hour(self, start, end):
+        """Return a Counter of archived events per hour of day"""
+        return Counter(
+            timezone.localtime(row["timestamp"]).hour
+            for row in self.iter_rows(start, end)
+        )
+
+    def count_by_event_type(self, start, end):
+        """Return a Counter of archived events per event type"""
+        return Counter(row["event_type"] for row in self.iter_rows(start, end))
+
+    def _all_rows(self):
+        for segment in self.load_manifest()["segments"]:
+            path = self.directory / segment["file"]
+            with gzip.open(path, "rt", encoding="utf-8") as segment_file:
+                for line in segment_file:
+                    yield _decode(json.loads(line))
+
+    def count_by_product(self):
+        """Return a Counter of all archived events per (product id, event type)"""
+        return Counter(
+            (row["product_id"], row["event_type"])
+            for row in self._all_rows()
+            if row["product_id"] is not None
+        )
+
+    def count_for_user(self, user_id):
+        """Return a Counter of a user's archived events per (product id, event type)"""
+        user_id = uuid.UUID(str(user_id))
+        return Counter(
+            (row["product_id"], row["event_type"])
+            for row in self._all_rows()
+            if row["user_id"] == user_id
+        )
+
+    def count_by_day(self, start, end):
+        """Return a Counter of archived events per local date"""
+        return Counter(
+            timezone.localdate(row["timestamp"]) for row in self.iter_rows(start, end)
+        )
+
+
+def archivable_months(retention_months, today=None):
+    """Months of live events older than the retention horizon, oldest first"""
+    today = today or timezone.localdate()
+    cutoff = month_bounds(add_months(today, -retention_months))[0]
+    oldest = (
+        CartEvent.objects.filter(timestamp__lt=cutoff)
+        .order_by("timestamp")
+        .values_list("timestamp", flat=True)
+        .first()
+    )
+    if oldest is None:
+        return []
+
+    months = []
+    month = timezone.localdate(oldest).replace(day=1)
+    while month_bounds(month)[0] < cutoff:
+        start, end = month_bounds(month)
+        if CartEvent.objects.filter(timestamp__gte=start, timestamp__lt=end).exists():
+            months.append(month)
+        month = add_months(month, 1)
+    return months
@@ -0,0 +1,403 @@
+import itertools
+import json
+import platform
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.carts.models import Cart, CartItem
+from apps.products.cache import CatalogCache
+from apps.products.models import Product
+from apps.users.models import User
+
+from .cache import AnalyticsCache
+from .cooccurrence import CooccurrenceService
+from .counters import ProductCounterService
+from .models import CartEvent
+from .rollups import DailyStatsMaterializer
+from .services import AnalyticsService
+
+PRESETS = {
+    "10k": 10_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+CATEGORIES = ["Electronics", "Books", "Clothing", "Home", "Sports", "Toys", "Beauty"]
+CART_STATUS_WEIGHTS = {"abandoned": 65, "purchased": 25, "active": 10}
+REPORT_VERSION = 1
+# Upper bound of one cart's event history, keeps every event in the past
+MAX_CART_SECONDS = 4 * 3600
+
+
+def zipf_weights(count, exponent=1.1):
+    """Cumulative Zipf weights, so a few users and products dominate"""
+    return list(
+        itertools.accumulate(1 / (rank**exponent) for rank in range(1, count + 1))
+    )
+
+
+def insert_raw(model, objects, batch_size):
+    """Insert ``objects`` keeping the timestamps set on them
+
+    Like ``bulk_create`` but as a raw insert, so auto_now and auto_now_add
+    fields are written as given instead of being reset to now, without
+    touching the field flags other threads rely on. Signals are not sent and
+    every primary key must already be set.
+    """
+    if not objects:
+        return
+    fields = model._meta.concrete_fields
+    batch_size = min(batch_size, connection.ops.bulk_batch_size(fields, objects))
+    for start in range(0, len(objects), batch_size):
+        batch = objects[start : start + batch_size]
+        model._base_manager._insert(batch, fields=fields, raw=True)
+        for obj in batch:
+            obj._state.adding = False
+            obj._state.db = connection.alias
+
+
+class SyntheticDataset:
+    """Seeds users, products, carts and cart events with bulk inserts
+
+    Users and products follow a Zipf popularity curve, cart outcomes follow
+    typical abandonment rates and every cart replays a plausible sequence of
+    added, updated, removed and checkout events spread over ``days``. Rows
+    are generated and written in chunks, so memory stays flat at any size.
+    """
+
+    def __init__(self, events, days=90, seed=0, chunk_size=5000):
+        self.events = events
+        self.days = days
+        self.chunk_size = chunk_size
+        self.random = random.Random(seed)
+        self.tag = uuid.uuid4().hex[:8]
+        self.user_count = max(events // 50, 10)
+        self.product_count = min(max(events // 100, 20), 50_000)
+
+    def seed(self, derived=True):
+        """Insert the dataset and return the number of rows per table"""
+        users = self._seed_users()
+        products = self._seed_products()
+        counts = {"users": len(users), "products": len(products)}
+        counts.update(self._seed_carts(users, products))
+
+        if derived:
+            ProductCounterService.rebuild()
+            CooccurrenceService.rebuild()
+            DailyStatsMaterializer.materialize()
+        AnalyticsCache.bump(everything=True)
+        CatalogCache.bump()
+        return counts
+
+    def _seed_users(self):
+        password = make_password(None)
+        users = (
+            User(
+                username=f"bench-{self.tag}-{index}",
+                email=f"bench-{self.tag}-{index}@example.com",
+                password=password,
+            )
+            for index in range(self.user_count)
+        )
+        return self._bulk_create(User, users, keep=True)
+
+    def _seed_products(self):
+        products = (
+            Product(
+                name=f"Benchmark product {self.tag}-{index}",
+                category=self.random.choice(CATEGORIES),
+                price=Decimal(self.random.randint(100, 50000)) / 100,
+                stock_quantity=self.random.randint(0, 500),
+            )
+            for index in range(self.product_count)
+        )
+        return self._bulk_create(Product, products, keep=True)
+
+    def _seed_carts(self, users, products):
+        user_weights = zipf_weights(len(users))
+        product_weights = zipf_weights(len(products))
+        statuses = list(CART_STATUS_WEIGHTS)
+        status_weights = list(CART_STATUS_WEIGHTS.values())
+        now = timezone.now()
+        counts = {"carts": 0, "cart_items": 0, "cart_events": 0}
+        active_users = set()
+
+        carts, items, events = [], [], []
+        while counts["cart_events"] + len(events) < self.events:
+            user = self.random.choices(users, cum_weights=user_weights)[0]
+            status = self.random.choices(statuses, weights=status_weights)[0]
+            if status == "active":
+                # Users hold at most one active cart; see one_active_cart_per_user
+                if user.pk in active_users:
+                    status = "abandoned"
+                active_users.add(user.pk)
+            created_at = now - timedelta(
+                seconds=self.random.uniform(MAX_CART_SECONDS, self.days * 86400)
+            )
+            cart = Cart(user=user, status=status, created_at=created_at)
+            picked = {
+                product.id: product
+                for product in self.random.choices(
+                    products,
+                    cum_weights=product_weights,
+                    k=self.random.randint(1, 6),
+                )
+            }
+            cart_events = self._cart_events(cart, list(picked.values()), items)
+            cart.updated_at = cart_events[-1].timestamp
+            if status == "purchased":
+                cart.purchased_at = cart.updated_at
+            elif status == "abandoned":
+                cart.abandoned_at = cart.updated_at
+            carts.append(cart)
+            events.extend(cart_events)
+
+            if len(events) >= self.chunk_size:
+                self._flush(carts, items, events, counts)
+                carts, items, events = [], [], []
+        self._flush(carts, items, events, counts)
+        return counts
+
+    def _cart_events(self, cart, products, items):
+        """Build the event history of one cart and append its surviving items"""
+        timestamp = cart.created_at
+        events = []
+
+        def event(event_type, product, quantity_changed):
+            nonlocal timestamp
+            timestamp += timedelta(seconds=self.random.randint(5, 600))
+            events.append(
+                CartEvent(
+                    cart=cart,
+                    user=cart.user,
+                    product=product,
+                    event_type=event_type,
+                    quantity_changed=quantity_changed,
+                    timestamp=timestamp,
+                )
+            )
+
+        kept = []
+        for product in products:
+            quantity = self.random.randint(1, 3)
+            event("added", product, quantity)
+            roll = self.random.random()
+            if roll < 0.1:
+                event("removed", product, -quantity)
+                continue
+            if roll < 0.3:
+                quantity += 1
+                event("updated", product, 1)
+            kept.append((product, quantity))
+
+        cart.total_price = sum(product.price * quantity for product, quantity in kept)
+        cart.items_count = sum(quantity for product, quantity in kept)
+        cart.unique_items = len(kept)
+        for product, quantity in kept:
+            items.append(
+                CartItem(
+                    cart=cart,
+                    product=product,
+                    quantity=quantity,
+                    added_at=cart.created_at,
+                    updated_at=timestamp,
+                )
+            )
+            if cart.status in ("purchased", "abandoned"):
+                event(cart.status, product, 0)
+        return events
+
+    def _flush(self, carts, items, events, counts):
+        # One transaction per chunk, so large presets never hold one open
+        with transaction.atomic():
+            insert_raw(Cart, carts, self.chunk_size)
+            insert_raw(CartItem, items, self.chunk_size)
+            self._bulk_create(CartEvent, events)
+        counts["carts"] += len(carts)
+        counts["cart_items"] += len(items)
+        counts["cart_events"] += len(events)
+
+    def _bulk_create(self, model, objects, keep=False):
+        created = []
+        objects = iter(objects)
+        while True:
+            batch = list(itertools.islice(objects, self.chunk_size))
+            if not batch:
+                break
+            model.objects.bulk_create(batch, batch_size=self.chunk_size)
+            if keep:
+                created.extend(batch)
+        return created
+
+
+class AnalyticsBenchmark:
+    """Times every analytics service method and endpoint
+
+    Each target is run ``repeat`` times against a cold cache and once more
+    warm. The report records timings in milliseconds and the query count of
+    the cold run, so it can be compared with :func:`compare_reports`.
+    """
+
+    def __init__(self, repeat=5):
+        self.repeat = repeat
+
+    def targets(self):
+        """Return ``(name, callable)`` pairs for every benchmarked call"""
+        user_id = (
+            CartEvent.objects.values("user_id")
+            .annotate(total=Count("id"))
+            .order_by("-total")
+            .values_list("user_id", flat=True)
+            .first()
+        )
+        product_id = (
+            CartEvent.objects.filter(product__isnull=False)
+            .values("product_id")
+            .annotate(total=Count("id"))
+            .order_by("-total")
+            .values_list("product_id", flat=True)
+            .first()
+        )
+        if user_id is None or product_id is None:
+            raise ValueError("Seed a dataset before running the benchmark")
+
+        admin = User(id=uuid.uuid4(), email="benchmark@example.com", role="admin")
+        client = APIClient()
+        client.force_authenticate(user=admin)
+
+        def endpoint(name, **kwargs):
+            url = reverse(f"analytics:{name}", kwargs=kwargs or None)
+
+            def call():
+                response = client.get(url, HTTP_HOST="localhost")
+                if response.status_code != 200:
+                    raise RuntimeError(f"GET {url} returned {response.status_code}")
+
+            return call
+
+        return [
+            ("service.abandonment_rate", AnalyticsService.calculate_abandonment_rate),
+            (
+                "service.user_behavior",
+                lambda: AnalyticsService.get_user_behavior_analytics(user_id),
+            ),
+            (
+                "service.product_insights",
+                lambda: AnalyticsService.get_product_insights(product_id),
+            ),
+            ("service.time_metrics", AnalyticsService.get_time_based_metrics),
+            ("service.daily_metrics", AnalyticsService.get_daily_metrics),
+            (
+                "service.frequently_added_together",
+                AnalyticsService.get_frequently_added_together,
+            ),
+            (
+                "service.also_added",
+                lambda: AnalyticsService.get_also_added_products(product_id),
+            ),
+            ("api.abandonment_rate", endpoint("abandonment-rate")),
+            ("api.user_behavior", endpoint("user-behavior", user_id=user_id)),
+            (
+                "api.product_insights",
+                endpoint("product-insights", product_id=product_id),
+            ),
+            ("api.time_metrics", endpoint("time-metrics")),
+            ("api.daily_metrics", endpoint("daily-metrics")),
+            ("api.frequently_added_together", endpoint("frequently-added-together")),
+            ("api.also_added", endpoint("also-added", product_id=product_id)),
+        ]
+
+    def measure(self, func):
+        timings = []
+        queries = None
+        for _ in range(self.repeat):
+            # Invalidate analytics entries only, the cache is shared
+            AnalyticsCache.bump(everything=True)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = len(captured)
+
+        started = time.perf_counter()
+        func()
+        warm = (time.perf_counter() - started) * 1000
+        return {
+            "queries": queries,
+            "min_ms": round(min(timings), 3),
+            "median_ms": round(statistics.median(timings), 3),
+            "max_ms": round(max(timings), 3),
+            "warm_ms": round(warm, 3),
+        }
+
+    def run(self, dataset=None):
+        """Benchmark every target and return the report"""
+        results = {name: self.measure(func) for name, func in self.targets()}
+        return {
+            "version": REPORT_VERSION,
+            "created_at": timezone.now().isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "dataset": dataset or {"cart_events": CartEvent.objects.count()},
+            "repeat": self.repeat,
+            "results": results,
+        }
+
+
+def compare_reports(baseline, current, threshold=0.2, min_delta_ms=1.0):
+    """Return the regressions of ``current`` against ``baseline``
+
+    A target regresses when it issues more queries, or when its median time
+    grows by more than ``threshold`` (a fraction) and ``min_delta_ms``.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        if result["queries"] > before["queries"]:
+            regressions.append(
+                {
+                    "target": name,
+                    "metric": "queries",
+                    "baseline": before["queries"],
+                    "current": result["queries"],
+                }
+            )
+        delta = result["median_ms"] - before["median_ms"]
+        if delta > min_delta_ms and delta > before["median_ms"] * threshold:
+            regressions.append(
+                {
+                    "target": name,
+                    "metric": "median_ms",
+                    "baseline": before["median_ms"],
+                    "current": result["median_ms"],
+                }
+            )
+    return regressions
+
+
+def load_report(path):
+    with open(path) as report_file:
+        return json.load(report_file)
+
+
+def write_report(report, path):
+    with open(path, "w") as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
+        report_file.write("\n")
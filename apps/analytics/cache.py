@@ -0,0 +1,169 @@
+import functools
+import hashlib
+import inspect
+import threading
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+KEY_PREFIX = "analytics"
+GLOBAL_SCOPE = "global"
+
+
+class AnalyticsCache:
+    """Versioned result cache in front of AnalyticsService
+
+    Every entry is keyed by method and arguments plus the current watermark
+    of each scope it depends on. Writes bump the watermarks, so stale entries
+    are never read again and simply expire. Watermarks live in the cache
+    itself; use a shared backend when running several processes.
+    """
+
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+
+    @staticmethod
+    def get_cache():
+        return caches[settings.ANALYTICS_CACHE_ALIAS]
+
+    @staticmethod
+    def watermark_key(scope, entity_id=None):
+        if entity_id is None:
+            return f"{KEY_PREFIX}:wm:{scope}"
+        return f"{KEY_PREFIX}:wm:{scope}:{entity_id}"
+
+    @staticmethod
+    def get_watermarks(keys):
+        """Return the current token of each watermark, creating missing ones"""
+        cache = AnalyticsCache.get_cache()
+        tokens = cache.get_many(keys)
+        for key in keys:
+            if key not in tokens:
+                cache.add(key, uuid.uuid4().hex, timeout=None)
+                tokens[key] = cache.get(key)
+        return [tokens[key] for key in keys]
+
+    @staticmethod
+    def bump(user_ids=(), product_ids=(), everything=False):
+        """Invalidate the global scope and the given users and products
+
+        ``everything`` also rolls the generation shared by all entries.
+        """
+        keys = [AnalyticsCache.watermark_key(GLOBAL_SCOPE)]
+        keys += [AnalyticsCache.watermark_key("user", pk) for pk in set(user_ids)]
+        keys += [AnalyticsCache.watermark_key("product", pk) for pk in set(product_ids)]
+        if everything:
+            keys.append(AnalyticsCache.watermark_key("generation"))
+        AnalyticsCache.get_cache().set_many(
+            {key: uuid.uuid4().hex for key in keys}, timeout=None
+        )
+
+    @staticmethod
+    def invalidate(user_ids=(), product_ids=(), everything=False):
+        """Bump now and again on commit
+
+        Readers may cache results computed from pre-commit rows under the
+        first bump; the second one retires those entries.
+        """
+        user_ids, product_ids = list(user_ids), list(product_ids)
+        AnalyticsCache.bump(user_ids, product_ids, everything)
+        transaction.on_commit(
+            lambda: AnalyticsCache.bump(user_ids, product_ids, everything)
+        )
+
+    @staticmethod
+    def record(hit):
+        with AnalyticsCache._lock:
+            if hit:
+                AnalyticsCache._hits += 1
+            else:
+                AnalyticsCache._misses += 1
+
+    @staticmethod
+    def stats():
+        """Return the hit and miss counters of this process"""
+        with AnalyticsCache._lock:
+            hits, misses = AnalyticsCache._hits, AnalyticsCache._misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total * 100, 2) if total else 0,
+        }
+
+    @staticmethod
+    def reset_stats():
+        with AnalyticsCache._lock:
+            AnalyticsCache._hits = AnalyticsCache._misses = 0
+
+
+def cached_analytics(scope=GLOBAL_SCOPE, arg=None, name=None):
+    """Cache an AnalyticsService method under the watermark of ``scope``
+
+    ``arg`` names the argument holding the entity id for ``user`` and
+    ``product`` scopes. ``name`` overrides the method name in the key, so
+    an async variant shares the entries of its sync counterpart.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def make_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            entity_id = bound.arguments[arg] if arg else None
+
+            watermarks = AnalyticsCache.get_watermarks(
+                [
+                    AnalyticsCache.watermark_key("generation"),
+                    AnalyticsCache.watermark_key(scope, entity_id),
+                ]
+            )
+            digest = hashlib.md5(
+                repr(sorted(bound.arguments.items())).encode()
+            ).hexdigest()
+            return (
+                f"{KEY_PREFIX}:{name or func.__name__}:{digest}:{':'.join(watermarks)}"
+            )
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache = AnalyticsCache.get_cache()
+                key = await sync_to_async(make_key)(args, kwargs)
+                result = await cache.aget(key)
+                if result is not None:
+                    AnalyticsCache.record(hit=True)
+                    return result
+
+                AnalyticsCache.record(hit=False)
+                result = await func(*args, **kwargs)
+                await cache.aset(key, result, timeout=settings.ANALYTICS_CACHE_TIMEOUT)
+                return result
+
+            async_wrapper.make_cache_key = make_key
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = AnalyticsCache.get_cache()
+            key = make_key(args, kwargs)
+            result = cache.get(key)
+            if result is not None:
+                AnalyticsCache.record(hit=True)
+                return result
+
+            AnalyticsCache.record(hit=False)
+            result = func(*args, **kwargs)
+            cache.set(key, result, timeout=settings.ANALYTICS_CACHE_TIMEOUT)
+            return result
+
+        wrapper.make_cache_key = make_key
+        return wrapper
+
+    return decorator
@@ -0,0 +1,194 @@
+from itertools import combinations
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+
+from apps.carts.models import CartItem
+from apps.products.models import Product
+
+from .cache import AnalyticsCache
+from .models import ProductPairCount
+
+
+class CooccurrenceService:
+    """Maintains and reads the product pair counts of carts"""
+
+    @staticmethod
+    def _pair_filter(product_id, other_ids):
+        return Q(product_id=product_id, related_product_id__in=other_ids) | Q(
+            product_id__in=other_ids, related_product_id=product_id
+        )
+
+    @staticmethod
+    def record_item_added(cart_id, product_id):
+        """Pair a product newly added to a cart with the cart's other products"""
+        other_ids = list(
+            CartItem.objects.filter(cart_id=cart_id)
+            .exclude(product_id=product_id)
+            .values_list("product_id", flat=True)
+        )
+        if not other_ids:
+            return
+
+        pairs = []
+        for other_id in other_ids:
+            pairs.append(
+                ProductPairCount(product_id=product_id, related_product_id=other_id)
+            )
+            pairs.append(
+                ProductPairCount(product_id=other_id, related_product_id=product_id)
+            )
+        ProductPairCount.objects.bulk_create(pairs, ignore_conflicts=True)
+        ProductPairCount.objects.filter(
+            CooccurrenceService._pair_filter(product_id, other_ids)
+        ).update(count=F("count") + 1)
+
+    @staticmethod
+    def record_item_removed(cart_id, product_id):
+        """Unpair a product removed from a cart from the cart's other products"""
+        other_ids = list(
+            CartItem.objects.filter(cart_id=cart_id)
+            .exclude(product_id=product_id)
+            .values_list("product_id", flat=True)
+        )
+        if not other_ids:
+            return
+
+        ProductPairCount.objects.filter(
+            CooccurrenceService._pair_filter(product_id, other_ids), count__gt=0
+        ).update(count=F("count") - 1)
+
+    @staticmethod
+    def record_cart_changed(before_ids, after_ids):
+        """Apply the net pair changes of a cart going from one product set to another
+
+        Pairs that became co-present gain one, broken pairs lose one, exactly
+        as the equivalent sequence of single adds and removes would.
+        """
+        before_ids, after_ids = set(before_ids), set(after_ids)
+
+        def pairs(ids, unless):
+            return [
+                (first, second)
+                for first, second in combinations(sorted(ids, key=str), 2)
+                if not (first in unless and second in unless)
+            ]
+
+        formed = pairs(after_ids, before_ids)
+        broken = pairs(before_ids, after_ids)
+
+        if formed:
+            ProductPairCount.objects.bulk_create(
+                [
+                    ProductPairCount(product_id=product_id, related_product_id=other_id)
+                    for first, second in formed
+                    for product_id, other_id in ((first, second), (second, first))
+                ],
+                ignore_conflicts=True,
+            )
+            ProductPairCount.objects.filter(
+                CooccurrenceService._pairs_filter(formed)
+            ).update(count=F("count") + 1)
+        if broken:
+            ProductPairCount.objects.filter(
+                CooccurrenceService._pairs_filter(broken), count__gt=0
+            ).update(count=F("count") - 1)
+
+    @staticmethod
+    def _pairs_filter(pairs):
+        """Match both directions of every pair, grouped by first product"""
+        grouped = {}
+        for first, second in pairs:
+            grouped.setdefault(first, []).append(second)
+        condition = Q()
+        for product_id, other_ids in grouped.items():
+            condition |= CooccurrenceService._pair_filter(product_id, other_ids)
+        return condition
+
+    @staticmethod
+    def _resolve(rows):
+        """Attach product names to pair rows with a single query"""
+        product_ids = {row[0] for row in rows} | {row[1] for row in rows}
+        products = Product.objects.only("id", "name").in_bulk(product_ids)
+        return [
+            (products[product_id], products[related_id], count)
+            for product_id, related_id, count in rows
+            if product_id in products and related_id in products
+        ]
+
+    @staticmethod
+    def top_pairs(limit=10):
+        """Return the ``limit`` most frequent pairs across all carts"""
+        rows = list(
+            ProductPairCount.objects.filter(
+                product_id__lt=F("related_product_id"), count__gt=0
+            )
+            .order_by("-count")
+            .values_list("product_id", "related_product_id", "count")[:limit]
+        )
+        return [
+            {
+                "product_a": {"id": product.id, "name": product.name},
+                "product_b": {"id": related.id, "name": related.name},
+                "frequency": count,
+            }
+            for product, related, count in CooccurrenceService._resolve(rows)
+        ]
+
+    @staticmethod
+    def also_added(product_id, limit=10):
+        """Return the ``limit`` products most often in carts with a product"""
+        rows = list(
+            ProductPairCount.objects.filter(product_id=product_id, count__gt=0)
+            .order_by("-count")
+            .values_list("product_id", "related_product_id", "count")[:limit]
+        )
+        return [
+            {"id": related.id, "name": related.name, "frequency": count}
+            for _, related, count in CooccurrenceService._resolve(rows)
+        ]
+
+    @staticmethod
+    def rebuild():
+        """Recompute all pair counts from the current cart items
+
+        Returns the number of distinct pairs.
+        """
+        pairs_query = """
+        SELECT ci1.product_id, ci2.product_id, COUNT(*)
+        FROM cart_items ci1
+        JOIN cart_items ci2 ON ci1.cart_id = ci2.cart_id AND
+        ci1.product_id < ci2.product_id
+        GROUP BY ci1.product_id, ci2.product_id
+        """
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(pairs_query)
+                results = cursor.fetchall()
+
+            product_field = ProductPairCount._meta.get_field("product")
+            rows = []
+            for product1_id, product2_id, frequency in results:
+                product1_id = product_field.to_python(product1_id)
+                product2_id = product_field.to_python(product2_id)
+                rows.append(
+                    ProductPairCount(
+                        product_id=product1_id,
+                        related_product_id=product2_id,
+                        count=frequency,
+                    )
+                )
+                rows.append(
+                    ProductPairCount(
+                        product_id=product2_id,
+                        related_product_id=product1_id,
+                        count=frequency,
+                    )
+                )
+
+            ProductPairCount.objects.all().delete()
+            ProductPairCount.objects.bulk_create(rows, batch_size=1000)
+
+        AnalyticsCache.bump(everything=True)
+        return len(results)
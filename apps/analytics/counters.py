@@ -0,0 +1,187 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.products.models import Product
+
+from .archive import EventArchive
+from .cache import AnalyticsCache
+from .models import CartEvent, ProductActivityBucket, ProductEventCounters
+from .rollups import day_start
+
+COUNTED_EVENT_TYPES = ("added", "removed", "updated", "purchased", "abandoned")
+RING_DAYS = 30
+
+
+def increment_or_create(queryset, update_kwargs, create_kwargs):
+    """Apply an atomic UPDATE, creating the row first if it does not exist"""
+    if queryset.update(**update_kwargs):
+        return
+    try:
+        with transaction.atomic():
+            queryset.model.objects.create(**create_kwargs)
+    except IntegrityError:
+        # Lost the race to create the row; it exists now
+        queryset.update(**update_kwargs)
+
+
+class ProductCounterService:
+    """Maintains and reads incrementally updated per-product event counters"""
+
+    @staticmethod
+    def record(product_id, event_type, amount=1, day=None):
+        """Count ``amount`` events of ``event_type`` for a product"""
+        if event_type not in COUNTED_EVENT_TYPES:
+            return
+        day = day or timezone.localdate()
+
+        increment_or_create(
+            ProductEventCounters.objects.filter(pk=product_id),
+            {event_type: F(event_type) + amount},
+            {"product_id": product_id, event_type: amount},
+        )
+
+        # Reuse the ring slot, resetting it when it still holds an older day
+        slot = day.toordinal() % RING_DAYS
+        increment_or_create(
+            ProductActivityBucket.objects.filter(product_id=product_id, slot=slot),
+            {
+                "count": Case(
+                    When(day=day, then=F("count") + amount),
+                    default=Value(amount),
+                ),
+                "day": day,
+            },
+            {"product_id": product_id, "slot": slot, "day": day, "count": amount},
+        )
+
+    @staticmethod
+    def get_insights(product_id):
+        """Return the counters and recent activity of a product in one query"""
+        recent_since = timezone.localdate() - timedelta(days=RING_DAYS - 1)
+        recent_activity = (
+            ProductActivityBucket.objects.filter(
+                product_id=OuterRef("pk"), day__gte=recent_since
+            )
+            .values("product_id")
+            .annotate(total=Sum("count"))
+            .values("total")
+        )
+        counters = (
+            ProductEventCounters.objects.filter(pk=product_id)
+            .annotate(
+                recent_activity=Subquery(recent_activity, output_field=IntegerField())
+            )
+            .first()
+        )
+
+        counts = {
+            event_type: getattr(counters, event_type, 0)
+            for event_type in COUNTED_EVENT_TYPES
+        }
+        recent = (counters.recent_activity or 0) if counters else 0
+        return counts, recent
+
+    @staticmethod
+    def rebuild():
+        """Reconcile all counters and rings against the raw cart events
+
+        Counters cover the archived months too; the rings only span recent
+        days, which are never archived. Returns the number of products whose counters were corrected.
+        """
+        with transaction.atomic():
+            # Lock first and aggregate after, so increments committed in
+            # between are part of the aggregate and later ones wait for us
+            existing = {
+                counters.pk: counters
+                for counters in ProductEventCounters.objects.select_for_update()
+            }
+            list(ProductActivityBucket.objects.select_for_update().values_list("pk"))
+
+            expected = {}
+            totals = (
+                CartEvent.objects.filter(
+                    product__isnull=False, event_type__in=COUNTED_EVENT_TYPES
+                )
+                .values_list("product_id", "event_type")
+                .annotate(count=Count("id"))
+                .order_by()
+            )
+            for product_id, event_type, count in totals:
+                expected.setdefault(product_id, {})[event_type] = count
+
+            archived = EventArchive().count_by_product()
+            products = set(
+                Product.objects.filter(
+                    pk__in={product_id for product_id, _ in archived}
+                ).values_list("pk", flat=True)
+            )
+            for (product_id, event_type), count in archived.items():
+                if product_id in products and event_type in COUNTED_EVENT_TYPES:
+                    counts = expected.setdefault(product_id, {})
+                    counts[event_type] = counts.get(event_type, 0) + count
+
+            recent_since = timezone.localdate() - timedelta(days=RING_DAYS - 1)
+            buckets = (
+                CartEvent.objects.filter(
+                    product__isnull=False,
+                    event_type__in=COUNTED_EVENT_TYPES,
+                    timestamp__gte=day_start(recent_since),
+                )
+                .annotate(day=TruncDate("timestamp"))
+                .values_list("product_id", "day")
+                .annotate(count=Count("id"))
+                .order_by()
+            )
+
+            to_create, to_update = [], []
+            for product_id in expected.keys() | existing.keys():
+                counts = expected.get(product_id, {})
+                counters = existing.get(product_id)
+                if counters is None:
+                    to_create.append(
+                        ProductEventCounters(product_id=product_id, **counts)
+                    )
+                    continue
+                changed = False
+                for event_type in COUNTED_EVENT_TYPES:
+                    if getattr(counters, event_type) != counts.get(event_type, 0):
+                        setattr(counters, event_type, counts.get(event_type, 0))
+                        changed = True
+                if changed:
+                    to_update.append(counters)
+
+            ProductEventCounters.objects.bulk_create(to_create, batch_size=1000)
+            ProductEventCounters.objects.bulk_update(
+                to_update, COUNTED_EVENT_TYPES, batch_size=1000
+            )
+
+            ProductActivityBucket.objects.all().delete()
+            ProductActivityBucket.objects.bulk_create(
+                (
+                    ProductActivityBucket(
+                        product_id=product_id,
+                        slot=day.toordinal() % RING_DAYS,
+                        day=day,
+                        count=count,
+                    )
+                    for product_id, day, count in buckets
+                ),
+                batch_size=1000,
+            )
+
+        AnalyticsCache.bump(everything=True)
+        return len(to_create) + len(to_update)
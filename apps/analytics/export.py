@@ -0,0 +1,94 @@
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .archive import ARCHIVE_FIELDS, _encode
+from .models import CartEvent
+
+# Exported records match the archive segments field for field
+EXPORT_FIELDS = ARCHIVE_FIELDS
+EXPORT_FILTERS = ("event_type", "user_id", "product_id", "cart_id")
+
+
+class _Echo:
+    """File-like object whose ``write`` hands back the written line"""
+
+    def write(self, value):
+        return value
+
+
+class EventExporter:
+    """Streams cart events of a time range as NDJSON or CSV text chunks
+
+    Rows come from a server-side cursor as tuples, never model instances,
+    and are emitted in blocks of ``chunk_size``, so memory stays constant
+    however many events the range holds. Archived months are not read.
+    """
+
+    content_types = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+    def __init__(self, start, end, filters=None, chunk_size=None):
+        self.start = start
+        self.end = end
+        self.filters = {
+            field: value
+            for field, value in (filters or {}).items()
+            if field in EXPORT_FILTERS and value is not None
+        }
+        self.chunk_size = chunk_size or settings.ANALYTICS_EXPORT_CHUNK_SIZE
+
+    def rows(self):
+        return (
+            CartEvent.objects.filter(
+                timestamp__gte=self.start, timestamp__lt=self.end, **self.filters
+            )
+            .order_by("timestamp", "id")
+            .values_list(*EXPORT_FIELDS)
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+    def stream(self, format):
+        return self.ndjson() if format == "ndjson" else self.csv()
+
+    async def astream(self, format):
+        """Async iterator over :meth:`stream` for responses served under ASGI
+
+        Each block is pulled from the sync generator through ``sync_to_async``,
+        so only one block is held at a time instead of the whole export.
+        """
+        blocks = self.stream(format)
+        next_block = sync_to_async(next)
+        try:
+            while (block := await next_block(blocks, None)) is not None:
+                yield block
+        finally:
+            await sync_to_async(blocks.close)()
+
+    def ndjson(self):
+        return self._blocks(
+            json.dumps(
+                {field: _encode(value) for field, value in zip(EXPORT_FIELDS, row)}
+            )
+            + "\n"
+            for row in self.rows()
+        )
+
+    def csv(self):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        yield from self._blocks(
+            writer.writerow(["" if value is None else _encode(value) for value in row])
+            for row in self.rows()
+        )
+
+    def _blocks(self, lines):
+        block = []
+        for line in lines:
+            block.append(line)
+            if len(block) >= self.chunk_size:
+                yield "".join(block)
+                block = []
+        if block:
+            yield "".join(block)
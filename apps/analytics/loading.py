@@ -0,0 +1,227 @@
+import csv
+import gzip
+import json
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.carts.models import Cart
+from apps.products.models import Product
+from apps.users.models import User
+
+from .archive import ARCHIVE_FIELDS
+from .models import CartEvent
+
+# Loaded records use the archive and export layout, so both can be reloaded
+LOAD_FIELDS = ARCHIVE_FIELDS
+EVENT_TYPES = {event_type for event_type, _ in CartEvent.EVENT_TYPES}
+
+POSTGRES_INDEXES = (
+    "SELECT c.relname, pg_get_indexdef(i.indexrelid) FROM pg_index i "
+    "JOIN pg_class c ON c.oid = i.indexrelid "
+    "WHERE i.indrelid = to_regclass(%s) AND NOT i.indisprimary AND NOT i.indisunique"
+)
+POSTGRES_PARTITIONED = "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s)"
+SQLITE_INDEXES = (
+    "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = %s "
+    "AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%%'"
+)
+
+
+class LoadError(ValueError):
+    pass
+
+
+def read_records(path, file_format=None):
+    """Yield the records of an NDJSON or CSV file as dicts, gzip or not"""
+    path = Path(path)
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+    if file_format is None:
+        file_format = "csv" if ".csv" in suffixes else "ndjson"
+    opener = gzip.open if suffixes[-1:] == [".gz"] else open
+    with opener(path, "rt", encoding="utf-8", newline="") as handle:
+        if file_format == "csv":
+            yield from csv.DictReader(handle)
+        else:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+
+@contextmanager
+def deferred_indexes(table, conn=None):
+    """Drop the secondary indexes of ``table`` and rebuild them on exit
+
+    Primary keys and unique indexes are kept, so duplicates are still
+    rejected during the load. Building an index once over the loaded rows
+    is far cheaper than maintaining it row by row. On a partitioned table
+    the indexes are rebuilt on every partition, not only on the parent.
+    """
+    conn = conn or connection
+    if conn.vendor == "postgresql":
+        query = POSTGRES_INDEXES
+    elif conn.vendor == "sqlite":
+        query = SQLITE_INDEXES
+    else:
+        yield []
+        return
+
+    with conn.cursor() as cursor:
+        cursor.execute(query, [table])
+        indexes = cursor.fetchall()
+        if conn.vendor == "postgresql":
+            cursor.execute(POSTGRES_PARTITIONED, [table])
+            if cursor.fetchone()[0]:
+                # Dropping a partitioned index drops those of the partitions
+                # too; without ONLY the replay recreates and attaches them
+                indexes = [
+                    (name, definition.replace(" ON ONLY ", " ON ", 1))
+                    for name, definition in indexes
+                ]
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {conn.ops.quote_name(name)}")
+    try:
+        yield [name for name, _ in indexes]
+    finally:
+        with conn.cursor() as cursor:
+            for _, definition in indexes:
+                cursor.execute(definition)
+            if conn.vendor == "postgresql":
+                cursor.execute(f"ANALYZE {conn.ops.quote_name(table)}")
+
+
+class EventLoader:
+    """Bulk loads historical cart events from NDJSON or CSV files
+
+    Users and products are resolved through in-memory maps keyed by id and
+    by email or name, built with one query each; carts must already exist
+    and are checked once per batch. Batches are written with COPY on
+    PostgreSQL and ``bulk_create`` elsewhere, each in its own transaction.
+    Unresolvable records are skipped, or abort the load when ``strict``.
+    """
+
+    def __init__(self, batch_size=None, strict=False):
+        self.batch_size = batch_size or settings.ANALYTICS_LOAD_BATCH_SIZE
+        self.strict = strict
+        self.loaded = 0
+        self.skipped = 0
+        self.days = set()
+        self.users = {}
+        self.products = {}
+
+    def build_lookups(self):
+        for pk, email in User.objects.values_list("pk", "email").iterator():
+            self.users[str(pk)] = pk
+            self.users[email] = pk
+        for pk, name in (
+            Product.objects.order_by("created_at").values_list("pk", "name").iterator()
+        ):
+            self.products[str(pk)] = pk
+            self.products.setdefault(name, pk)
+
+    def load(self, paths, file_format=None, defer=True):
+        """Load every file; returns the loaded and skipped counts and timing"""
+        started = time.perf_counter()
+        self.build_lookups()
+        if defer:
+            with deferred_indexes(CartEvent._meta.db_table):
+                for path in paths:
+                    self.load_file(path, file_format)
+        else:
+            for path in paths:
+                self.load_file(path, file_format)
+
+        seconds = time.perf_counter() - started
+        return {
+            "loaded": self.loaded,
+            "skipped": self.skipped,
+            "seconds": seconds,
+            "rows_per_second": self.loaded / seconds if seconds else 0,
+        }
+
+    def load_file(self, path, file_format=None):
+        batch = []
+        for number, record in enumerate(read_records(path, file_format), start=1):
+            row = self.resolve(record)
+            if row is None:
+                self.reject(f"{path}: record {number} cannot be resolved")
+                continue
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch, path)
+                batch = []
+        if batch:
+            self.write_batch(batch, path)
+
+    def resolve(self, record):
+        """Row in LOAD_FIELDS order for ``record``, or None"""
+        try:
+            user_id = self.users.get(
+                str(record.get("user_id") or record.get("user_email") or "")
+            )
+            product_ref = record.get("product_id") or record.get("product_name")
+            product_id = self.products.get(str(product_ref)) if product_ref else None
+            timestamp = parse_datetime(str(record.get("timestamp") or ""))
+            event_type = record.get("event_type")
+            if (
+                user_id is None
+                or (product_ref and product_id is None)
+                or timestamp is None
+                or event_type not in EVENT_TYPES
+            ):
+                return None
+            if timezone.is_naive(timestamp):
+                timestamp = timezone.make_aware(timestamp)
+            return (
+                uuid.UUID(str(record["id"])) if record.get("id") else uuid.uuid4(),
+                uuid.UUID(str(record["cart_id"])),
+                user_id,
+                product_id,
+                event_type,
+                int(record.get("quantity_changed") or 0),
+                timestamp,
+                int(record.get("session_duration_seconds") or 0),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def reject(self, message):
+        if self.strict:
+            raise LoadError(message)
+        self.skipped += 1
+
+    def write_batch(self, rows, path):
+        carts = set(
+            Cart.objects.filter(pk__in={row[1] for row in rows}).values_list(
+                "pk", flat=True
+            )
+        )
+        kept = [row for row in rows if row[1] in carts]
+        for _ in range(len(rows) - len(kept)):
+            self.reject(f"{path}: event of an unknown cart")
+
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                self._copy(kept)
+            else:
+                CartEvent.objects.bulk_create(
+                    [CartEvent(**dict(zip(LOAD_FIELDS, row))) for row in kept],
+                    batch_size=self.batch_size,
+                )
+        self.loaded += len(kept)
+        self.days.update(timezone.localdate(row[6]) for row in kept)
+
+    @staticmethod
+    def _copy(rows):
+        table = connection.ops.quote_name(CartEvent._meta.db_table)
+        columns = ", ".join(connection.ops.quote_name(name) for name in LOAD_FIELDS)
+        with connection.cursor() as cursor:
+            with cursor.cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.analytics.archive import EventArchive, archivable_months
+from apps.analytics.cache import AnalyticsCache
+from apps.analytics.rollups import DailyStatsMaterializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Move cart events older than the retention horizon into gzip-compressed "
+        "NDJSON month segments"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=settings.ANALYTICS_EVENT_RETENTION_MONTHS,
+            help="Number of months, besides the current one, to keep live",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=settings.ANALYTICS_ARCHIVE_DIR,
+            help="Directory holding the segments and their manifest",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the months that would be archived",
+        )
+
+    def handle(self, *args, **options):
+        months = archivable_months(options["retention_months"])
+        if not months:
+            self.stdout.write("Nothing to archive")
+            return
+
+        labels = ", ".join(month.strftime("%Y-%m") for month in months)
+        if options["dry_run"]:
+            self.stdout.write(f"Would archive: {labels}")
+            return
+
+        # Roll the months up first so daily counts survive archival
+        DailyStatsMaterializer.materialize()
+
+        archive = EventArchive(options["archive_dir"])
+        for month in months:
+            rows = archive.archive_month(month)
+            self.stdout.write(f"Archived {rows} event(s) from {month:%Y-%m}")
+
+        AnalyticsCache.bump(everything=True)
+        self.stdout.write(self.style.SUCCESS(f"Archived {len(months)} month(s)"))
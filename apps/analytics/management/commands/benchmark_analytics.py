@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics.benchmarks import (
+    AnalyticsBenchmark,
+    compare_reports,
+    load_report,
+    write_report,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every analytics service method and endpoint, write a JSON "
+        "report and compare it with a baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Cold runs per target"
+        )
+        parser.add_argument("--output", help="Write the JSON report to this path")
+        parser.add_argument("--baseline", help="Compare with this JSON report")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed relative slowdown of the median before flagging",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            report = AnalyticsBenchmark(repeat=options["repeat"]).run()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for name, result in report["results"].items():
+            self.stdout.write(
+                f"{name:<36} {result['median_ms']:>10.2f} ms "
+                f"{result['queries']:>4} queries "
+                f"(warm {result['warm_ms']:.2f} ms)"
+            )
+        if options["output"]:
+            write_report(report, options["output"])
+            self.stdout.write(f"Wrote {options['output']}")
+
+        if not options["baseline"]:
+            return
+        regressions = compare_reports(
+            load_report(options["baseline"]), report, threshold=options["threshold"]
+        )
+        for regression in regressions:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"REGRESSION {regression['target']} {regression['metric']}: "
+                    f"{regression['baseline']} -> {regression['current']}"
+                )
+            )
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) against baseline")
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
@@ -0,0 +1,174 @@
+import re
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from apps.analytics.models import CartEvent, ProductEventCounters, ProductPairCount
+from apps.carts.models import Cart
+from apps.products.models import Product
+from apps.users.models import User
+
+POSTGRES_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+SQLITE_SCAN = re.compile(r"SCAN (\w+)\b(?! USING (?:COVERING )?INDEX)")
+
+
+def analytics_query_shapes():
+    """Representative querysets for every query shape of the analytics layer"""
+    now = timezone.now()
+    start = now - timedelta(days=30)
+    user_id = User.objects.values_list("id", flat=True).first() or uuid.uuid4()
+    product_id = Product.objects.values_list("id", flat=True).first() or uuid.uuid4()
+    recent_events = CartEvent.objects.filter(timestamp__gte=start, timestamp__lt=now)
+
+    return [
+        (
+            "carts_by_status_in_window",
+            Cart.objects.filter(created_at__gte=start, created_at__lt=now)
+            .values("status")
+            .annotate(count=Count("id")),
+        ),
+        (
+            "abandoned_carts_in_window",
+            Cart.objects.filter(
+                status="abandoned", created_at__gte=start, created_at__lt=now
+            ).values("id"),
+        ),
+        (
+            "carts_changed_since_watermark",
+            Cart.objects.filter(updated_at__gte=start).values("created_at"),
+        ),
+        (
+            "user_carts_by_status",
+            Cart.objects.filter(user_id=user_id)
+            .values("status")
+            .annotate(count=Count("id")),
+        ),
+        (
+            "user_product_affinity",
+            CartEvent.objects.filter(
+                user_id=user_id, event_type__in=["added", "purchased"]
+            )
+            .values("product_id")
+            .annotate(count=Count("id")),
+        ),
+        (
+            "user_latest_event",
+            CartEvent.objects.filter(user_id=user_id)
+            .order_by("-timestamp")
+            .values("timestamp", "session_duration_seconds")[:1],
+        ),
+        (
+            "product_events_by_type",
+            CartEvent.objects.filter(product_id=product_id, event_type="added")
+            .values("event_type")
+            .annotate(count=Count("id")),
+        ),
+        (
+            "session_stream",
+            recent_events.order_by("user_id", "timestamp").values(
+                "user_id", "timestamp"
+            ),
+        ),
+        (
+            "events_by_day",
+            recent_events.annotate(date=TruncDate("timestamp"))
+            .values("date")
+            .annotate(count=Count("id"))
+            .order_by(),
+        ),
+        (
+            "events_by_hour",
+            recent_events.annotate(hour=ExtractHour("timestamp"))
+            .values("hour")
+            .annotate(count=Count("id"))
+            .order_by(),
+        ),
+        (
+            "product_counters",
+            ProductEventCounters.objects.filter(pk=product_id),
+        ),
+        (
+            "product_also_added",
+            ProductPairCount.objects.filter(product_id=product_id).order_by("-count")[
+                :10
+            ],
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN every analytics query shape and flag sequential scans on "
+        "large tables"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=10000,
+            help="Only flag sequential scans of tables with at least this many rows",
+        )
+        parser.add_argument(
+            "--show-plans", action="store_true", help="Print every query plan"
+        )
+        parser.add_argument(
+            "--fail-on-seq-scan",
+            action="store_true",
+            help="Exit with an error when a sequential scan is flagged",
+        )
+
+    def handle(self, *args, **options):
+        pattern = (
+            POSTGRES_SEQ_SCAN if connection.vendor == "postgresql" else SQLITE_SCAN
+        )
+        table_sizes = {}
+        flagged = []
+
+        for name, queryset in analytics_query_shapes():
+            plan = queryset.explain()
+            scanned = {
+                table
+                for table in pattern.findall(plan)
+                if self._table_size(table, table_sizes) >= options["min_rows"]
+            }
+
+            if scanned:
+                flagged.append(name)
+                tables = ", ".join(
+                    f"{table} (~{table_sizes[table]} rows)" for table in sorted(scanned)
+                )
+                self.stdout.write(self.style.WARNING(f"SEQ SCAN {name}: {tables}"))
+            else:
+                self.stdout.write(f"ok       {name}")
+            if options["show_plans"]:
+                self.stdout.write(plan + "\n")
+
+        if flagged and options["fail_on_seq_scan"]:
+            raise CommandError(f"Sequential scans in: {', '.join(flagged)}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Explained queries; {len(flagged)} flagged")
+        )
+
+    def _table_size(self, table, cache):
+        """Planner row estimate on PostgreSQL, exact count elsewhere"""
+        if table not in cache:
+            with connection.cursor() as cursor:
+                if connection.vendor == "postgresql":
+                    cursor.execute(
+                        "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class "
+                        "WHERE relname = %s",
+                        [table],
+                    )
+                else:
+                    cursor.execute(
+                        f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}"
+                    )
+                row = cursor.fetchone()
+                cache[table] = row[0] if row else 0
+        return cache[table]
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics.cache import AnalyticsCache
+from apps.analytics.counters import ProductCounterService
+from apps.analytics.loading import EventLoader, LoadError
+from apps.analytics.rollups import DailyStatsMaterializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk load historical cart events from NDJSON or CSV files, "
+        "optionally gzip-compressed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Files to load")
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=["ndjson", "csv"],
+            help="File format, guessed from the extension by default",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, help="Rows written per COPY or bulk insert"
+        )
+        parser.add_argument(
+            "--keep-indexes",
+            action="store_true",
+            help="Maintain the cart_events indexes during the load instead of "
+            "dropping and rebuilding them; use when the table serves traffic",
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Abort on the first record that cannot be resolved",
+        )
+        parser.add_argument(
+            "--skip-derived",
+            action="store_true",
+            help="Do not rebuild product counters and daily rollups",
+        )
+
+    def handle(self, *args, **options):
+        loader = EventLoader(batch_size=options["batch_size"], strict=options["strict"])
+        try:
+            stats = loader.load(
+                options["paths"],
+                file_format=options["file_format"],
+                defer=not options["keep_indexes"],
+            )
+        except (LoadError, OSError) as error:
+            raise CommandError(str(error))
+
+        if not options["skip_derived"] and stats["loaded"]:
+            ProductCounterService.rebuild()
+            DailyStatsMaterializer.rematerialize(loader.days)
+            AnalyticsCache.bump(everything=True)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Loaded {stats['loaded']} event(s), skipped {stats['skipped']} "
+                f"in {stats['seconds']:.1f}s ({stats['rows_per_second']:.0f} rows/s)"
+            )
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from apps.analytics.partitions import EventPartitionManager
+
+
+class Command(BaseCommand):
+    help = "Create upcoming monthly partitions of cart_events (PostgreSQL only)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="Number of future months to create partitions for",
+        )
+
+    def handle(self, *args, **options):
+        months = EventPartitionManager.ensure_partitions(options["months_ahead"])
+        if not months:
+            self.stdout.write("cart_events is not partitioned on this backend")
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Partitions ready through {months[-1].strftime('%Y-%m')}"
+            )
+        )
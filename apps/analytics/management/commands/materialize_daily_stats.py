@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.analytics.rollups import DailyStatsMaterializer
+
+
+class Command(BaseCommand):
+    help = "Incrementally refresh the DailyCartStats rollup for closed days"
+
+    def handle(self, *args, **options):
+        days = DailyStatsMaterializer.materialize()
+        horizon = DailyStatsMaterializer.get_horizon()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Materialized {len(days)} day(s); rollup complete up to {horizon}"
+            )
+        )
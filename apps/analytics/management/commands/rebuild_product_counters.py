@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.analytics.counters import ProductCounterService
+
+
+class Command(BaseCommand):
+    help = "Reconcile per-product event counters against the raw cart events"
+
+    def handle(self, *args, **options):
+        corrected = ProductCounterService.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt product counters; {corrected} corrected")
+        )
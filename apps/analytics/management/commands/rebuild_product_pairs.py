@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.analytics.cooccurrence import CooccurrenceService
+
+
+class Command(BaseCommand):
+    help = "Recompute product co-occurrence counts from the current cart items"
+
+    def handle(self, *args, **options):
+        pairs = CooccurrenceService.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {pairs} product pair(s)"))
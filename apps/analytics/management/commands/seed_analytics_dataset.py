@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics.benchmarks import PRESETS, SyntheticDataset
+
+
+class Command(BaseCommand):
+    help = "Seed a synthetic analytics dataset with bulk inserts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--preset",
+            choices=sorted(PRESETS),
+            default="10k",
+            help="Dataset size in cart events",
+        )
+        parser.add_argument(
+            "--events", type=int, help="Exact number of events, overrides --preset"
+        )
+        parser.add_argument(
+            "--days", type=int, default=90, help="Spread events over this many days"
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        parser.add_argument(
+            "--skip-derived",
+            action="store_true",
+            help="Do not rebuild counters, pair counts and daily rollups",
+        )
+
+    def handle(self, *args, **options):
+        events = options["events"] or PRESETS[options["preset"]]
+        if events <= 0:
+            raise CommandError("--events must be positive")
+
+        dataset = SyntheticDataset(events, days=options["days"], seed=options["seed"])
+        counts = dataset.seed(derived=not options["skip_derived"])
+
+        summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary}"))
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MaterializationWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("value", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Materialization Watermark",
+                "verbose_name_plural": "Materialization Watermarks",
+                "db_table": "materialization_watermarks",
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyCartStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("status", models.CharField(blank=True, default="", max_length=20)),
+                ("event_type", models.CharField(blank=True, default="", max_length=20)),
+                ("count", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Daily Cart Stats",
+                "verbose_name_plural": "Daily Cart Stats",
+                "db_table": "daily_cart_stats",
+                "ordering": ["-date"],
+                "unique_together": {("date", "status", "event_type")},
+            },
+        ),
+    ]
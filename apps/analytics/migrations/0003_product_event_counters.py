@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0001_initial"),
+        ("analytics", "0002_daily_cart_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductEventCounters",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="event_counters",
+                        serialize=False,
+                        to="products.product",
+                    ),
+                ),
+                ("added", models.PositiveBigIntegerField(default=0)),
+                ("removed", models.PositiveBigIntegerField(default=0)),
+                ("updated", models.PositiveBigIntegerField(default=0)),
+                ("purchased", models.PositiveBigIntegerField(default=0)),
+                ("abandoned", models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Product Event Counters",
+                "verbose_name_plural": "Product Event Counters",
+                "db_table": "product_event_counters",
+            },
+        ),
+        migrations.CreateModel(
+            name="ProductActivityBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("slot", models.PositiveSmallIntegerField()),
+                ("day", models.DateField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity_buckets",
+                        to="products.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Product Activity Bucket",
+                "verbose_name_plural": "Product Activity Buckets",
+                "db_table": "product_activity_buckets",
+                "unique_together": {("product", "slot")},
+            },
+        ),
+    ]
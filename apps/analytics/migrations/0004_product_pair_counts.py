@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0001_initial"),
+        ("analytics", "0003_product_event_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductPairCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pair_counts",
+                        to="products.product",
+                    ),
+                ),
+                (
+                    "related_product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="products.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Product Pair Count",
+                "verbose_name_plural": "Product Pair Counts",
+                "db_table": "product_pair_counts",
+                "indexes": [
+                    models.Index(
+                        fields=["product", "-count"], name="pair_product_count_idx"
+                    ),
+                    models.Index(fields=["-count"], name="pair_count_idx"),
+                ],
+                "unique_together": {("product", "related_product")},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:58
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0004_product_pair_counts"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="cartevent",
+            name="timestamp",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
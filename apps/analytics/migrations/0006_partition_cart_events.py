@@ -0,0 +1,114 @@
+from datetime import date, datetime, time
+
+from django.db import migrations
+from django.utils import timezone
+
+# Helpers are inlined so later changes to apps.analytics.partitions cannot
+# change what this migration does
+
+CONVERT_SQL = """
+ALTER TABLE cart_events RENAME TO cart_events_unpartitioned;
+CREATE TABLE cart_events (
+    LIKE cart_events_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+) PARTITION BY RANGE ("timestamp");
+ALTER TABLE cart_events ADD PRIMARY KEY (id, "timestamp");
+ALTER TABLE cart_events ADD CONSTRAINT cart_events_cart_id_fk
+    FOREIGN KEY (cart_id) REFERENCES carts (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE cart_events ADD CONSTRAINT cart_events_user_id_fk
+    FOREIGN KEY (user_id) REFERENCES users (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE cart_events ADD CONSTRAINT cart_events_product_id_fk
+    FOREIGN KEY (product_id) REFERENCES products (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX cart_events_cart_id_idx ON cart_events (cart_id);
+CREATE INDEX cart_events_user_id_idx ON cart_events (user_id);
+CREATE INDEX cart_events_product_id_idx ON cart_events (product_id);
+CREATE TABLE cart_events_default PARTITION OF cart_events DEFAULT;
+"""
+
+REVERT_SQL = """
+ALTER TABLE cart_events RENAME TO cart_events_partitioned;
+CREATE TABLE cart_events (
+    LIKE cart_events_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+);
+INSERT INTO cart_events SELECT * FROM cart_events_partitioned;
+DROP TABLE cart_events_partitioned;
+ALTER TABLE cart_events ADD PRIMARY KEY (id);
+ALTER TABLE cart_events ADD CONSTRAINT cart_events_cart_id_fk
+    FOREIGN KEY (cart_id) REFERENCES carts (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE cart_events ADD CONSTRAINT cart_events_user_id_fk
+    FOREIGN KEY (user_id) REFERENCES users (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE cart_events ADD CONSTRAINT cart_events_product_id_fk
+    FOREIGN KEY (product_id) REFERENCES products (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX cart_events_cart_id_idx ON cart_events (cart_id);
+CREATE INDEX cart_events_user_id_idx ON cart_events (user_id);
+CREATE INDEX cart_events_product_id_idx ON cart_events (product_id);
+"""
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_partition(cursor, month):
+    start = timezone.make_aware(datetime.combine(month, time.min))
+    end = timezone.make_aware(datetime.combine(add_months(month, 1), time.min))
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS cart_events_p{month.year:04d}{month.month:02d} "
+        "PARTITION OF cart_events FOR VALUES FROM (%s) TO (%s)",
+        [start, end],
+    )
+
+
+def partition_cart_events(apps, schema_editor):
+    """Turn cart_events into a table range-partitioned by month on PostgreSQL"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT MIN("timestamp"), MAX("timestamp") FROM cart_events')
+        oldest, newest = cursor.fetchone()
+        cursor.execute(CONVERT_SQL)
+
+        # Give every month with data, and the next three, its own partition
+        # before copying rows so nothing lands in the default partition
+        now = timezone.now()
+        first = month_start(timezone.localdate(oldest or now))
+        last = add_months(month_start(timezone.localdate(newest or now)), 3)
+        month = first
+        while month <= last:
+            create_partition(cursor, month)
+            month = add_months(month, 1)
+
+        cursor.execute(
+            "INSERT INTO cart_events SELECT * FROM cart_events_unpartitioned"
+        )
+        cursor.execute("DROP TABLE cart_events_unpartitioned")
+
+
+def unpartition_cart_events(apps, schema_editor):
+    """Copy cart_events back into a plain table keyed by id alone
+
+    Fails, rolling back, if an id appears in more than one partition.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(REVERT_SQL)
+
+
+class Migration(migrations.Migration):
+
+    atomic = True
+
+    dependencies = [
+        ("analytics", "0005_cart_event_timestamp_default"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_cart_events, unpartition_cart_events),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+BRIN_INDEX = "cart_event_ts_brin"
+
+
+def create_brin_index(apps, schema_editor):
+    """Add a compact BRIN index on the append-only timestamp (PostgreSQL)"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {BRIN_INDEX} "
+        'ON cart_events USING brin ("timestamp")'
+    )
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {BRIN_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0006_partition_cart_events"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cartevent",
+            index=models.Index(fields=["timestamp"], name="cart_event_ts_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cartevent",
+            index=models.Index(
+                fields=["user", "timestamp", "session_duration_seconds"],
+                name="cart_event_user_ts_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cartevent",
+            index=models.Index(
+                fields=["user", "event_type", "product"],
+                name="cart_event_user_type_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cartevent",
+            index=models.Index(
+                fields=["product", "event_type", "timestamp"],
+                name="cart_event_product_type_idx",
+            ),
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
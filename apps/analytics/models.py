@@ -2,6 +2,7 @@ import uuid
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class CartEvent(models.Model):
@@ -23,7 +24,8 @@ class CartEvent(models.Model):
     quantity_changed = models.IntegerField(
         default=0
     )  # Positive for add, negative for remove
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Stamped when the event is logged, not when a buffered sink writes it
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     session_duration_seconds = models.IntegerField(default=0)
 
     def __str__(self):
@@ -34,3 +36,129 @@ class CartEvent(models.Model):
         verbose_name = "Cart Event"
         verbose_name_plural = "Cart Events"
         ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["timestamp"], name="cart_event_ts_idx"),
+            # Trailing columns let the session and affinity lookups be
+            # answered from the index alone
+            models.Index(
+                fields=["user", "timestamp", "session_duration_seconds"],
+                name="cart_event_user_ts_idx",
+            ),
+            models.Index(
+                fields=["user", "event_type", "product"],
+                name="cart_event_user_type_idx",
+            ),
+            models.Index(
+                fields=["product", "event_type", "timestamp"],
+                name="cart_event_product_type_idx",
+            ),
+        ]
+
+
+class DailyCartStats(models.Model):
+    """Pre-aggregated daily counts of carts by status and events by type.
+
+    Cart rows carry a ``status`` and an empty ``event_type``; event rows carry
+    an ``event_type`` and an empty ``status``.
+    """
+
+    date = models.DateField()
+    status = models.CharField(max_length=20, blank=True, default="")
+    event_type = models.CharField(max_length=20, blank=True, default="")
+    count = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.date} - {self.status or self.event_type} - {self.count}"
+
+    class Meta:
+        db_table = "daily_cart_stats"
+        verbose_name = "Daily Cart Stats"
+        verbose_name_plural = "Daily Cart Stats"
+        ordering = ["-date"]
+        unique_together = ["date", "status", "event_type"]
+
+
+class MaterializationWatermark(models.Model):
+    """Tracks how far an incremental materializer has processed raw rows"""
+
+    name = models.CharField(max_length=100, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.value}"
+
+    class Meta:
+        db_table = "materialization_watermarks"
+        verbose_name = "Materialization Watermark"
+        verbose_name_plural = "Materialization Watermarks"
+
+
+class ProductEventCounters(models.Model):
+    """Running per-product event counts maintained by CartService"""
+
+    product = models.OneToOneField(
+        "products.Product",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="event_counters",
+    )
+    added = models.PositiveBigIntegerField(default=0)
+    removed = models.PositiveBigIntegerField(default=0)
+    updated = models.PositiveBigIntegerField(default=0)
+    purchased = models.PositiveBigIntegerField(default=0)
+    abandoned = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Counters for {self.product_id}"
+
+    class Meta:
+        db_table = "product_event_counters"
+        verbose_name = "Product Event Counters"
+        verbose_name_plural = "Product Event Counters"
+
+
+class ProductActivityBucket(models.Model):
+    """One day of a product's event activity in a fixed-size ring of slots"""
+
+    product = models.ForeignKey(
+        "products.Product", on_delete=models.CASCADE, related_name="activity_buckets"
+    )
+    slot = models.PositiveSmallIntegerField()
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product_id} - {self.day} - {self.count}"
+
+    class Meta:
+        db_table = "product_activity_buckets"
+        verbose_name = "Product Activity Bucket"
+        verbose_name_plural = "Product Activity Buckets"
+        unique_together = ["product", "slot"]
+
+
+class ProductPairCount(models.Model):
+    """How many carts hold both products, stored once in each direction"""
+
+    product = models.ForeignKey(
+        "products.Product", on_delete=models.CASCADE, related_name="pair_counts"
+    )
+    related_product = models.ForeignKey(
+        "products.Product", on_delete=models.CASCADE, related_name="+"
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product_id} + {self.related_product_id} - {self.count}"
+
+    class Meta:
+        db_table = "product_pair_counts"
+        verbose_name = "Product Pair Count"
+        verbose_name_plural = "Product Pair Counts"
+        unique_together = ["product", "related_product"]
+        indexes = [
+            models.Index(fields=["product", "-count"], name="pair_product_count_idx"),
+            models.Index(fields=["-count"], name="pair_count_idx"),
+        ]
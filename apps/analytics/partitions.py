@@ -0,0 +1,145 @@
+from datetime import date, datetime, time
+from itertools import islice
+
+from django.db import connection
+from django.utils import timezone
+
+EVENTS_TABLE = "cart_events"
+
+
+def month_start(day):
+    """Return the first day of the month holding ``day``"""
+    return date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    """Return the first day of the month ``months`` after ``day``'s month"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """Return the aware ``[start, end)`` datetimes of a month"""
+    start = timezone.make_aware(datetime.combine(month_start(month), time.min))
+    end = timezone.make_aware(datetime.combine(add_months(month, 1), time.min))
+    return start, end
+
+
+def partition_name(month):
+    return f"{EVENTS_TABLE}_p{month.year:04d}{month.month:02d}"
+
+
+class EventPartitionManager:
+    """Manages monthly range partitions of cart_events on PostgreSQL
+
+    Other backends keep a single table; every method degrades to a no-op or
+    a plain ranged DELETE there.
+    """
+
+    @staticmethod
+    def is_partitioned():
+        if connection.vendor != "postgresql":
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s",
+                [EVENTS_TABLE],
+            )
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def list_partitions():
+        """Return the months that have their own partition"""
+        if not EventPartitionManager.is_partitioned():
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s",
+                [EVENTS_TABLE],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        prefix = f"{EVENTS_TABLE}_p"
+        return sorted(
+            date(int(name[len(prefix) : len(prefix) + 4]), int(name[-2:]), 1)
+            for name in names
+            if name.startswith(prefix)
+        )
+
+    @staticmethod
+    def create_partition(month, cursor=None):
+        """Create the partition of ``month`` if it does not exist yet"""
+        start, end = month_bounds(month)
+        sql = (
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} "
+            f"PARTITION OF {EVENTS_TABLE} FOR VALUES FROM (%s) TO (%s)"
+        )
+        if cursor is not None:
+            cursor.execute(sql, [start, end])
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [start, end])
+
+    @staticmethod
+    def ensure_partitions(months_ahead=3):
+        """Create partitions from the current month to ``months_ahead`` ahead
+
+        Returns the months that now have a partition, or an empty list when
+        the table is not partitioned.
+        """
+        if not EventPartitionManager.is_partitioned():
+            return []
+        current = month_start(timezone.localdate())
+        months = [add_months(current, offset) for offset in range(months_ahead + 1)]
+        for month in months:
+            EventPartitionManager.create_partition(month)
+        return months
+
+    @staticmethod
+    def lock_month(month):
+        """Block writes to ``month``'s partition until the transaction ends
+
+        Returns whether the month has a partition of its own. Must run
+        inside an atomic block.
+        """
+        if month not in EventPartitionManager.list_partitions():
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {partition_name(month)} IN EXCLUSIVE MODE")
+        return True
+
+    @staticmethod
+    def drop_month(month, ids=None):
+        """Remove the events of ``month`` from the live table
+
+        Detaches and drops the month's partition when there is one, otherwise
+        deletes the rows in bounded chunks: every row of the month, or only
+        those whose id is in ``ids``.
+        """
+        if month in EventPartitionManager.list_partitions():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"ALTER TABLE {EVENTS_TABLE} "
+                    f"DETACH PARTITION {partition_name(month)}"
+                )
+                cursor.execute(f"DROP TABLE {partition_name(month)}")
+            return
+
+        from .models import CartEvent
+
+        if ids is not None:
+            ids = iter(ids)
+            while chunk := list(islice(ids, 5000)):
+                CartEvent.objects.filter(id__in=chunk).delete()
+            return
+
+        start, end = month_bounds(month)
+        events = CartEvent.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        while True:
+            ids = list(events.values_list("id", flat=True)[:5000])
+            if not ids:
+                break
+            CartEvent.objects.filter(id__in=ids).delete()
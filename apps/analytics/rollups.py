@@ -0,0 +1,252 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.carts.models import Cart
+
+from .archive import EventArchive
+from .models import CartEvent, DailyCartStats, MaterializationWatermark
+
+DAILY_STATS_WATERMARK = "daily_cart_stats"
+
+
+def day_start(day):
+    """Return the aware datetime at which ``day`` starts"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class DailyStatsMaterializer:
+    """Incrementally maintains the DailyCartStats rollup"""
+
+    @staticmethod
+    def get_horizon():
+        """Start of the first day that is not materialized yet, or None"""
+        return (
+            MaterializationWatermark.objects.filter(name=DAILY_STATS_WATERMARK)
+            .values_list("value", flat=True)
+            .first()
+        )
+
+    @staticmethod
+    def materialize(now=None):
+        """Recompute every closed day touched since the last watermark
+
+        A day is dirty when an event was logged on it, or when a cart created
+        on it changed after the watermark (carts move between statuses). The
+        day before today is always recomputed to pick up late commits.
+        Returns the list of recomputed dates.
+        """
+        now = now or timezone.now()
+        today = timezone.localdate(now)
+        horizon = day_start(today)
+
+        with transaction.atomic():
+            (
+                watermark,
+                _,
+            ) = MaterializationWatermark.objects.select_for_update().get_or_create(
+                name=DAILY_STATS_WATERMARK
+            )
+            events = CartEvent.objects.filter(timestamp__lt=horizon)
+            carts = Cart.objects.filter(created_at__lt=horizon)
+            if watermark.value is not None:
+                events = events.filter(timestamp__gte=watermark.value)
+                carts = carts.filter(updated_at__gte=watermark.value)
+
+            dirty = set(
+                events.annotate(day=TruncDate("timestamp"))
+                .values_list("day", flat=True)
+                .distinct()
+            )
+            dirty.update(
+                carts.annotate(day=TruncDate("created_at"))
+                .values_list("day", flat=True)
+                .distinct()
+            )
+            if watermark.value is not None:
+                dirty.add(today - timedelta(days=1))
+
+            for day in sorted(dirty):
+                DailyStatsMaterializer._materialize_day(day)
+
+            watermark.value = horizon
+            watermark.save(update_fields=["value", "updated_at"])
+
+        return sorted(dirty)
+
+    @staticmethod
+    def rematerialize(days):
+        """Recompute the given days if the rollup already covers them
+
+        Used after backfills, whose events land behind the watermark. Holds
+        the watermark lock like ``materialize``, so the two never interleave.
+        Returns the list of recomputed dates.
+        """
+        with transaction.atomic():
+            horizon = (
+                MaterializationWatermark.objects.select_for_update()
+                .filter(name=DAILY_STATS_WATERMARK)
+                .values_list("value", flat=True)
+                .first()
+            )
+            if horizon is None:
+                return []
+            covered = sorted(
+                day for day in set(days) if day < timezone.localdate(horizon)
+            )
+            for day in covered:
+                DailyStatsMaterializer._materialize_day(day)
+        return covered
+
+    @staticmethod
+    def _materialize_day(day):
+        """Replace the rollup rows of a single day from the raw tables"""
+        start = day_start(day)
+        end = day_start(day + timedelta(days=1))
+
+        cart_counts = (
+            Cart.objects.filter(created_at__gte=start, created_at__lt=end)
+            .values("status")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        event_counts = (
+            CartEvent.objects.filter(timestamp__gte=start, timestamp__lt=end)
+            .values("event_type")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+
+        # Events of archived months only survive in their segments
+        events_by_type = {row["event_type"]: row["count"] for row in event_counts}
+        archive = EventArchive()
+        if archive.reaches(start):
+            for event_type, count in archive.count_by_event_type(start, end).items():
+                events_by_type[event_type] = events_by_type.get(event_type, 0) + count
+
+        rows = [
+            DailyCartStats(date=day, status=row["status"], count=row["count"])
+            for row in cart_counts
+        ]
+        rows += [
+            DailyCartStats(date=day, event_type=event_type, count=count)
+            for event_type, count in events_by_type.items()
+        ]
+
+        DailyCartStats.objects.filter(date=day).delete()
+        DailyCartStats.objects.bulk_create(rows)
+
+    @staticmethod
+    def split_window(start, end, horizon=None):
+        """Split ``[start, end)`` into raw ranges and a rollup date range
+
+        Returns ``(raw_ranges, rollup_range)`` where ``raw_ranges`` is a list
+        of ``(start, end)`` datetimes to read from raw tables and
+        ``rollup_range`` is a ``(first_date, end_date)`` half-open date range
+        served by DailyCartStats, or None.
+        """
+        if horizon is None:
+            horizon = DailyStatsMaterializer.get_horizon()
+        if horizon is None:
+            return [(start, end)], None
+
+        first_day = timezone.localdate(start)
+        if day_start(first_day) < start:
+            first_day += timedelta(days=1)
+        last_day = min(timezone.localdate(horizon), timezone.localdate(end))
+
+        if first_day >= last_day:
+            return [(start, end)], None
+
+        raw_ranges = []
+        if start < day_start(first_day):
+            raw_ranges.append((start, day_start(first_day)))
+        if day_start(last_day) < end:
+            raw_ranges.append((day_start(last_day), end))
+        return raw_ranges, (first_day, last_day)
+
+    @staticmethod
+    def count_carts(start, end, status=None):
+        """Count carts created in ``[start, end)``, optionally by status"""
+        raw_ranges, rollup_range = DailyStatsMaterializer.split_window(start, end)
+
+        total = 0
+        for range_start, range_end in raw_ranges:
+            carts = Cart.objects.filter(
+                created_at__gte=range_start, created_at__lt=range_end
+            )
+            if status is not None:
+                carts = carts.filter(status=status)
+            total += carts.count()
+
+        if rollup_range:
+            rows = DailyCartStats.objects.filter(
+                date__gte=rollup_range[0], date__lt=rollup_range[1], event_type=""
+            )
+            if status is not None:
+                rows = rows.filter(status=status)
+            total += rows.aggregate(total=Sum("count"))["total"] or 0
+
+        return total
+
+    @staticmethod
+    def count_events_by_day(start, end):
+        """Return ``{date: count}`` of events logged in ``[start, end)``"""
+        raw_ranges, rollup_range = DailyStatsMaterializer.split_window(start, end)
+        archive = EventArchive()
+
+        counts = {}
+        for range_start, range_end in raw_ranges:
+            if archive.reaches(range_start):
+                archived = archive.count_by_day(
+                    range_start, min(range_end, archive.horizon())
+                )
+                for date, count in archived.items():
+                    counts[date] = counts.get(date, 0) + count
+            rows = (
+                CartEvent.objects.filter(
+                    timestamp__gte=range_start, timestamp__lt=range_end
+                )
+                .annotate(date=TruncDate("timestamp"))
+                .values("date")
+                .annotate(count=Count("id"))
+                .order_by()
+            )
+            for row in rows:
+                counts[row["date"]] = counts.get(row["date"], 0) + row["count"]
+
+        if rollup_range:
+            rows = (
+                DailyCartStats.objects.filter(
+                    date__gte=rollup_range[0], date__lt=rollup_range[1], status=""
+                )
+                .values("date")
+                .annotate(count=Sum("count"))
+                .order_by()
+            )
+            for row in rows:
+                counts[row["date"]] = counts.get(row["date"], 0) + row["count"]
+
+        return counts
+
+    @staticmethod
+    def get_day(day):
+        """Return ``(cart_counts_by_status, total_events)`` for a closed day
+
+        Returns None when the day has not been materialized yet.
+        """
+        horizon = DailyStatsMaterializer.get_horizon()
+        if horizon is None or day >= timezone.localdate(horizon):
+            return None
+
+        cart_counts = {}
+        total_events = 0
+        for row in DailyCartStats.objects.filter(date=day):
+            if row.status:
+                cart_counts[row.status] = row.count
+            else:
+                total_events += row.count
+        return cart_counts, total_events
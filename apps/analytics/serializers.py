@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from .archive import EventArchive
 from .models import CartEvent
 
 
@@ -50,7 +51,10 @@ class TimeMetricsSerializer(serializers.Serializer):
     timeframe_days = serializers.IntegerField()
     total_carts = serializers.IntegerField()
     total_events = serializers.IntegerField()
+    total_sessions = serializers.IntegerField()
     average_session_duration_seconds = serializers.FloatField()
+    median_session_duration_seconds = serializers.FloatField()
+    p95_session_duration_seconds = serializers.FloatField()
     daily_activity = serializers.ListField()
     most_active_hour = serializers.IntegerField(allow_null=True)
 
@@ -62,3 +66,27 @@ class DailyMetricsSerializer(serializers.Serializer):
     abandoned_carts = serializers.IntegerField()
     total_events = serializers.IntegerField()
     new_users = serializers.IntegerField()
+
+
+class CartEventExportSerializer(serializers.Serializer):
+    """Query parameters of the cart event export"""
+
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    # ``format`` is taken by DRF's renderer override
+    file_format = serializers.ChoiceField(choices=["ndjson", "csv"], default="ndjson")
+    event_type = serializers.ChoiceField(choices=CartEvent.EVENT_TYPES, required=False)
+    user = serializers.UUIDField(required=False)
+    product = serializers.UUIDField(required=False)
+    cart = serializers.UUIDField(required=False)
+
+    def validate(self, attrs):
+        if attrs["start"] >= attrs["end"]:
+            raise serializers.ValidationError({"end": "Must be after start"})
+        # The export reads the live table only; archived months are files
+        horizon = EventArchive().horizon()
+        if horizon is not None and attrs["start"] < horizon:
+            raise serializers.ValidationError(
+                {"start": f"Events before {horizon.isoformat()} are archived"}
+            )
+        return attrs
@@ -1,24 +1,33 @@
+from collections import Counter
 from datetime import timedelta
 from django.utils import timezone
 from apps.carts.models import Cart
 from apps.products.models import Product
+from utils.concurrency import gather_queries, run_query
+from .archive import EventArchive
+from .cache import cached_analytics
+from .cooccurrence import CooccurrenceService
+from .counters import ProductCounterService
 from .models import CartEvent
-from django.db.models import Count
+from .rollups import DailyStatsMaterializer
+from .sessionization import SessionAnalyzer
+from .sinks import get_event_sink
+from django.db.models import Count, DecimalField, F, Q, Sum
 
 
 class AnalyticsService:
     """Service class for analytics calculations"""
 
     @staticmethod
+    @cached_analytics()
     def calculate_abandonment_rate(days=30):
         """Calculate cart abandonment rate for given period"""
-        start_date = timezone.now() - timedelta(days=days)
-
-        total_carts = Cart.objects.filter(created_at__gte=start_date).count()
-        abandoned_carts = Cart.objects.filter(
-            status="abandoned", created_at__gte=start_date
-        ).count()
+        total_carts = AnalyticsService._get_total_carts_count(days)
+        abandoned_carts = AnalyticsService._get_abandoned_carts_count(days)
+        return AnalyticsService._abandonment_rate(total_carts, abandoned_carts)
 
+    @staticmethod
+    def _abandonment_rate(total_carts, abandoned_carts):
         if total_carts == 0:
             return 0
 
@@ -26,30 +35,94 @@ class AnalyticsService:
         return round(abandonment_rate, 2)
 
     @staticmethod
+    @cached_analytics()
+    def _get_total_carts_count(days):
+        """Count carts created in the last ``days`` days"""
+        now = timezone.now()
+        return DailyStatsMaterializer.count_carts(now - timedelta(days=days), now)
+
+    @staticmethod
+    @cached_analytics()
+    def _get_abandoned_carts_count(days):
+        """Count abandoned carts created in the last ``days`` days"""
+        now = timezone.now()
+        return DailyStatsMaterializer.count_carts(
+            now - timedelta(days=days), now, status="abandoned"
+        )
+
+    @staticmethod
+    @cached_analytics("user", arg="user_id")
     def get_user_behavior_analytics(user_id):
         """Get comprehensive analytics for a specific user"""
-        user_carts = Cart.objects.filter(user_id=user_id)
-        user_events = CartEvent.objects.filter(user_id=user_id)
-
-        # Basic metrics
-        total_carts = user_carts.count()
-        purchased_carts = user_carts.filter(status="purchased").count()
-        abandoned_carts = user_carts.filter(status="abandoned").count()
+        return AnalyticsService._user_behavior(
+            user_id,
+            AnalyticsService._user_cart_stats(user_id),
+            *AnalyticsService._user_activity(user_id),
+        )
 
-        # Cart value analysis
-        cart_values = []
-        for cart in user_carts.filter(status="purchased"):
-            total = sum(item.product.price * item.quantity for item in cart.items.all())
-            cart_values.append(float(total))
+    @staticmethod
+    def _user_cart_stats(user_id):
+        """Cart counts and purchased value in one conditional aggregate"""
+        purchased = Q(status="purchased")
+        return Cart.objects.filter(user_id=user_id).aggregate(
+            total_carts=Count("id", distinct=True),
+            purchased_carts=Count("id", distinct=True, filter=purchased),
+            abandoned_carts=Count("id", distinct=True, filter=Q(status="abandoned")),
+            purchased_value=Sum(
+                F("items__quantity") * F("items__product__price"),
+                filter=purchased,
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+        )
 
-        avg_cart_value = sum(cart_values) / len(cart_values) if cart_values else 0
+    @staticmethod
+    def _user_activity(user_id):
+        """The five products the user added or bought most, and their event count
 
-        # Product affinity
-        product_interactions = (
-            user_events.filter(event_type__in=["added", "purchased"])
+        Both include the archived months.
+        """
+        archived = Counter()
+        if EventArchive().horizon() is not None:
+            archived = EventArchive().count_for_user(user_id)
+        favorites = (
+            CartEvent.objects.filter(
+                user_id=user_id, event_type__in=["added", "purchased"]
+            )
             .values("product__name")
             .annotate(count=Count("id"))
-            .order_by("-count")[:5]
+            .order_by("-count")
+        )
+        total_interactions = CartEvent.objects.filter(user_id=user_id).count()
+        if not archived:
+            return list(favorites[:5]), total_interactions
+
+        names = dict(
+            Product.objects.filter(
+                pk__in={product_id for product_id, _ in archived}
+            ).values_list("pk", "name")
+        )
+        counts = Counter()
+        for (product_id, event_type), count in archived.items():
+            if event_type in ("added", "purchased"):
+                counts[names.get(product_id)] += count
+        for favorite in favorites:
+            counts[favorite["product__name"]] += favorite["count"]
+        favorite_products = [
+            {"product__name": name, "count": count}
+            for name, count in counts.most_common(5)
+        ]
+        return favorite_products, total_interactions + sum(archived.values())
+
+    @staticmethod
+    def _user_behavior(user_id, cart_stats, favorite_products, total_interactions):
+        total_carts = cart_stats["total_carts"]
+        purchased_carts = cart_stats["purchased_carts"]
+        abandoned_carts = cart_stats["abandoned_carts"]
+
+        avg_cart_value = (
+            float(cart_stats["purchased_value"] or 0) / purchased_carts
+            if purchased_carts
+            else 0
         )
 
         return {
@@ -62,121 +135,120 @@ class AnalyticsService:
                 round((abandoned_carts / total_carts * 100), 2) if total_carts else 0
             ),
             "average_cart_value": round(avg_cart_value, 2),
-            "favorite_products": list(product_interactions),
-            "total_interactions": user_events.count(),
+            "favorite_products": favorite_products,
+            "total_interactions": total_interactions,
         }
 
     @staticmethod
+    @cached_analytics("product", arg="product_id")
     def get_product_insights(product_id):
         """Get analytics for a specific product"""
-        product_events = CartEvent.objects.filter(product_id=product_id)
-
-        # Event counts by type
-        event_counts = product_events.values("event_type").annotate(count=Count("id"))
+        # Served from the incrementally maintained counters
+        counts, recent_activity = ProductCounterService.get_insights(product_id)
+        return AnalyticsService._product_insights(product_id, counts, recent_activity)
 
+    @staticmethod
+    def _product_insights(product_id, counts, recent_activity):
         # Conversion rate (added to purchased)
-        added_count = product_events.filter(event_type="added").count()
-        purchased_count = product_events.filter(event_type="purchased").count()
-
-        conversion_rate = (purchased_count / added_count * 100) if added_count else 0
-
-        # Time-based analysis (last 30 days)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        recent_events = product_events.filter(timestamp__gte=thirty_days_ago)
+        added_count = counts["added"]
+        conversion_rate = (
+            (counts["purchased"] / added_count * 100) if added_count else 0
+        )
 
         return {
             "product_id": product_id,
-            "total_interactions": product_events.count(),
-            "event_breakdown": list(event_counts),
+            "total_interactions": sum(counts.values()),
+            "event_breakdown": [
+                {"event_type": event_type, "count": count}
+                for event_type, count in counts.items()
+                if count
+            ],
             "conversion_rate": round(conversion_rate, 2),
-            "recent_activity": recent_events.count(),
-            "abandonment_count": product_events.filter(event_type="abandoned").count(),
+            "recent_activity": recent_activity,
+            "abandonment_count": counts["abandoned"],
         }
 
     @staticmethod
+    @cached_analytics()
     def get_time_based_metrics(days=30):
         """Get time-based analytics metrics"""
-        start_date = timezone.now() - timedelta(days=days)
+        now = timezone.now()
+        start_date = now - timedelta(days=days)
 
-        recent_events = CartEvent.objects.filter(timestamp__gte=start_date)
-        recent_carts = Cart.objects.filter(created_at__gte=start_date)
+        # Session duration analysis over inactivity-gap sessions
+        sessions = SessionAnalyzer.get_session_stats(start_date, now)
 
-        # Session duration analysis (simplified)
-        cart_sessions = []
-        for cart in recent_carts:
-            events = CartEvent.objects.filter(cart=cart).order_by("timestamp")
-            if events.count() > 1:
-                duration = (
-                    events.last().timestamp - events.first().timestamp
-                ).total_seconds()
-                cart_sessions.append(duration)
+        # Event frequency, served from the daily rollup for closed days
+        events_by_day = DailyStatsMaterializer.count_events_by_day(start_date, now)
 
-        avg_session_duration = (
-            sum(cart_sessions) / len(cart_sessions) if cart_sessions else 0
+        return AnalyticsService._time_metrics(
+            days,
+            sessions,
+            events_by_day,
+            DailyStatsMaterializer.count_carts(start_date, now),
+            AnalyticsService._most_active_hour_since(start_date, now),
         )
 
-        # Event frequency
-        events_by_day = (
-            recent_events.extra({"date": "DATE(timestamp)"})
-            .values("date")
-            .annotate(count=Count("id"))
-            .order_by("date")
+    @staticmethod
+    def _most_active_hour_since(start_date, now):
+        return AnalyticsService._get_most_active_hour(
+            CartEvent.objects.filter(timestamp__gte=start_date),
+            archived=AnalyticsService._archived_hours(start_date, now),
         )
 
+    @staticmethod
+    def _time_metrics(days, sessions, events_by_day, total_carts, most_active_hour):
         return {
             "timeframe_days": days,
-            "total_carts": recent_carts.count(),
-            "total_events": recent_events.count(),
-            "average_session_duration_seconds": round(avg_session_duration, 2),
-            "daily_activity": list(events_by_day),
-            "most_active_hour": AnalyticsService._get_most_active_hour(recent_events),
+            "total_carts": total_carts,
+            "total_events": sum(events_by_day.values()),
+            "total_sessions": sessions["total_sessions"],
+            "average_session_duration_seconds": sessions["mean"],
+            "median_session_duration_seconds": sessions["median"],
+            "p95_session_duration_seconds": sessions["p95"],
+            "daily_activity": [
+                {"date": date, "count": count}
+                for date, count in sorted(events_by_day.items())
+            ],
+            "most_active_hour": most_active_hour,
         }
 
     @staticmethod
+    @cached_analytics()
     def get_frequently_added_together(limit=10):
         """Find products frequently added to cart together"""
-        from django.db import connection
-
-        # This is a simplified implementation
-        # In production, you might use more advanced querying
-
-        cart_items_query = """
-        SELECT ci1.product_id as product1, ci2.product_id as product2, COUNT(*) as 
-        frequency
-        FROM cart_items ci1
-        JOIN cart_items ci2 ON ci1.cart_id = ci2.cart_id AND 
-        ci1.product_id < ci2.product_id
-        GROUP BY ci1.product_id, ci2.product_id
-        ORDER BY frequency DESC
-        LIMIT %s
-        """
+        return CooccurrenceService.top_pairs(limit)
 
-        with connection.cursor() as cursor:
-            cursor.execute(cart_items_query, [limit])
-            results = cursor.fetchall()
-
-        affinity_pairs = []
-        for product1_id, product2_id, frequency in results:
-            try:
-                product1 = Product.objects.get(id=product1_id)
-                product2 = Product.objects.get(id=product2_id)
-                affinity_pairs.append(
-                    {
-                        "product_a": {"id": product1.id, "name": product1.name},
-                        "product_b": {"id": product2.id, "name": product2.name},
-                        "frequency": frequency,
-                    }
-                )
-            except Product.DoesNotExist:
-                continue
-
-        return affinity_pairs
-
-    @staticmethod
-    def _get_most_active_hour(events_queryset):
+    @staticmethod
+    @cached_analytics()
+    def get_also_added_products(product_id, limit=10):
+        """Find products most often in the same cart as a product"""
+        return CooccurrenceService.also_added(product_id, limit)
+
+    @staticmethod
+    def _archived_hours(start, end):
+        """Events per hour from archived months the window reaches back to"""
+        archive = EventArchive()
+        if not archive.reaches(start):
+            return None
+        return archive.count_by_hour(start, min(end, archive.horizon()))
+
+    @staticmethod
+    def _get_most_active_hour(events_queryset, archived=None):
         """Helper method to find most active hour"""
         from django.db.models.functions import ExtractHour
 
+        if archived:
+            hours = archived.copy()
+            for row in (
+                events_queryset.annotate(hour=ExtractHour("timestamp"))
+                .values("hour")
+                .annotate(count=Count("id"))
+                .order_by()
+            ):
+                hours[row["hour"]] += row["count"]
+            return hours.most_common(1)[0][0]
+
         hour_activity = (
             events_queryset.annotate(hour=ExtractHour("timestamp"))
             .values("hour")
@@ -192,20 +264,170 @@ class AnalyticsService:
         """Get daily summary metrics"""
         if date is None:
             date = timezone.now().date()
+        # Resolved before caching, so today is never served yesterday's entry
+        return AnalyticsService._get_daily_metrics(date)
 
-        day_start = timezone.make_aware(
-            timezone.datetime.combine(date, timezone.datetime.min.time())
-        )
-        day_end = day_start + timedelta(days=1)
-
-        daily_events = CartEvent.objects.filter(timestamp__range=[day_start, day_end])
-        daily_carts = Cart.objects.filter(created_at__range=[day_start, day_end])
+    @staticmethod
+    @cached_analytics()
+    def _get_daily_metrics(date):
+        # Closed days are served from the rollup
+        materialized = DailyStatsMaterializer.get_day(date)
+        if materialized is not None:
+            cart_counts, total_events = materialized
+        else:
+            day_start = timezone.make_aware(
+                timezone.datetime.combine(date, timezone.datetime.min.time())
+            )
+            day_end = day_start + timedelta(days=1)
+
+            cart_counts = dict(
+                Cart.objects.filter(created_at__gte=day_start, created_at__lt=day_end)
+                .values_list("status")
+                .annotate(count=Count("id"))
+                .order_by()
+            )
+            total_events = CartEvent.objects.filter(
+                timestamp__gte=day_start, timestamp__lt=day_end
+            ).count()
+            archive = EventArchive()
+            if archive.reaches(day_start):
+                total_events += sum(archive.count_by_day(day_start, day_end).values())
 
         return {
             "date": date.isoformat(),
-            "active_carts": daily_carts.filter(status="active").count(),
-            "completed_purchases": daily_carts.filter(status="purchased").count(),
-            "abandoned_carts": daily_carts.filter(status="abandoned").count(),
-            "total_events": daily_events.count(),
+            "active_carts": cart_counts.get("active", 0),
+            "completed_purchases": cart_counts.get("purchased", 0),
+            "abandoned_carts": cart_counts.get("abandoned", 0),
+            "total_events": total_events,
             "new_users": 0,  # Would need user registration dates
         }
+
+    # Async variants for the ASGI views. Their independent queries run
+    # concurrently, each on its own connection, so a call takes about as
+    # long as its slowest query. Results share the sync methods' cache.
+
+    @staticmethod
+    async def aget_abandonment_stats(days=30):
+        """Abandonment rate of the last ``days`` days with its cart counts"""
+        total_carts, abandoned_carts = await gather_queries(
+            lambda: AnalyticsService._get_total_carts_count(days),
+            lambda: AnalyticsService._get_abandoned_carts_count(days),
+        )
+        return {
+            "abandonment_rate": AnalyticsService._abandonment_rate(
+                total_carts, abandoned_carts
+            ),
+            "timeframe_days": days,
+            "total_carts": total_carts,
+            "abandoned_carts": abandoned_carts,
+        }
+
+    @staticmethod
+    @cached_analytics("user", arg="user_id", name="get_user_behavior_analytics")
+    async def aget_user_behavior_analytics(user_id):
+        """Async get_user_behavior_analytics"""
+        cart_stats, activity = await gather_queries(
+            lambda: AnalyticsService._user_cart_stats(user_id),
+            lambda: AnalyticsService._user_activity(user_id),
+        )
+        return AnalyticsService._user_behavior(user_id, cart_stats, *activity)
+
+    @staticmethod
+    @cached_analytics("product", arg="product_id", name="get_product_insights")
+    async def aget_product_insights(product_id):
+        """Async get_product_insights"""
+        counts, recent_activity = await run_query(
+            lambda: ProductCounterService.get_insights(product_id)
+        )
+        return AnalyticsService._product_insights(product_id, counts, recent_activity)
+
+    @staticmethod
+    @cached_analytics(name="get_time_based_metrics")
+    async def aget_time_based_metrics(days=30):
+        """Async get_time_based_metrics"""
+        now = timezone.now()
+        start_date = now - timedelta(days=days)
+
+        sessions, events_by_day, total_carts, most_active_hour = await gather_queries(
+            lambda: SessionAnalyzer.get_session_stats(start_date, now),
+            lambda: DailyStatsMaterializer.count_events_by_day(start_date, now),
+            lambda: DailyStatsMaterializer.count_carts(start_date, now),
+            lambda: AnalyticsService._most_active_hour_since(start_date, now),
+        )
+        return AnalyticsService._time_metrics(
+            days, sessions, events_by_day, total_carts, most_active_hour
+        )
+
+
+class EventService:
+    """Service class for recording cart events"""
+
+    @staticmethod
+    def log_event(cart, user, event_type, product=None, quantity_changed=0):
+        """Record a cart event, stamping the duration of the user's session
+
+        Product events also bump the product's event counters, inside the
+        caller's transaction. The event itself is handed to the configured
+        event sink, which may write it after the transaction commits; sinks
+        with ``stamps_sessions`` set the session duration themselves.
+        """
+        if product is not None:
+            ProductCounterService.record(product.pk, event_type)
+
+        sink = get_event_sink()
+        now = timezone.now()
+        event = CartEvent(
+            cart=cart,
+            user=user,
+            product=product,
+            event_type=event_type,
+            quantity_changed=quantity_changed,
+            timestamp=now,
+        )
+        if not sink.stamps_sessions:
+            event.session_duration_seconds = (
+                SessionAnalyzer.get_current_session_duration(user, now)
+            )
+        sink.submit(event)
+        return event
+
+    @staticmethod
+    def log_events(cart, user, changes):
+        """Record several cart events of one user at once
+
+        ``changes`` holds ``(event_type, product, quantity_changed)`` tuples.
+        Counters are bumped once per product and event type, the session is
+        looked up once and the events reach the sink as a single batch.
+        """
+        if not changes:
+            return []
+
+        amounts = Counter(
+            (product.pk, event_type)
+            for event_type, product, _ in changes
+            if product is not None
+        )
+        for (product_id, event_type), amount in amounts.items():
+            ProductCounterService.record(product_id, event_type, amount=amount)
+
+        sink = get_event_sink()
+        now = timezone.now()
+        duration = (
+            0
+            if sink.stamps_sessions
+            else SessionAnalyzer.get_current_session_duration(user, now)
+        )
+        events = [
+            CartEvent(
+                cart=cart,
+                user=user,
+                product=product,
+                event_type=event_type,
+                quantity_changed=quantity_changed,
+                timestamp=now,
+                session_duration_seconds=duration,
+            )
+            for event_type, product, quantity_changed in changes
+        ]
+        sink.submit_many(events)
+        return events
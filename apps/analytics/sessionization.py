@@ -0,0 +1,122 @@
+import heapq
+import math
+import statistics
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import OuterRef, Subquery
+
+from .archive import EventArchive
+from .models import CartEvent
+
+
+def get_session_gap():
+    """Inactivity gap after which a user's next event starts a new session"""
+    return timedelta(seconds=settings.ANALYTICS_SESSION_GAP_SECONDS)
+
+
+class SessionAnalyzer:
+    """Splits cart events into per-user sessions in a single ordered pass"""
+
+    @staticmethod
+    def iter_session_durations(start, end, gap=None):
+        """Yield the duration in seconds of every multi-event session
+
+        Events in ``[start, end)`` are streamed once, ordered by user and
+        time, and a session closes whenever the gap between two consecutive
+        events of the same user exceeds the inactivity gap. Archived months
+        are merged in when the window reaches back to them.
+        """
+        gap = gap or get_session_gap()
+        rows = (
+            CartEvent.objects.filter(timestamp__gte=start, timestamp__lt=end)
+            .order_by("user_id", "timestamp")
+            .values_list("user_id", "timestamp")
+            .iterator(chunk_size=5000)
+        )
+        archive = EventArchive()
+        if archive.reaches(start):
+            archived = (
+                (row["user_id"], row["timestamp"])
+                for row in archive.iter_rows(start, end)
+            )
+            rows = heapq.merge(archived, rows)
+
+        current_user = session_start = last_seen = None
+        for user_id, timestamp in rows:
+            if user_id != current_user or timestamp - last_seen > gap:
+                if session_start is not None and last_seen > session_start:
+                    yield (last_seen - session_start).total_seconds()
+                current_user, session_start = user_id, timestamp
+            last_seen = timestamp
+
+        if session_start is not None and last_seen > session_start:
+            yield (last_seen - session_start).total_seconds()
+
+    @staticmethod
+    def get_session_stats(start, end, gap=None):
+        """Return session count with mean, median and p95 duration in seconds"""
+        durations = sorted(SessionAnalyzer.iter_session_durations(start, end, gap))
+        if not durations:
+            return {"total_sessions": 0, "mean": 0, "median": 0, "p95": 0}
+
+        p95_index = max(math.ceil(len(durations) * 0.95) - 1, 0)
+        return {
+            "total_sessions": len(durations),
+            "mean": round(statistics.fmean(durations), 2),
+            "median": round(statistics.median(durations), 2),
+            "p95": round(durations[p95_index], 2),
+        }
+
+    @staticmethod
+    def get_current_session_duration(user, now):
+        """Seconds elapsed in the user's ongoing session, 0 if a new one starts"""
+        last_event = (
+            CartEvent.objects.filter(user=user)
+            .order_by("-timestamp")
+            .values_list("timestamp", "session_duration_seconds")
+            .first()
+        )
+        return SessionAnalyzer._continue_session(last_event, now)
+
+    @staticmethod
+    def stamp_session_durations(events):
+        """Set ``session_duration_seconds`` on a batch of unsaved events
+
+        Each user's events continue from their latest stored event, read
+        with one query for the whole batch, and then from each other in
+        time order.
+        """
+        latest = CartEvent.objects.filter(user_id=OuterRef("pk")).order_by("-timestamp")
+        last_events = {
+            user_id: (timestamp, duration)
+            for user_id, timestamp, duration in get_user_model()
+            .objects.filter(pk__in={event.user_id for event in events})
+            .annotate(
+                last_timestamp=Subquery(latest.values("timestamp")[:1]),
+                last_duration=Subquery(latest.values("session_duration_seconds")[:1]),
+            )
+            .values_list("pk", "last_timestamp", "last_duration")
+            if timestamp is not None
+        }
+        for event in sorted(events, key=lambda event: event.timestamp):
+            event.session_duration_seconds = SessionAnalyzer._continue_session(
+                last_events.get(event.user_id), event.timestamp
+            )
+            last_events[event.user_id] = (
+                event.timestamp,
+                event.session_duration_seconds,
+            )
+        return events
+
+    @staticmethod
+    def _continue_session(last_event, now):
+        if last_event is None:
+            return 0
+
+        last_timestamp, last_duration = last_event
+        elapsed = now - last_timestamp
+        if elapsed > get_session_gap() or elapsed.total_seconds() < 0:
+            return 0
+        return last_duration + int(elapsed.total_seconds())
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.carts.models import Cart
+
+from .cache import AnalyticsCache
+from .models import CartEvent
+
+
+@receiver(post_save, sender=CartEvent)
+def invalidate_on_cart_event(sender, instance, **kwargs):
+    """Bump the analytics watermarks touched by a new cart event"""
+    AnalyticsCache.invalidate(
+        user_ids=[instance.user_id],
+        product_ids=[instance.product_id] if instance.product_id else [],
+    )
+
+
+@receiver(post_save, sender=Cart)
+def invalidate_on_cart(sender, instance, **kwargs):
+    """Bump the analytics watermarks touched by a cart status change"""
+    AnalyticsCache.invalidate(user_ids=[instance.user_id])
@@ -0,0 +1,200 @@
+import atexit
+import json
+import logging
+import threading
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .archive import ARCHIVE_FIELDS, _encode
+from .cache import AnalyticsCache
+from .models import CartEvent
+from .sessionization import SessionAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+class SyncEventSink:
+    """Writes each cart event immediately, inside the caller's transaction"""
+
+    stamps_sessions = False
+
+    def submit(self, event):
+        event.save(force_insert=True)
+
+    def submit_many(self, events):
+        CartEvent.objects.bulk_create(events)
+        AnalyticsCache.invalidate(
+            user_ids=[event.user_id for event in events],
+            product_ids=[event.product_id for event in events if event.product_id],
+        )
+
+    def flush(self):
+        pass
+
+    def shutdown(self):
+        pass
+
+
+class BufferedEventSink:
+    """Queues cart events after commit and writes them with bulk_create
+
+    Events are handed over on ``transaction.on_commit`` so rolled back
+    requests never log anything. A background thread flushes the buffer
+    every ``flush_interval`` seconds or as soon as ``batch_size`` events are
+    waiting. Callers write synchronously when the buffer holds more than
+    ``max_buffered`` events, which bounds memory under sustained load.
+
+    Session durations are stamped at flush time, since the table lacks the
+    events still waiting in the buffer. A batch that fails to write goes
+    back to the buffer; after ``max_retries`` failures in a row it is
+    spilled to an NDJSON file in ``spill_dir`` for ``load_cart_events``,
+    which also reconciles the product counters bumped for it.
+    """
+
+    stamps_sessions = True
+
+    def __init__(
+        self,
+        batch_size=500,
+        flush_interval=1.0,
+        background=True,
+        max_retries=3,
+        spill_dir=None,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = batch_size * 10
+        self.max_retries = max_retries
+        self.spill_dir = Path(spill_dir or settings.ANALYTICS_EVENT_SPILL_DIR)
+        self._failures = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(
+                target=self._run, name="cart-event-sink", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, event):
+        transaction.on_commit(lambda: self._enqueue([event]))
+
+    def submit_many(self, events):
+        transaction.on_commit(lambda: self._enqueue(events))
+
+    def _enqueue(self, events):
+        with self._lock:
+            self._buffer.extend(events)
+            pending = len(self._buffer)
+
+        overflowing = pending >= self.max_buffered
+        if overflowing or (self._thread is None and pending >= self.batch_size):
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+        connection.close()
+
+    def flush(self):
+        """Write every buffered event; returns the number written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+
+            try:
+                SessionAnalyzer.stamp_session_durations(batch)
+                CartEvent.objects.bulk_create(batch, batch_size=self.batch_size)
+            except Exception:
+                self._failures += 1
+                logger.exception(
+                    "Failed to write %d buffered cart events (attempt %d of %d)",
+                    len(batch),
+                    self._failures,
+                    self.max_retries,
+                )
+                if self._failures < self.max_retries:
+                    with self._lock:
+                        self._buffer[:0] = batch
+                else:
+                    self._failures = 0
+                    self.spill(batch)
+                return 0
+
+            self._failures = 0
+
+            AnalyticsCache.bump(
+                user_ids=[event.user_id for event in batch],
+                product_ids=[event.product_id for event in batch if event.product_id],
+            )
+            return len(batch)
+
+    def spill(self, events):
+        """Write ``events`` to a new NDJSON file; returns its path"""
+        path = self.spill_dir / (
+            f"cart_events-spill-{timezone.now():%Y%m%dT%H%M%S}-"
+            f"{uuid.uuid4().hex[:8]}.ndjson"
+        )
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as spill_file:
+                for event in events:
+                    record = {
+                        field: _encode(getattr(event, field))
+                        for field in ARCHIVE_FIELDS
+                    }
+                    spill_file.write(json.dumps(record) + "\n")
+        except OSError:
+            logger.exception("Failed to spill %d cart events", len(events))
+            return None
+
+        logger.error(
+            "Spilled %d cart events to %s; replay them with load_cart_events",
+            len(events),
+            path,
+        )
+        return path
+
+    def shutdown(self):
+        """Stop the background thread and write what is left"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_event_sink():
+    """Return the process-wide sink selected by ANALYTICS_EVENT_SINK"""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                if settings.ANALYTICS_EVENT_SINK == "buffered":
+                    _sink = BufferedEventSink(
+                        batch_size=settings.ANALYTICS_EVENT_BATCH_SIZE,
+                        flush_interval=settings.ANALYTICS_EVENT_FLUSH_INTERVAL,
+                        max_retries=settings.ANALYTICS_EVENT_FLUSH_RETRIES,
+                    )
+                    atexit.register(_sink.shutdown)
+                else:
+                    _sink = SyncEventSink()
+    return _sink
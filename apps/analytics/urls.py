@@ -27,4 +27,11 @@ urlpatterns = [
         views.FrequentlyAddedTogetherView.as_view(),
         name="frequently-added-together",
     ),
+    path(
+        "also-added/<uuid:product_id>/",
+        views.AlsoAddedView.as_view(),
+        name="also-added",
+    ),
+    path("cache-stats/", views.CacheStatsView.as_view(), name="cache-stats"),
+    path("events/export/", views.CartEventExportView.as_view(), name="events-export"),
 ]
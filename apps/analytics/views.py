@@ -1,12 +1,22 @@
+import asyncio
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions
 from rest_framework.response import Response
 
 from apps.products.models import Product
 from apps.users.models import User
+from utils.concurrency import run_query
+from utils.permissions import AdminOnlyPermission
+from utils.views import AsyncAPIView
 
+from .cache import AnalyticsCache
+from .export import EventExporter
 from .serializers import (
     AbandonmentRateSerializer,
+    CartEventExportSerializer,
     DailyMetricsSerializer,
     ProductInsightsSerializer,
     TimeMetricsSerializer,
@@ -15,81 +25,70 @@ from .serializers import (
 from .services import AnalyticsService
 
 
-class AdminOnlyPermission(permissions.BasePermission):
-    """Custom permission to only allow admin users"""
-
-    def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.role == "admin"
-        )
-
-
-class AbandonmentRateView(generics.GenericAPIView):
+class AbandonmentRateView(AsyncAPIView):
     """Get cart abandonment rate analytics - Admin only"""
 
     permission_classes = [permissions.IsAuthenticated, AdminOnlyPermission]
 
-    def get(self, request):
+    async def get(self, request):
         days = int(request.GET.get("days", 30))
 
-        abandonment_rate = AnalyticsService.calculate_abandonment_rate(days)
-        total_carts = AnalyticsService._get_total_carts_count(days)
-        abandoned_carts = AnalyticsService._get_abandoned_carts_count(days)
-
-        data = {
-            "abandonment_rate": abandonment_rate,
-            "timeframe_days": days,
-            "total_carts": total_carts,
-            "abandoned_carts": abandoned_carts,
-        }
-
+        data = await AnalyticsService.aget_abandonment_stats(days)
         serializer = AbandonmentRateSerializer(data)
         return Response(serializer.data)
 
 
-class UserBehaviorView(generics.GenericAPIView):
+class UserBehaviorView(AsyncAPIView):
     """Get user behavior analytics"""
 
     permission_classes = [permissions.IsAuthenticated]
 
-    def get(self, request, user_id):
-        user = get_object_or_404(User, id=user_id)
+    async def get(self, request, user_id):
+        user_exists = User.objects.filter(id=user_id).exists
 
         # Only admin can access other users' analytics
-        if request.user.role != "admin" and request.user.id != user.id:
+        if request.user.role != "admin" and request.user.id != user_id:
+            if not await run_query(user_exists):
+                raise Http404
             return Response(
                 {"error": "Cannot access other users analytics"}, status=403
             )
 
-        analytics_data = AnalyticsService.get_user_behavior_analytics(user_id)
+        exists, analytics_data = await asyncio.gather(
+            run_query(user_exists),
+            AnalyticsService.aget_user_behavior_analytics(user_id),
+        )
+        if not exists:
+            raise Http404
         serializer = UserBehaviorSerializer(analytics_data)
         return Response(serializer.data)
 
 
-class ProductInsightsView(generics.GenericAPIView):
+class ProductInsightsView(AsyncAPIView):
     """Get product performance insights - Admin only"""
 
     permission_classes = [permissions.IsAuthenticated, AdminOnlyPermission]
 
-    def get(self, request, product_id):
-        product = get_object_or_404(Product, id=product_id)
-
-        insights_data = AnalyticsService.get_product_insights(product_id)
+    async def get(self, request, product_id):
+        exists, insights_data = await asyncio.gather(
+            run_query(Product.objects.filter(id=product_id).exists),
+            AnalyticsService.aget_product_insights(product_id),
+        )
+        if not exists:
+            raise Http404
         serializer = ProductInsightsSerializer(insights_data)
         return Response(serializer.data)
 
 
-class TimeMetricsView(generics.GenericAPIView):
+class TimeMetricsView(AsyncAPIView):
     """Get time-based analytics metrics - Admin only"""
 
     permission_classes = [permissions.IsAuthenticated, AdminOnlyPermission]
 
-    def get(self, request):
+    async def get(self, request):
         days = int(request.GET.get("days", 30))
 
-        time_metrics = AnalyticsService.get_time_based_metrics(days)
+        time_metrics = await AnalyticsService.aget_time_based_metrics(days)
         serializer = TimeMetricsSerializer(time_metrics)
         return Response(serializer.data)
 
@@ -126,35 +125,67 @@ class FrequentlyAddedTogetherView(generics.GenericAPIView):
         )
 
 
-# Add helper methods to AnalyticsService
-def _get_total_carts_count(days):
-    from datetime import timedelta
+class AlsoAddedView(generics.GenericAPIView):
+    """Get products most often added together with a product - Admin only"""
+
+    permission_classes = [permissions.IsAuthenticated, AdminOnlyPermission]
 
-    from django.utils import timezone
+    def get(self, request, product_id):
+        product = get_object_or_404(Product, id=product_id)
+        limit = int(request.GET.get("limit", 10))
+        also_added = AnalyticsService.get_also_added_products(product.id, limit)
 
-    from apps.carts.models import Cart
+        return Response(
+            {
+                "product_id": product.id,
+                "also_added": also_added,
+                "limit": limit,
+            }
+        )
 
-    start_date = timezone.now() - timedelta(days=days)
-    return Cart.objects.filter(created_at__gte=start_date).count()
 
+class CacheStatsView(generics.GenericAPIView):
+    """Get analytics cache hit and miss counters - Admin only"""
 
-def _get_abandoned_carts_count(days):
-    from datetime import timedelta
+    permission_classes = [permissions.IsAuthenticated, AdminOnlyPermission]
 
-    from django.utils import timezone
+    def get(self, request):
+        return Response(AnalyticsCache.stats())
 
-    from apps.carts.models import Cart
 
-    start_date = timezone.now() - timedelta(days=days)
-    return Cart.objects.filter(status="abandoned", created_at__gte=start_date).count()
+class CartEventExportView(generics.GenericAPIView):
+    """Stream raw cart events of a time range as NDJSON or CSV - Admin only"""
 
+    permission_classes = [permissions.IsAuthenticated, AdminOnlyPermission]
 
-# Add these to AnalyticsService
-AnalyticsService._get_total_carts_count = staticmethod(_get_total_carts_count)
-AnalyticsService._get_abandoned_carts_count = staticmethod(_get_abandoned_carts_count)
-AnalyticsService.get_frequently_added_together = staticmethod(
-    lambda limit=10: [
-        {"product_1_id": 1, "product_2_id": 2, "count": 150},
-        {"product_1_id": 3, "product_2_id": 4, "count": 120},
-    ][:limit]
-)
+    def get(self, request):
+        params = CartEventExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        options = params.validated_data
+        file_format = options["file_format"]
+
+        exporter = EventExporter(
+            options["start"],
+            options["end"],
+            filters={
+                "event_type": options.get("event_type"),
+                "user_id": options.get("user"),
+                "product_id": options.get("product"),
+                "cart_id": options.get("cart"),
+            },
+        )
+        # The ASGI handler would buffer a sync iterator in full before sending
+        if isinstance(request._request, ASGIRequest):
+            content = exporter.astream(file_format)
+        else:
+            content = exporter.stream(file_format)
+        response = StreamingHttpResponse(
+            content,
+            content_type=EventExporter.content_types[file_format],
+        )
+        filename = (
+            f"cart_events-{options['start']:%Y%m%dT%H%M%S}"
+            f"-{options['end']:%Y%m%dT%H%M%S}.{file_format}"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
@@ -0,0 +1,161 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.analytics.cache import AnalyticsCache
+from apps.analytics.counters import ProductCounterService
+from apps.analytics.models import CartEvent
+
+from .models import Cart, CartItem
+
+logger = logging.getLogger(__name__)
+
+
+class AbandonedCartSweeper:
+    """Marks active carts idle for longer than ``idle`` as abandoned
+
+    Carts are walked in ``(updated_at, id)`` order with a keyset condition,
+    one short transaction per chunk: the chunk is locked, flipped with a
+    single UPDATE and gets one ``abandoned`` event per cart line through a
+    bulk insert. Rows locked by a request are skipped and left for the next
+    sweep. Empty carts are never abandoned.
+    """
+
+    def __init__(self, idle=None, chunk_size=None):
+        self.idle = idle or timedelta(hours=settings.CART_ABANDON_IDLE_HOURS)
+        self.chunk_size = chunk_size or settings.CART_ABANDON_CHUNK_SIZE
+
+    def candidates(self, cutoff):
+        return Cart.objects.filter(
+            status="active", updated_at__lt=cutoff, unique_items__gt=0
+        )
+
+    def count(self, now=None):
+        """Number of carts the next sweep would abandon"""
+        return self.candidates((now or timezone.now()) - self.idle).count()
+
+    def sweep(self, now=None):
+        """Abandon every idle cart; returns the number of abandoned carts"""
+        cutoff = (now or timezone.now()) - self.idle
+        last_key = None
+        abandoned = 0
+        while True:
+            swept, last_key = self.sweep_chunk(cutoff, last_key)
+            abandoned += swept
+            if last_key is None:
+                return abandoned
+
+    def sweep_chunk(self, cutoff, last_key=None):
+        """Abandon the next chunk past ``last_key``
+
+        Returns the number of abandoned carts and the key to resume from,
+        None once the idle carts are exhausted.
+        """
+        queryset = self.candidates(cutoff)
+        if last_key is not None:
+            updated_at, pk = last_key
+            queryset = queryset.filter(
+                Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, pk__gt=pk)
+            )
+
+        with transaction.atomic():
+            chunk = list(
+                queryset.select_for_update(skip_locked=True)
+                .order_by("updated_at", "pk")
+                .values_list("pk", "user_id", "updated_at")[: self.chunk_size]
+            )
+            if not chunk:
+                return 0, None
+
+            now = timezone.now()
+            # Re-checking the candidate conditions drops carts checked out or
+            # edited since the SELECT on databases without row locks
+            abandoned = (
+                self.candidates(cutoff)
+                .filter(pk__in=[pk for pk, _, _ in chunk])
+                .update(status="abandoned", abandoned_at=now, updated_at=now)
+            )
+            carts = dict(
+                Cart.objects.filter(
+                    pk__in=[pk for pk, _, _ in chunk],
+                    status="abandoned",
+                    abandoned_at=now,
+                ).values_list("pk", "user_id")
+            )
+
+            lines = list(
+                CartItem.objects.filter(cart_id__in=carts).values_list(
+                    "cart_id", "product_id"
+                )
+            )
+            CartEvent.objects.bulk_create(
+                CartEvent(
+                    cart_id=cart_id,
+                    user_id=carts[cart_id],
+                    product_id=product_id,
+                    event_type="abandoned",
+                    timestamp=now,
+                )
+                for cart_id, product_id in lines
+            )
+            amounts = Counter(product_id for _, product_id in lines)
+            for product_id, amount in amounts.items():
+                ProductCounterService.record(product_id, "abandoned", amount=amount)
+            AnalyticsCache.invalidate(user_ids=carts.values(), product_ids=amounts)
+
+        last_pk, _, last_updated_at = chunk[-1]
+        next_key = (last_updated_at, last_pk) if len(chunk) == self.chunk_size else None
+        return abandoned, next_key
+
+
+class PeriodicSweeper:
+    """Runs an AbandonedCartSweeper every ``interval`` seconds in a thread"""
+
+    def __init__(self, interval, sweeper=None):
+        self.interval = interval
+        self.sweeper = sweeper or AbandonedCartSweeper()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="abandoned-cart-sweeper", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            close_old_connections()
+            try:
+                abandoned = self.sweeper.sweep()
+            except Exception:
+                logger.exception("Abandoned cart sweep failed")
+            else:
+                if abandoned:
+                    logger.info("Marked %d idle cart(s) as abandoned", abandoned)
+        connection.close()
+
+    def shutdown(self):
+        self._stopped.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+
+_periodic = None
+_periodic_lock = threading.Lock()
+
+
+def start_periodic_sweeper():
+    """Start the process-wide sweeper if CART_ABANDON_SWEEP_INTERVAL is set"""
+    global _periodic
+    if not settings.CART_ABANDON_SWEEP_INTERVAL:
+        return None
+    with _periodic_lock:
+        if _periodic is None:
+            _periodic = PeriodicSweeper(settings.CART_ABANDON_SWEEP_INTERVAL)
+            atexit.register(_periodic.shutdown)
+    return _periodic
@@ -1,20 +1,29 @@
 from django.contrib import admin
 
+from utils.admin import LargeTableAdmin, PaginatedTabularInline
+
 from .models import Cart, CartItem
 
 
-class CartItemInline(admin.TabularInline):
+class CartItemInline(PaginatedTabularInline):
     model = CartItem
     extra = 1
     readonly_fields = ("id", "added_at", "updated_at")
+    raw_id_fields = ("product",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("product")
 
 
 @admin.register(Cart)
-class CartAdmin(admin.ModelAdmin):
+class CartAdmin(LargeTableAdmin):
     list_display = ("id", "user", "status", "created_at", "updated_at")
     list_filter = ("status", "created_at")
+    list_select_related = ("user",)
     search_fields = ("user__email", "user__username")
     readonly_fields = ("id", "created_at", "updated_at")
+    raw_id_fields = ("user",)
+    date_hierarchy = "created_at"
     inlines = [CartItemInline]
 
     fieldsets = (
@@ -30,8 +39,11 @@ class CartAdmin(admin.ModelAdmin):
 
 
 @admin.register(CartItem)
-class CartItemAdmin(admin.ModelAdmin):
+class CartItemAdmin(LargeTableAdmin):
     list_display = ("product", "cart", "quantity", "added_at")
     list_filter = ("added_at",)
+    list_select_related = ("product", "cart__user")
     search_fields = ("product__name", "cart__user__email")
     readonly_fields = ("id", "added_at", "updated_at")
+    raw_id_fields = ("cart", "product")
+    date_hierarchy = "added_at"
@@ -5,3 +5,6 @@ class CartsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.carts"
     verbose_name = "Cart Management"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.carts.abandonment import AbandonedCartSweeper
+
+
+class Command(BaseCommand):
+    help = "Mark active carts idle beyond the threshold as abandoned, in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--idle-hours",
+            type=float,
+            default=settings.CART_ABANDON_IDLE_HOURS,
+            help="Hours without activity after which a cart is abandoned",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.CART_ABANDON_CHUNK_SIZE,
+            help="Carts abandoned per transaction",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the idle carts without changing them",
+        )
+
+    def handle(self, *args, **options):
+        sweeper = AbandonedCartSweeper(
+            idle=timedelta(hours=options["idle_hours"]),
+            chunk_size=options["chunk_size"],
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"Would abandon {sweeper.count()} cart(s)")
+            return
+
+        abandoned = sweeper.sweep()
+        self.stdout.write(self.style.SUCCESS(f"Abandoned {abandoned} cart(s)"))
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("carts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(
+                fields=["status", "created_at"], name="cart_status_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(fields=["user", "status"], name="cart_user_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(fields=["updated_at"], name="cart_updated_idx"),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:10
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_cart_totals(apps, schema_editor):
+    Cart = apps.get_model("carts", "Cart")
+    CartItem = apps.get_model("carts", "CartItem")
+
+    items = CartItem.objects.filter(cart_id=OuterRef("pk")).order_by().values("cart_id")
+
+    def total(expression):
+        return Subquery(items.annotate(total=expression).values("total")[:1])
+
+    Cart.objects.update(
+        total_price=Coalesce(
+            total(
+                Sum(
+                    F("quantity") * F("product__price"),
+                    output_field=models.DecimalField(max_digits=12, decimal_places=2),
+                )
+            ),
+            Value(Decimal("0")),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        ),
+        items_count=Coalesce(total(Sum("quantity")), Value(0)),
+        unique_items=Coalesce(total(Count("id")), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("carts", "0002_analytics_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cart",
+            name="items_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="cart",
+            name="total_price",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name="cart",
+            name="unique_items",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_cart_totals, migrations.RunPython.noop),
+    ]
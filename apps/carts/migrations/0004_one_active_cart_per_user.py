@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:27
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def abandon_duplicate_active_carts(apps, schema_editor):
+    """Keep the most recently updated active cart of each user"""
+    Cart = apps.get_model("carts", "Cart")
+
+    duplicated = (
+        Cart.objects.filter(status="active")
+        .values("user_id")
+        .annotate(carts=Count("id"))
+        .filter(carts__gt=1)
+        .values_list("user_id", flat=True)
+    )
+    for user_id in duplicated:
+        carts = Cart.objects.filter(user_id=user_id, status="active").order_by(
+            "-updated_at", "-created_at"
+        )
+        for cart in carts[1:]:
+            cart.status = "abandoned"
+            cart.abandoned_at = cart.updated_at
+            cart.save(update_fields=["status", "abandoned_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("carts", "0003_cart_totals"),
+    ]
+
+    operations = [
+        migrations.RunPython(abandon_duplicate_active_carts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="cart",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "active")),
+                fields=("user",),
+                name="one_active_cart_per_user",
+            ),
+        ),
+    ]
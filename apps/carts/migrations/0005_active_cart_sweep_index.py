@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("carts", "0004_one_active_cart_per_user"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(
+                condition=models.Q(("status", "active")),
+                fields=["updated_at", "id"],
+                name="cart_active_updated_idx",
+            ),
+        ),
+    ]
@@ -18,6 +18,10 @@ class Cart(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     abandoned_at = models.DateTimeField(null=True, blank=True)
     purchased_at = models.DateTimeField(null=True, blank=True)
+    # Denormalized totals, kept current by CartService
+    total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    items_count = models.PositiveIntegerField(default=0)
+    unique_items = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"Cart {self.id} - {self.user.email}"
@@ -27,6 +31,26 @@ class Cart(models.Model):
         verbose_name = "Cart"
         verbose_name_plural = "Carts"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["status", "created_at"], name="cart_status_created_idx"
+            ),
+            models.Index(fields=["user", "status"], name="cart_user_status_idx"),
+            models.Index(fields=["updated_at"], name="cart_updated_idx"),
+            # Keyset order of the abandoned cart sweeper
+            models.Index(
+                fields=["updated_at", "id"],
+                condition=models.Q(status="active"),
+                name="cart_active_updated_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user"],
+                condition=models.Q(status="active"),
+                name="one_active_cart_per_user",
+            ),
+        ]
 
 
 class CartItem(models.Model):
@@ -67,10 +67,31 @@ class CartItemCreateSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class CartBulkOperationSerializer(serializers.Serializer):
+    ACTIONS = ("add", "update", "remove")
+
+    action = serializers.ChoiceField(choices=ACTIONS)
+    product = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if attrs["action"] != "remove" and "quantity" not in attrs:
+            raise serializers.ValidationError(
+                {"quantity": f"Required for {attrs['action']}"}
+            )
+        return attrs
+
+
+class CartBulkSerializer(serializers.Serializer):
+    operations = CartBulkOperationSerializer(
+        many=True, allow_empty=False, max_length=100
+    )
+
+
 class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
-    total_price = serializers.SerializerMethodField()
-    items_count = serializers.SerializerMethodField()
+    # Number of distinct line items, as this field has always reported
+    items_count = serializers.IntegerField(source="unique_items", read_only=True)
 
     class Meta:
         model = Cart
@@ -83,10 +104,4 @@ class CartSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
-        read_only_fields = ("id", "status", "created_at", "updated_at")
-
-    def get_total_price(self, obj):
-        return sum(item.product.price * item.quantity for item in obj.items.all())
-
-    def get_items_count(self, obj):
-        return obj.items.count()
+        read_only_fields = ("id", "status", "total_price", "created_at", "updated_at")
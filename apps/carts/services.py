@@ -1,9 +1,26 @@
-from django.db import transaction
+import uuid
+from decimal import Decimal
 
-from apps.analytics.models import CartEvent
+from django.db import connection, models, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.analytics.cooccurrence import CooccurrenceService
+from apps.analytics.services import EventService
+from apps.products.cache import CatalogCache
+from apps.products.models import Product
 
 from .models import Cart, CartItem
 
+PRICE_FIELD = models.DecimalField(max_digits=12, decimal_places=2)
+
+
+def _db_value(model, field_name, value):
+    """``value`` prepared as a raw query parameter for ``model.field_name``"""
+    field = model._meta.get_field(field_name)
+    return field.get_db_prep_value(value, connection, prepared=False)
+
 
 class CartService:
     """Service class for cart business logic"""
@@ -11,36 +28,85 @@ class CartService:
     @staticmethod
     def get_or_create_user_cart(user):
         """Get or create active cart for user"""
+        # one_active_cart_per_user turns a concurrent create into an
+        # IntegrityError, which get_or_create answers by fetching the winner
         cart, created = Cart.objects.get_or_create(user=user, status="active")
         return cart
 
+    @staticmethod
+    def lock_user_cart(user):
+        """Get or create the active cart and lock its row until commit
+
+        Every write to a cart takes this lock first, so concurrent changes
+        are serialized and each recomputes the totals over all the lines.
+        """
+        while True:
+            cart = (
+                Cart.objects.select_for_update()
+                .filter(user=user, status="active")
+                .first()
+            )
+            if cart is not None:
+                return cart
+            CartService.get_or_create_user_cart(user)
+
+    @staticmethod
+    def _locked_cart_item(user, cart_item_id):
+        """The user's active cart item, with its cart locked first"""
+        cart = (
+            Cart.objects.select_for_update().filter(user=user, status="active").first()
+        )
+        cart_item = (
+            CartItem.objects.select_related("product")
+            .filter(id=cart_item_id, cart=cart)
+            .first()
+            if cart
+            else None
+        )
+        if cart_item is None:
+            raise ValueError("Cart item not found")
+        cart_item.cart = cart
+        return cart_item
+
+    @staticmethod
+    def get_user_cart_with_items(user):
+        """Get or create active cart with its items and products prefetched"""
+        cart, created = Cart.objects.prefetch_related("items__product").get_or_create(
+            user=user, status="active"
+        )
+        return cart
+
     @staticmethod
     def add_item_to_cart(user, product, quantity):
         """Add item to cart with business logic"""
         with transaction.atomic():
-            cart = CartService.get_or_create_user_cart(user)
+            cart = CartService.lock_user_cart(user)
 
             # Check stock availability
             if product.stock_quantity < quantity:
                 raise ValueError(f"Only {product.stock_quantity} items available")
 
-            # Update existing item or create new
-            cart_item, created = CartItem.objects.get_or_create(
-                cart=cart, product=product, defaults={"quantity": quantity}
-            )
+            cart_item = CartService._upsert_item(cart, product, quantity)
+            if cart_item is None:
+                product.refresh_from_db(fields=["stock_quantity"])
+                in_cart = (
+                    CartItem.objects.filter(cart=cart, product=product)
+                    .values_list("quantity", flat=True)
+                    .first()
+                )
+                if in_cart is None:
+                    raise ValueError(f"Only {product.stock_quantity} items available")
+                raise ValueError(
+                    f"Cannot add {quantity} more. Only {max(product.stock_quantity - in_cart, 0)} additional available"
+                )
 
-            if not created:
-                # Update quantity if item exists
-                new_quantity = cart_item.quantity + quantity
-                if product.stock_quantity < new_quantity:
-                    raise ValueError(
-                        f"Cannot add {quantity} more. Only {product.stock_quantity - cart_item.quantity} additional available"
-                    )
-                cart_item.quantity = new_quantity
-                cart_item.save()
+            # An existing line always ends up above the added quantity
+            if cart_item.quantity == quantity:
+                CooccurrenceService.record_item_added(cart.id, product.id)
+            CartService.refresh_cart_totals(cart)
 
             # Log cart event
-            CartEvent.objects.create(
+            EventService.log_event(
                 cart=cart,
                 user=user,
                 product=product,
@@ -50,16 +116,48 @@ class CartService:
 
             return cart_item
 
+    @staticmethod
+    def _upsert_item(cart, product, quantity):
+        """Insert the line or add to its quantity in one statement
+
+        Nothing is written, and None is returned, when the resulting quantity
+        would exceed the product stock. Concurrent adds to the same line are
+        serialized by the unique (cart, product) index, so none is lost.
+        """
+        now = timezone.now()
+        items = CartItem.objects.raw(
+            "INSERT INTO cart_items "
+            "(id, cart_id, product_id, quantity, added_at, updated_at) "
+            "SELECT %s, %s, %s, %s, %s, %s FROM products "
+            "WHERE id = %s AND stock_quantity >= %s "
+            "ON CONFLICT (cart_id, product_id) DO UPDATE SET "
+            "quantity = cart_items.quantity + EXCLUDED.quantity, "
+            "updated_at = EXCLUDED.updated_at "
+            "WHERE cart_items.quantity + EXCLUDED.quantity <= "
+            "(SELECT stock_quantity FROM products WHERE id = EXCLUDED.product_id) "
+            "RETURNING id, cart_id, product_id, quantity, added_at, updated_at",
+            [
+                _db_value(CartItem, "id", uuid.uuid4()),
+                _db_value(CartItem, "cart", cart.pk),
+                _db_value(CartItem, "product", product.pk),
+                quantity,
+                _db_value(CartItem, "added_at", now),
+                _db_value(CartItem, "updated_at", now),
+                _db_value(Product, "id", product.pk),
+                quantity,
+            ],
+        )
+        cart_item = next(iter(items), None)
+        if cart_item is not None:
+            cart_item.cart = cart
+            cart_item.product = product
+        return cart_item
+
     @staticmethod
     def update_cart_item_quantity(user, cart_item_id, new_quantity):
         """Update cart item quantity with validation"""
         with transaction.atomic():
-            try:
-                cart_item = CartItem.objects.select_related("product", "cart").get(
-                    id=cart_item_id, cart__user=user, cart__status="active"
-                )
-            except CartItem.DoesNotExist:
-                raise ValueError("Cart item not found")
+            cart_item = CartService._locked_cart_item(user, cart_item_id)
 
             if new_quantity < 1:
                 raise ValueError("Quantity must be at least 1")
@@ -74,10 +172,11 @@ class CartService:
 
             cart_item.quantity = new_quantity
             cart_item.save()
+            CartService.refresh_cart_totals(cart_item.cart)
 
             # Log cart event
             if quantity_change != 0:
-                CartEvent.objects.create(
+                EventService.log_event(
                     cart=cart_item.cart,
                     user=user,
                     product=cart_item.product,
@@ -91,15 +190,10 @@ class CartService:
     def remove_item_from_cart(user, cart_item_id):
         """Remove item from cart"""
         with transaction.atomic():
-            try:
-                cart_item = CartItem.objects.select_related("product", "cart").get(
-                    id=cart_item_id, cart__user=user, cart__status="active"
-                )
-            except CartItem.DoesNotExist:
-                raise ValueError("Cart item not found")
+            cart_item = CartService._locked_cart_item(user, cart_item_id)
 
             # Log cart event before deletion
-            CartEvent.objects.create(
+            EventService.log_event(
                 cart=cart_item.cart,
                 user=user,
                 product=cart_item.product,
@@ -108,40 +202,204 @@ class CartService:
             )
 
             cart_item.delete()
+            CooccurrenceService.record_item_removed(
+                cart_item.cart_id, cart_item.product_id
+            )
+            CartService.refresh_cart_totals(cart_item.cart)
 
     @staticmethod
-    def calculate_cart_totals(cart):
-        """Calculate cart totals and item count"""
-        items = cart.items.select_related("product").all()
+    def apply_bulk_operations(user, operations):
+        """Apply a list of add, update and remove operations in one transaction
+
+        Operations are dicts with ``action``, ``product`` (an id) and, for add
+        and update, ``quantity``; they are validated in order against the
+        cart as left by the previous ones. Products are loaded with one query
+        and items are written with bulk_create, bulk_update and one delete.
+        """
+        with transaction.atomic():
+            cart = CartService.lock_user_cart(user)
+            products = Product.objects.in_bulk(
+                {operation["product"] for operation in operations}
+            )
+            items = {item.product_id: item for item in cart.items.all()}
+            quantities = {
+                product_id: item.quantity for product_id, item in items.items()
+            }
+            changes = []
 
-        total_price = sum(item.product.price * item.quantity for item in items)
-        items_count = sum(item.quantity for item in items)
+            for index, operation in enumerate(operations, start=1):
+                product = products.get(operation["product"])
+                if product is None:
+                    raise ValueError(f"Operation {index}: product not found")
+                current = quantities.get(product.pk)
+                action = operation["action"]
 
+                if action == "add":
+                    quantity = operation["quantity"]
+                    new_quantity = (current or 0) + quantity
+                    change = ("added", product, quantity)
+                elif current is None:
+                    raise ValueError(f"Operation {index}: product is not in the cart")
+                elif action == "update":
+                    new_quantity = operation["quantity"]
+                    change = ("updated", product, new_quantity - current)
+                else:
+                    new_quantity = None
+                    change = ("removed", product, -current)
+
+                if new_quantity is not None and product.stock_quantity < new_quantity:
+                    raise ValueError(
+                        f"Operation {index}: only {product.stock_quantity} "
+                        f"{product.name} available"
+                    )
+                quantities[product.pk] = new_quantity
+                if change[2] != 0:
+                    changes.append(change)
+
+            final = {
+                product_id: quantity
+                for product_id, quantity in quantities.items()
+                if quantity is not None
+            }
+            now = timezone.now()
+            created = [
+                CartItem(cart=cart, product=products[product_id], quantity=quantity)
+                for product_id, quantity in final.items()
+                if product_id not in items
+            ]
+            updated = []
+            for product_id, item in items.items():
+                if product_id in final and final[product_id] != item.quantity:
+                    item.quantity = final[product_id]
+                    item.updated_at = now
+                    updated.append(item)
+            removed = [
+                item.pk for product_id, item in items.items() if product_id not in final
+            ]
+
+            CartItem.objects.bulk_create(created)
+            CartItem.objects.bulk_update(updated, ["quantity", "updated_at"])
+            if removed:
+                CartItem.objects.filter(pk__in=removed).delete()
+
+            CooccurrenceService.record_cart_changed(items.keys(), final.keys())
+            EventService.log_events(cart, user, changes)
+            CartService.refresh_cart_totals(cart)
+            return cart
+
+    @staticmethod
+    def calculate_cart_totals(cart):
+        """Calculate cart totals and item count"""
         return {
-            "total_price": total_price,
-            "items_count": items_count,
-            "unique_items": len(items),
+            "total_price": cart.total_price,
+            "items_count": cart.items_count,
+            "unique_items": cart.unique_items,
         }
 
+    @staticmethod
+    def refresh_cart_totals(cart):
+        """Recompute the denormalized totals of ``cart`` from its items
+
+        Also stamps ``updated_at``, which the abandoned cart sweeper reads as
+        the time of the last activity.
+        """
+        totals = CartItem.objects.filter(cart_id=cart.pk).aggregate(
+            total_price=Sum(
+                F("quantity") * F("product__price"), output_field=PRICE_FIELD
+            ),
+            items_count=Sum("quantity"),
+            unique_items=Count("id"),
+        )
+        cart.total_price = totals["total_price"] or Decimal("0")
+        cart.items_count = totals["items_count"] or 0
+        cart.unique_items = totals["unique_items"]
+        cart.updated_at = timezone.now()
+        Cart.objects.filter(pk=cart.pk).update(
+            total_price=cart.total_price,
+            items_count=cart.items_count,
+            unique_items=cart.unique_items,
+            updated_at=cart.updated_at,
+        )
+        return cart
+
+    @staticmethod
+    def refresh_active_cart_totals(product_id):
+        """Recompute the totals of every active cart holding ``product_id``
+
+        Purchased and abandoned carts keep the totals they closed with.
+        Returns the number of updated carts.
+        """
+        items = (
+            CartItem.objects.filter(cart_id=OuterRef("pk")).order_by().values("cart_id")
+        )
+
+        def total(expression):
+            return Subquery(items.annotate(total=expression).values("total")[:1])
+
+        holding = CartItem.objects.filter(product_id=product_id).values("cart_id")
+        return Cart.objects.filter(status="active", pk__in=holding).update(
+            total_price=Coalesce(
+                total(
+                    Sum(F("quantity") * F("product__price"), output_field=PRICE_FIELD)
+                ),
+                Value(Decimal("0")),
+                output_field=PRICE_FIELD,
+            ),
+            items_count=Coalesce(total(Sum("quantity")), Value(0)),
+            unique_items=Coalesce(total(Count("id")), Value(0)),
+        )
+
     @staticmethod
     def checkout_cart(user):
-        """Simulate cart checkout"""
-        with transaction.atomic():
-            cart = CartService.get_or_create_user_cart(user)
+        """Purchase the active cart, decrementing stock atomically
 
-            if cart.items.count() == 0:
+        The cart row and then its products, in primary key order, are locked
+        before anything is written, so concurrent checkouts of overlapping
+        carts queue up instead of deadlocking. Stock is taken with a single
+        conditional UPDATE that can never drive it below zero.
+        """
+        with transaction.atomic():
+            cart = (
+                Cart.objects.select_for_update()
+                .filter(user=user, status="active")
+                .first()
+            )
+            quantities = (
+                dict(cart.items.values_list("product_id", "quantity")) if cart else {}
+            )
+            if not quantities:
                 raise ValueError("Cannot checkout empty cart")
 
-            # Validate stock for all items
-            for item in cart.items.select_related("product").all():
-                if item.product.stock_quantity < item.quantity:
-                    raise ValueError(f"Not enough stock for {item.product.name}")
+            products = list(
+                Product.objects.select_for_update()
+                .filter(pk__in=quantities)
+                .order_by("pk")
+            )
+            for product in products:
+                if product.stock_quantity < quantities[product.pk]:
+                    raise ValueError(f"Not enough stock for {product.name}")
 
-            # Update cart status
-            cart.status = "purchased"
-            cart.save()
+            requested = Case(
+                *[
+                    When(pk=product_id, then=Value(quantity))
+                    for product_id, quantity in quantities.items()
+                ],
+                output_field=models.IntegerField(),
+            )
+            now = timezone.now()
+            taken = Product.objects.filter(
+                pk__in=quantities, stock_quantity__gte=requested
+            ).update(stock_quantity=F("stock_quantity") - requested, updated_at=now)
+            if taken != len(quantities):
+                raise ValueError("Not enough stock to complete checkout")
+            CatalogCache.invalidate()
 
-            # Log purchase event
-            CartEvent.objects.create(cart=cart, user=user, event_type="purchased")
+            cart.status = "purchased"
+            cart.purchased_at = now
+            cart.save(update_fields=["status", "purchased_at", "updated_at"])
 
+            # Log one purchase event per product so product analytics see it
+            EventService.log_events(
+                cart, user, [("purchased", product, 0) for product in products]
+            )
             return cart
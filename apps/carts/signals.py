@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.products.models import Product
+
+from .models import Cart, CartItem
+from .services import CartService
+
+
+@receiver(pre_save, sender=Product)
+def remember_price_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Flag products whose price is about to change"""
+    skipped = update_fields is not None and "price" not in update_fields
+    if raw or skipped or instance._state.adding:
+        instance._price_changed = False
+        return
+    previous = Product.objects.filter(pk=instance.pk).values_list("price", flat=True)
+    instance._price_changed = previous.first() != instance.price
+
+
+@receiver(post_save, sender=Product)
+def reprice_active_carts(sender, instance, created, raw=False, **kwargs):
+    """Refresh the totals of active carts holding a repriced product"""
+    if not created and not raw and getattr(instance, "_price_changed", False):
+        with transaction.atomic():
+            CartService.refresh_active_cart_totals(instance.pk)
+
+
+@receiver(pre_delete, sender=Product)
+def remember_affected_carts(sender, instance, **kwargs):
+    """Note the active carts losing items when a product is deleted"""
+    instance._affected_cart_ids = list(
+        CartItem.objects.filter(product_id=instance.pk, cart__status="active")
+        .values_list("cart_id", flat=True)
+        .distinct()
+    )
+
+
+@receiver(post_delete, sender=Product)
+def refresh_affected_carts(sender, instance, **kwargs):
+    """Refresh the totals of active carts whose items were cascaded away"""
+    for cart in Cart.objects.filter(pk__in=getattr(instance, "_affected_cart_ids", [])):
+        CartService.refresh_cart_totals(cart)
@@ -7,6 +7,7 @@ app_name = "carts"
 urlpatterns = [
     path("", views.CartDetailView.as_view(), name="cart-detail"),
     path("items/", views.CartItemCreateView.as_view(), name="cartitem-create"),
+    path("items/bulk/", views.CartItemBulkView.as_view(), name="cartitem-bulk"),
     path(
         "items/<uuid:id>/", views.CartItemUpdateView.as_view(), name="cartitem-update"
     ),
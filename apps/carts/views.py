@@ -1,8 +1,13 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 
-from .models import CartItem  # ADD CartItem import
-from .serializers import CartItemCreateSerializer, CartItemSerializer, CartSerializer
+from .models import CartItem
+from .serializers import (
+    CartBulkSerializer,
+    CartItemCreateSerializer,
+    CartItemSerializer,
+    CartSerializer,
+)
 from .services import CartService
 
 
@@ -13,7 +18,7 @@ class CartDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return CartService.get_or_create_user_cart(self.request.user)
+        return CartService.get_user_cart_with_items(self.request.user)
 
 
 class CartItemCreateView(generics.CreateAPIView):
@@ -39,6 +44,27 @@ class CartItemCreateView(generics.CreateAPIView):
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
 
+class CartItemBulkView(generics.GenericAPIView):
+    """Apply a batch of add, update and remove operations in one transaction"""
+
+    serializer_class = CartBulkSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            CartService.apply_bulk_operations(
+                request.user, serializer.validated_data["operations"]
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        cart = CartService.get_user_cart_with_items(request.user)
+        return Response(CartSerializer(cart).data)
+
+
 class CartItemUpdateView(generics.UpdateAPIView):
     """Update cart item quantity using service layer"""
 
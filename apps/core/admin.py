@@ -6,8 +6,12 @@ from django.contrib.auth.models import Group
 from apps.users.admin import CustomUserAdmin
 from apps.users.models import User
 from apps.products.models import Product
+from apps.products.admin import ProductAdmin
 from apps.carts.models import Cart, CartItem
+from apps.carts.admin import CartAdmin, CartItemAdmin
 from apps.analytics.models import CartEvent
+from apps.analytics.admin import CartEventAdmin
+from apps.core.dashboard import DashboardStats
 
 
 class ShopTrackAdminSite(AdminSite):
@@ -42,28 +46,11 @@ class ShopTrackAdminSite(AdminSite):
 
     def index(self, request, extra_context=None):
         """
-        Add dashboard statistics to the admin index page
+        Add dashboard statistics to the admin index page, served from
+        the DashboardStats cache
         """
         extra_context = extra_context or {}
-        
-        # Calculate statistics - using available fields
-        extra_context['total_users'] = User.objects.count()
-        extra_context['active_products'] = Product.objects.count()  # All products
-        extra_context['active_carts'] = Cart.objects.filter(status='active').count()
-        
-        # Stock information
-        extra_context['in_stock_products'] = Product.objects.filter(stock_quantity__gt=0).count()
-        extra_context['out_of_stock_products'] = Product.objects.filter(stock_quantity=0).count()
-        
-        # Abandonment rate calculation
-        total_carts = Cart.objects.count()
-        completed_carts = Cart.objects.filter(status='completed').count()
-        if total_carts > 0:
-            extra_context['abandonment_rate'] = round(
-                ((total_carts - completed_carts) / total_carts) * 100, 1
-            )
-        else:
-            extra_context['abandonment_rate'] = 0
+        extra_context.update(DashboardStats.get())
         
         return super().index(request, extra_context)
 
@@ -74,8 +61,8 @@ admin_site = ShopTrackAdminSite(name='admin')
 
 # Register models with the custom admin site
 admin_site.register(User, CustomUserAdmin)
-admin_site.register(Product)
-admin_site.register(Cart)
-admin_site.register(CartItem)
-admin_site.register(CartEvent)
+admin_site.register(Product, ProductAdmin)
+admin_site.register(Cart, CartAdmin)
+admin_site.register(CartItem, CartItemAdmin)
+admin_site.register(CartEvent, CartEventAdmin)
 admin_site.register(Group)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from django.db.models import Count, Q
+
+from apps.carts.models import Cart
+from apps.products.models import Product
+from apps.users.models import User
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "admin:dashboard_stats"
+REFRESH_LOCK_KEY = "admin:dashboard_stats:refreshing"
+
+
+class DashboardStats:
+    """Admin index statistics, cached with stale-while-revalidate
+
+    Statistics take one conditional aggregate per table. Cached values are
+    fresh for ADMIN_DASHBOARD_CACHE_TTL seconds; after that the stale value
+    is still served while a single background thread recomputes it.
+    """
+
+    @staticmethod
+    def compute():
+        stats = User.objects.aggregate(total_users=Count("pk"))
+        stats.update(
+            Product.objects.aggregate(
+                active_products=Count("pk"),
+                in_stock_products=Count("pk", filter=Q(stock_quantity__gt=0)),
+                out_of_stock_products=Count("pk", filter=Q(stock_quantity=0)),
+            )
+        )
+        carts = Cart.objects.aggregate(
+            active_carts=Count("pk", filter=Q(status="active")),
+            abandoned_carts=Count("pk", filter=Q(status="abandoned")),
+            purchased_carts=Count("pk", filter=Q(status="purchased")),
+        )
+        # Share of closed carts that were abandoned rather than purchased
+        closed = carts["abandoned_carts"] + carts["purchased_carts"]
+        carts["abandonment_rate"] = (
+            round(carts["abandoned_carts"] / closed * 100, 1) if closed else 0
+        )
+        stats.update(carts)
+        return stats
+
+    @staticmethod
+    def refresh():
+        stats = DashboardStats.compute()
+        ttl = settings.ADMIN_DASHBOARD_CACHE_TTL
+        # Kept well past freshness so readers get a stale copy, not a miss
+        cache.set(STATS_KEY, (time.time() + ttl, stats), timeout=ttl * 10)
+        return stats
+
+    @staticmethod
+    def get():
+        cached = cache.get(STATS_KEY)
+        if cached is None:
+            return DashboardStats.refresh()
+
+        fresh_until, stats = cached
+        if time.time() >= fresh_until:
+            DashboardStats.refresh_in_background()
+        return stats
+
+    @staticmethod
+    def refresh_in_background():
+        """Start one refresh thread unless another one is already running
+
+        The lock lives in the default cache, so it only spans processes when
+        that cache is shared; with the bundled LocMemCache each process may
+        run its own refresh.
+        """
+        ttl = settings.ADMIN_DASHBOARD_CACHE_TTL
+        if not cache.add(REFRESH_LOCK_KEY, True, timeout=ttl):
+            return None
+        thread = threading.Thread(
+            target=DashboardStats._refresh_worker,
+            name="admin-dashboard-stats",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _refresh_worker():
+        try:
+            close_old_connections()
+            DashboardStats.refresh()
+        except Exception:
+            logger.exception("Failed to refresh the admin dashboard statistics")
+        finally:
+            cache.delete(REFRESH_LOCK_KEY)
+            connection.close()
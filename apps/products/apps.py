@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ProductsConfig(AppConfig):
@@ -6,3 +7,8 @@ class ProductsConfig(AppConfig):
     name = "apps.products"
     verbose_name = "Products Management"
     verbose_name_plural = "Products Management"
+
+    def ready(self):
+        from .signals import ensure_search_index  # also connects the receivers
+
+        post_migrate.connect(ensure_search_index, sender=self)
@@ -0,0 +1,123 @@
+import hashlib
+import math
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+VERSION_KEY = "catalog:version"
+RESPONSE_KEY_PREFIX = "catalog:response"
+
+
+class CatalogCache:
+    """Version of the product catalog, bumped on every product change
+
+    The version is a ``(token, modified)`` pair stored in the cache. The
+    token is random, so a version lost to eviction is never reissued;
+    ``modified`` is a whole second that strictly increases on every bump and
+    doubles as the Last-Modified time of every catalog response.
+    """
+
+    @staticmethod
+    def get_version():
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(
+                VERSION_KEY, (uuid.uuid4().hex, math.ceil(time.time())), timeout=None
+            )
+            version = cache.get(VERSION_KEY)
+        return version
+
+    @staticmethod
+    def bump():
+        token, modified = CatalogCache.get_version()
+        version = (uuid.uuid4().hex, max(math.ceil(time.time()), modified + 1))
+        cache.set(VERSION_KEY, version, timeout=None)
+        return version
+
+    @staticmethod
+    def invalidate():
+        """Bump now and again on commit"""
+        # The second bump drops responses other requests cached from
+        # pre-commit rows while the transaction was still open
+        CatalogCache.bump()
+        transaction.on_commit(CatalogCache.bump)
+
+
+class CatalogResponseCacheMixin:
+    """Serve GETs from a cache keyed on the catalog version
+
+    Responses carry a strong ETag and Last-Modified derived from the version.
+    Matching ``If-None-Match`` / ``If-Modified-Since`` validators get a 304,
+    and cached bodies are returned as-is; neither touches the database.
+    Authentication runs lazily, so anonymous hits skip it entirely.
+    """
+
+    cache_control = "public, no-cache"
+
+    def perform_authentication(self, request):
+        pass
+
+    def get_catalog_key(self, request, version):
+        parts = [
+            version[0],
+            request.get_host(),
+            request.path,
+            "&".join(sorted(request.GET.urlencode().split("&"))),
+            request.META.get("HTTP_ACCEPT", ""),
+        ]
+        return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+    def get(self, request, *args, **kwargs):
+        version = CatalogCache.get_version()
+        digest = self.get_catalog_key(request, version)
+        self.catalog_validators = {
+            "ETag": quote_etag(digest),
+            "Last-Modified": http_date(version[1]),
+        }
+
+        if self.client_has_current(request, digest, version[1]):
+            return self.with_validators(HttpResponseNotModified())
+
+        cached = cache.get(f"{RESPONSE_KEY_PREFIX}:{digest}")
+        if cached is not None:
+            content, content_type = cached
+            return self.with_validators(
+                HttpResponse(content, content_type=content_type)
+            )
+        self.catalog_cache_key = f"{RESPONSE_KEY_PREFIX}:{digest}"
+        return super().get(request, *args, **kwargs)
+
+    @staticmethod
+    def client_has_current(request, digest, modified):
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return "*" in etags or quote_etag(digest) in etags
+        if_modified_since = parse_http_date_safe(
+            request.META.get("HTTP_IF_MODIFIED_SINCE", "")
+        )
+        return if_modified_since is not None and modified <= if_modified_since
+
+    def with_validators(self, response):
+        for header, value in self.catalog_validators.items():
+            response[header] = value
+        response["Cache-Control"] = self.cache_control
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        cache_key = getattr(self, "catalog_cache_key", None)
+        if cache_key and response.status_code == 200:
+            response.render()
+            cache.set(
+                cache_key,
+                (response.content, response["Content-Type"]),
+                timeout=settings.CATALOG_CACHE_TIMEOUT,
+            )
+            self.with_validators(response)
+        return response
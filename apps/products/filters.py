@@ -0,0 +1,16 @@
+from rest_framework import filters
+
+from .search import ProductSearchService, is_supported
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """``?search=`` backed by the full-text index where the database has one
+
+    Falls back to DRF's ``icontains`` search on other databases.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or not is_supported():
+            return super().filter_queryset(request, queryset, view)
+        return ProductSearchService.search(queryset, " ".join(terms))
@@ -0,0 +1,156 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+MAX_SEARCH_TOKENS = 8
+
+POSTGRES_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+    ") STORED",
+    "CREATE INDEX IF NOT EXISTS products_search_vector_idx "
+    "ON products USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS products_name_trgm_idx "
+    "ON products USING GIN (name gin_trgm_ops)",
+]
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS products_name_trgm_idx",
+    "DROP INDEX IF EXISTS products_search_vector_idx",
+    "ALTER TABLE products DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, description, content='products', content_rowid='rowid', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+SQLITE_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products "
+    "BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) "
+    "VALUES (new.rowid, new.name, new.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products "
+    "BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.rowid, old.name, old.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_update "
+    "AFTER UPDATE OF name, description ON products "
+    "BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.rowid, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) "
+    "VALUES (new.rowid, new.name, new.description); "
+    "END",
+]
+SQLITE_TRIGGER_NAMES = [
+    "products_fts_insert",
+    "products_fts_delete",
+    "products_fts_update",
+]
+
+
+def is_supported(conn=None):
+    return (conn or connection).vendor in ("postgresql", "sqlite")
+
+
+def install_search_index(conn=None):
+    """Create the full-text index of the products table if it is missing
+
+    PostgreSQL gets a generated ``tsvector`` column with a GIN index and a
+    trigram index on the name. SQLite gets an external-content FTS5 table
+    kept in sync by triggers; it is rebuilt whenever a trigger had to be
+    recreated, e.g. after a migration rebuilt the products table.
+    """
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        if conn.vendor == "postgresql":
+            for statement in POSTGRES_INSTALL:
+                cursor.execute(statement)
+        elif conn.vendor == "sqlite":
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master "
+                "WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+                SQLITE_TRIGGER_NAMES,
+            )
+            complete = cursor.fetchone()[0] == len(SQLITE_TRIGGER_NAMES)
+            cursor.execute(SQLITE_TABLE)
+            for statement in SQLITE_TRIGGERS:
+                cursor.execute(statement)
+            if not complete:
+                cursor.execute(
+                    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')"
+                )
+
+
+def uninstall_search_index(conn=None):
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        if conn.vendor == "postgresql":
+            for statement in POSTGRES_UNINSTALL:
+                cursor.execute(statement)
+        elif conn.vendor == "sqlite":
+            for name in SQLITE_TRIGGER_NAMES:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute("DROP TABLE IF EXISTS products_fts")
+
+
+def search_tokens(term):
+    """Lowercase word tokens of ``term``, safe to embed in a match query"""
+    return re.findall(r"\w+", term.lower())[:MAX_SEARCH_TOKENS]
+
+
+class ProductSearchService:
+    """Ranked full-text product search with prefix matching"""
+
+    @staticmethod
+    def search(queryset, term):
+        """Filter ``queryset`` to products matching ``term``
+
+        Matches are annotated with ``search_rank``, higher is better. Every
+        token matches as a prefix; on PostgreSQL names within a trigram
+        distance of the whole term match too, so small typos still hit.
+        """
+        tokens = search_tokens(term)
+        if not tokens:
+            return queryset.none().annotate(
+                search_rank=Value(0.0, output_field=FloatField())
+            )
+
+        if connection.vendor == "postgresql":
+            tsquery = " & ".join(f"{token}:*" for token in tokens)
+            phrase = " ".join(tokens)
+            # ``%%`` is pg_trgm's similarity operator; unlike similarity()
+            # it can use the trigram index (threshold pg_trgm.similarity_threshold)
+            match = RawSQL(
+                "(search_vector @@ to_tsquery('english', %s) OR name %% %s)",
+                [tsquery, phrase],
+                output_field=BooleanField(),
+            )
+            rank = RawSQL(
+                "ts_rank(search_vector, to_tsquery('english', %s)) "
+                "+ similarity(name, %s)",
+                [tsquery, phrase],
+                output_field=FloatField(),
+            )
+        else:
+            fts_query = " ".join(f'"{token}"*' for token in tokens)
+            match = RawSQL(
+                '"products".rowid IN '
+                "(SELECT rowid FROM products_fts WHERE products_fts MATCH %s)",
+                [fts_query],
+                output_field=BooleanField(),
+            )
+            rank = RawSQL(
+                "(SELECT -bm25(products_fts, 10.0, 1.0) FROM products_fts "
+                'WHERE products_fts MATCH %s AND rowid = "products".rowid)',
+                [fts_query],
+                output_field=FloatField(),
+            )
+        return queryset.filter(match).annotate(search_rank=rank)
@@ -0,0 +1,24 @@
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import CatalogCache
+from .models import Product
+from .search import install_search_index
+
+
+def ensure_search_index(sender, using, plan=None, **kwargs):
+    """Restore the SQLite FTS triggers after migrations rebuilt the table"""
+    connection = connections[using]
+    if (
+        connection.vendor == "sqlite"
+        and "products" in connection.introspection.table_names()
+    ):
+        install_search_index(connection)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def bump_catalog_version(sender, **kwargs):
+    """Invalidate cached catalog responses on every product change"""
+    CatalogCache.invalidate()
@@ -1,8 +1,14 @@
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, generics, permissions, status
+from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 
+from utils.mixins import SparseFieldsetMixin
+from utils.pagination import KeysetPagination
+
+from .cache import CatalogResponseCacheMixin
+from .filters import ProductSearchFilter
 from .models import Product
+from .search import is_supported
 from .serializers import (
     ProductCreateSerializer,
     ProductSerializer,
@@ -10,23 +16,36 @@ from .serializers import (
 )
 
 
-class ProductListView(generics.ListAPIView):
+class ProductListView(
+    CatalogResponseCacheMixin, SparseFieldsetMixin, generics.ListAPIView
+):
     """
     List all products with search and filtering
+    Cursor paginated, ?fields= selects the returned columns
+    Cached per catalog version, supports conditional GET
     Public access - no authentication required
     """
 
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    pagination_class = KeysetPagination
+    always_loaded_fields = ("id", "created_at")
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter]
     filterset_fields = ["category"]
     search_fields = ["name", "description"]
 
+    def get_keyset_ordering(self):
+        """Best matches first while searching, newest first otherwise"""
+        if self.request.query_params.get("search", "").strip() and is_supported():
+            return ("-search_rank", "-id")
+        return ("-created_at", "-id")
+
 
-class ProductDetailView(generics.RetrieveAPIView):
+class ProductDetailView(CatalogResponseCacheMixin, generics.RetrieveAPIView):
     """
     Retrieve a single product by ID
+    Cached per catalog version, supports conditional GET
     Public access - no authentication required
     """
 
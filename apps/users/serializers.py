@@ -38,4 +38,5 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
         token["email"] = user.email
         token["role"] = user.role
+        token["is_staff"] = user.is_staff
         return token
@@ -30,6 +30,8 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Serializes columns the token claims do not carry
+    requires_full_user = True
 
     def get_object(self):
         return self.request.user
@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
 application = get_asgi_application()
+
+from apps.carts.abandonment import start_periodic_sweeper  # noqa: E402
+
+start_periodic_sweeper()
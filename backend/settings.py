@@ -38,7 +38,7 @@ CSRF_COOKIE_SECURE = False
 # REST Framework configuration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "utils.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.AllowAny",),
 }
@@ -48,6 +48,10 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
 }
+# Full user rows cached per process for views that need more than the
+# token claims, see utils.authentication.ClaimsJWTAuthentication
+JWT_USER_CACHE_SIZE = int(os.getenv("JWT_USER_CACHE_SIZE", 1024))
+JWT_USER_CACHE_TTL = int(os.getenv("JWT_USER_CACHE_TTL", 60))
 
 # Custom user model
 AUTH_USER_MODEL = "users.User"
@@ -79,6 +83,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "utils.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -152,3 +157,67 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Analytics
+# Cache alias and entry lifetime for AnalyticsService results
+ANALYTICS_CACHE_ALIAS = os.getenv("ANALYTICS_CACHE_ALIAS", "default")
+ANALYTICS_CACHE_TIMEOUT = int(os.getenv("ANALYTICS_CACHE_TIMEOUT", 300))
+# Inactivity gap that splits a user's cart events into separate sessions
+ANALYTICS_SESSION_GAP_SECONDS = int(os.getenv("ANALYTICS_SESSION_GAP_SECONDS", 1800))
+# "sync" writes cart events in the request transaction, "buffered" queues them
+# after commit and bulk inserts them from a background thread
+ANALYTICS_EVENT_SINK = os.getenv("ANALYTICS_EVENT_SINK", "sync")
+ANALYTICS_EVENT_BATCH_SIZE = int(os.getenv("ANALYTICS_EVENT_BATCH_SIZE", 500))
+ANALYTICS_EVENT_FLUSH_INTERVAL = float(os.getenv("ANALYTICS_EVENT_FLUSH_INTERVAL", 1.0))
+# Failed flushes of one batch before the buffered sink spills it to disk, and
+# where spilled batches are written for replay with load_cart_events
+ANALYTICS_EVENT_FLUSH_RETRIES = int(os.getenv("ANALYTICS_EVENT_FLUSH_RETRIES", 3))
+ANALYTICS_EVENT_SPILL_DIR = os.getenv(
+    "ANALYTICS_EVENT_SPILL_DIR", str(BASE_DIR / "archive" / "spill")
+)
+# Months of cart events kept in the live table before archival, and where
+# the compressed archive segments are written
+ANALYTICS_EVENT_RETENTION_MONTHS = int(
+    os.getenv("ANALYTICS_EVENT_RETENTION_MONTHS", 12)
+)
+ANALYTICS_ARCHIVE_DIR = os.getenv(
+    "ANALYTICS_ARCHIVE_DIR", str(BASE_DIR / "archive" / "cart_events")
+)
+# Rows fetched per server-side cursor round trip by the event export
+ANALYTICS_EXPORT_CHUNK_SIZE = int(os.getenv("ANALYTICS_EXPORT_CHUNK_SIZE", 2000))
+# Rows per COPY or bulk insert of the load_cart_events backfill command
+ANALYTICS_LOAD_BATCH_SIZE = int(os.getenv("ANALYTICS_LOAD_BATCH_SIZE", 10000))
+
+# Lifetime of cached product catalog responses; entries are keyed on the
+# catalog version, so this only bounds memory, not staleness
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", 300))
+
+# Carts
+# Active carts with items and no activity for this long are marked abandoned
+CART_ABANDON_IDLE_HOURS = float(os.getenv("CART_ABANDON_IDLE_HOURS", 24))
+# Carts abandoned per transaction by the sweeper
+CART_ABANDON_CHUNK_SIZE = int(os.getenv("CART_ABANDON_CHUNK_SIZE", 1000))
+# Seconds between in-process sweeps started by the WSGI/ASGI application,
+# 0 leaves sweeping to the sweep_abandoned_carts command
+CART_ABANDON_SWEEP_INTERVAL = float(os.getenv("CART_ABANDON_SWEEP_INTERVAL", 0))
+
+# Seconds the admin index statistics stay fresh; stale values are served
+# while a background thread recomputes them
+ADMIN_DASHBOARD_CACHE_TTL = int(os.getenv("ADMIN_DASHBOARD_CACHE_TTL", 60))
+# Unfiltered admin changelists of tables estimated above this many rows show
+# the planner's row estimate instead of running COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(
+    os.getenv("ADMIN_ESTIMATED_COUNT_THRESHOLD", 100000)
+)
+
+# Caching
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "shoptrack",
+    }
+}
+
+# Metrics
+# Most (URL name, method) pairs tracked by the request metrics middleware
+METRICS_MAX_SERIES = int(os.getenv("METRICS_MAX_SERIES", 500))
@@ -8,6 +8,7 @@ from drf_yasg import openapi
 
 # Import your custom admin site - REMOVE the default admin imports
 from apps.core.admin import admin_site
+from utils.views import MetricsView
 
 # Enhanced Schema View
 schema_view = get_schema_view(
@@ -58,6 +59,7 @@ urlpatterns = [
     path("api/products/", include("apps.products.urls")),
     path("api/carts/", include("apps.carts.urls")),
     path("api/analytics/", include("apps.analytics.urls")),
+    path("api/metrics/", MetricsView.as_view(), name="metrics"),
     
     # Enhanced Documentation URLs
     path("docs/", APIDocumentationHubView.as_view(), name='docs-hub'),
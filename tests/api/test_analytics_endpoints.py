@@ -77,4 +77,18 @@ class TestAnalyticsEndpoints:
         
         # Admin should be allowed
         response = admin_client.get('/api/analytics/frequently-added-together/')
-        assert response.status_code in [status.HTTP_200_OK, status.HTTP_400_BAD_REQUEST]
\ No newline at end of file
+        assert response.status_code in [status.HTTP_200_OK, status.HTTP_400_BAD_REQUEST]
+    
+    def test_also_added_admin_access(self, admin_client, authenticated_client):
+        """Test also added endpoint requires admin access"""
+        product = ProductFactory()
+
+        # Regular user should be denied
+        response = authenticated_client.get(f'/api/analytics/also-added/{product.id}/')
+        allowed_statuses = [status.HTTP_403_FORBIDDEN, status.HTTP_401_UNAUTHORIZED]
+        assert response.status_code in allowed_statuses
+
+        # Admin should be allowed
+        response = admin_client.get(f'/api/analytics/also-added/{product.id}/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['also_added'] == []
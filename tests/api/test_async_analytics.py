@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+import uuid
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient, Client
+from django.urls import resolve
+from rest_framework import status
+
+from apps.analytics.cache import AnalyticsCache
+from apps.analytics.services import AnalyticsService
+from apps.users.serializers import CustomTokenObtainPairSerializer
+from tests.factories import AdminUserFactory, CartEventFactory, ProductFactory, UserFactory
+from utils.concurrency import gather_queries
+from utils.metrics import get_registry
+
+
+def bearer(user):
+    token = CustomTokenObtainPairSerializer.get_token(user).access_token
+    return {'Authorization': f'Bearer {token}'}
+
+
+def sleeper(seconds):
+    def run():
+        time.sleep(seconds)
+        return threading.get_ident()
+
+    return run
+
+
+@pytest.mark.unit
+class TestGatherQueries:
+    def test_queries_run_concurrently_outside_transactions(self):
+        """Test gathered callables overlap on separate worker threads"""
+        started = time.perf_counter()
+        threads = async_to_sync(gather_queries)(sleeper(0.2), sleeper(0.2), sleeper(0.2))
+
+        assert time.perf_counter() - started < 0.5
+        assert len(set(threads)) == 3
+
+    @pytest.mark.django_db
+    def test_queries_share_the_connection_inside_a_transaction(self):
+        """Test gathered callables see the caller's uncommitted rows"""
+        product = ProductFactory()
+
+        threads, exists = async_to_sync(gather_queries)(
+            sleeper(0),
+            lambda: type(product).objects.filter(pk=product.pk).exists(),
+        )
+
+        assert threads == threading.get_ident()
+        assert exists
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.api
+class TestAsyncAnalyticsViews:
+    def get(self, path, user):
+        return async_to_sync(AsyncClient().get)(path, headers=bearer(user))
+
+    def test_views_are_served_natively_as_coroutines(self):
+        """Test the analytics views are async views Django runs without a thread"""
+        for path in (
+            '/api/analytics/abandonment-rate/',
+            f'/api/analytics/user-behavior/{uuid.uuid4()}/',
+            f'/api/analytics/product-insights/{uuid.uuid4()}/',
+            '/api/analytics/time-metrics/',
+        ):
+            assert asyncio.iscoroutinefunction(resolve(path).func)
+
+    def test_time_metrics_match_the_sync_service(self):
+        """Test the gathered time metrics equal the sequential computation"""
+        product = ProductFactory()
+        CartEventFactory.create_batch(3, product=product, event_type='added')
+
+        response = self.get('/api/analytics/time-metrics/?days=7', AdminUserFactory())
+        cache.clear()
+        expected = AnalyticsService.get_time_based_metrics(days=7)
+
+        assert response.status_code == status.HTTP_200_OK
+        body = response.json()
+        assert body['total_events'] == expected['total_events'] == 3
+        assert body['total_carts'] == expected['total_carts']
+        assert body['total_sessions'] == expected['total_sessions']
+        assert body['most_active_hour'] == expected['most_active_hour']
+
+    def test_product_insights_and_missing_products(self):
+        """Test product insights are served and unknown products get a 404"""
+        product = ProductFactory()
+        CartEventFactory.create_batch(2, product=product, event_type='added')
+        admin = AdminUserFactory()
+
+        response = self.get(f'/api/analytics/product-insights/{product.id}/', admin)
+        missing = self.get(f'/api/analytics/product-insights/{uuid.uuid4()}/', admin)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == AnalyticsService.get_product_insights(product.id) | {
+            'product_id': str(product.id)
+        }
+        assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_user_behavior_permissions(self):
+        """Test users read their own analytics only, and admins anyone's"""
+        user = UserFactory()
+        other = UserFactory()
+        CartEventFactory(user=user, event_type='added')
+
+        own = self.get(f'/api/analytics/user-behavior/{user.id}/', user)
+        foreign = self.get(f'/api/analytics/user-behavior/{other.id}/', user)
+        unknown = self.get(f'/api/analytics/user-behavior/{uuid.uuid4()}/', user)
+        admin = self.get(f'/api/analytics/user-behavior/{user.id}/', AdminUserFactory())
+
+        assert own.status_code == admin.status_code == status.HTTP_200_OK
+        assert own.json()['total_interactions'] == 1
+        assert foreign.status_code == status.HTTP_403_FORBIDDEN
+        assert unknown.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_abandonment_rate_requires_admin(self):
+        """Test the abandonment rate stays admin only"""
+        response = self.get('/api/analytics/abandonment-rate/', UserFactory())
+        admin = self.get('/api/analytics/abandonment-rate/?days=7', AdminUserFactory())
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert admin.status_code == status.HTTP_200_OK
+        assert admin.json()['timeframe_days'] == 7
+
+    def test_async_variants_share_the_sync_cache(self):
+        """Test an async call is served from the entry of its sync counterpart"""
+        AnalyticsService.get_time_based_metrics(days=7)
+        AnalyticsCache.reset_stats()
+
+        async_to_sync(AnalyticsService.aget_time_based_metrics)(days=7)
+
+        assert AnalyticsCache.stats()['hits'] == 1
+
+    def test_request_metrics_count_queries_of_every_thread(self):
+        """Test the metrics middleware counts queries run on worker threads"""
+        registry = get_registry()
+        registry.reset()
+
+        self.get('/api/analytics/time-metrics/', AdminUserFactory())
+
+        labels = 'view="analytics:time-metrics",method="GET"'
+        line = next(
+            line for line in registry.render().splitlines()
+            if line.startswith(f'shoptrack_http_request_db_queries_sum{{{labels}}}')
+        )
+        assert int(float(line.split()[-1])) >= 4
+
+    def test_sync_handler_counts_queries_of_worker_threads(self):
+        """Test queries of an async view served by the sync handler are counted"""
+        registry = get_registry()
+        registry.reset()
+
+        Client().get('/api/analytics/time-metrics/', headers=bearer(AdminUserFactory()))
+
+        labels = 'view="analytics:time-metrics",method="GET"'
+        line = next(
+            line for line in registry.render().splitlines()
+            if line.startswith(f'shoptrack_http_request_db_queries_sum{{{labels}}}')
+        )
+        assert int(float(line.split()[-1])) >= 4
@@ -0,0 +1,116 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from apps.analytics.models import CartEvent, ProductPairCount
+from apps.carts.models import Cart, CartItem
+from tests.factories import ProductFactory
+
+BULK_URL = '/api/carts/items/bulk/'
+
+
+def add(product, quantity=1):
+    return {'action': 'add', 'product': str(product.id), 'quantity': quantity}
+
+
+@pytest.mark.django_db
+@pytest.mark.api
+class TestCartBulkEndpoint:
+    def test_applies_operations_in_order(self, authenticated_client, user):
+        """Test adds, updates and removes are applied in one request"""
+        keep, change, drop = ProductFactory.create_batch(3, stock_quantity=10)
+        authenticated_client.post(BULK_URL, {'operations': [add(keep), add(drop)]}, format='json')
+
+        response = authenticated_client.post(
+            BULK_URL,
+            {
+                'operations': [
+                    add(change, 2),
+                    {'action': 'update', 'product': str(change.id), 'quantity': 5},
+                    {'action': 'remove', 'product': str(drop.id)},
+                    add(keep, 1),
+                ]
+            },
+            format='json',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        quantities = dict(CartItem.objects.filter(cart__user=user).values_list('product_id', 'quantity'))
+        assert quantities == {keep.id: 2, change.id: 5}
+        assert response.data['items_count'] == 2
+        cart = Cart.objects.get(user=user, status='active')
+        assert cart.items_count == 7
+        assert list(
+            CartEvent.objects.filter(cart=cart).order_by('event_type').values_list('event_type', flat=True)
+        ) == ['added', 'added', 'added', 'added', 'removed', 'updated']
+
+    def test_pair_counts_follow_net_changes(self, authenticated_client):
+        """Test co-occurrence counts match the final cart contents"""
+        first, second, third = ProductFactory.create_batch(3, stock_quantity=10)
+        authenticated_client.post(
+            BULK_URL, {'operations': [add(first), add(second), add(third)]}, format='json'
+        )
+        authenticated_client.post(
+            BULK_URL,
+            {'operations': [{'action': 'remove', 'product': str(third.id)}]},
+            format='json',
+        )
+
+        counts = {
+            (row.product_id, row.related_product_id): row.count
+            for row in ProductPairCount.objects.all()
+        }
+        assert counts[(first.id, second.id)] == 1
+        assert counts[(second.id, first.id)] == 1
+        assert counts[(first.id, third.id)] == 0
+
+    def test_failed_operation_rolls_back_the_batch(self, authenticated_client, user):
+        """Test nothing is written when one operation is invalid"""
+        product = ProductFactory(stock_quantity=2)
+
+        response = authenticated_client.post(
+            BULK_URL, {'operations': [add(product, 1), add(product, 5)]}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'Operation 2' in response.data['error']
+        assert not CartItem.objects.filter(cart__user=user).exists()
+        assert not CartEvent.objects.exists()
+
+    def test_validation(self, authenticated_client):
+        """Test malformed operations are rejected"""
+        product = ProductFactory()
+
+        for operations in (
+            [],
+            [{'action': 'add', 'product': str(product.id)}],
+            [{'action': 'explode', 'product': str(product.id)}],
+        ):
+            response = authenticated_client.post(BULK_URL, {'operations': operations}, format='json')
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_query_count_does_not_grow_per_line(self, authenticated_client):
+        """Test a larger batch costs no more queries per product line"""
+        def run(count):
+            products = ProductFactory.create_batch(count, stock_quantity=10)
+            with CaptureQueriesContext(connection) as queries:
+                response = authenticated_client.post(
+                    BULK_URL, {'operations': [add(product) for product in products]}, format='json'
+                )
+            assert response.status_code == status.HTTP_200_OK
+            authenticated_client.post(
+                BULK_URL,
+                {'operations': [{'action': 'remove', 'product': str(p.id)} for p in products]},
+                format='json',
+            )
+            return len(queries)
+
+        small, large = run(2), run(20)
+        # Only the per-product counter upserts scale with the batch
+        assert large - small <= (20 - 2) * 4
+
+    def test_requires_authentication(self, api_client):
+        """Test anonymous users cannot mutate carts"""
+        response = api_client.post(BULK_URL, {'operations': []}, format='json')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
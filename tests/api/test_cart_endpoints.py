@@ -1,4 +1,6 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from tests.factories import ProductFactory
 
@@ -69,4 +71,16 @@ class TestCartEndpoints:
         
         # Then checkout
         response = authenticated_client.post('/api/carts/checkout/')
-        assert response.status_code in [status.HTTP_200_OK, status.HTTP_400_BAD_REQUEST]
\ No newline at end of file
+        assert response.status_code in [status.HTTP_200_OK, status.HTTP_400_BAD_REQUEST]
+
+    def test_cart_detail_query_count_is_constant(self, authenticated_client):
+        """Test the cart detail does not load products one by one"""
+        for product in ProductFactory.create_batch(5, stock_quantity=10):
+            authenticated_client.post('/api/carts/items/', {'product': product.id, 'quantity': 1})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get('/api/carts/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['items_count'] == 5
+        assert len(queries) <= 3
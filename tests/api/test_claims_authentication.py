@@ -0,0 +1,98 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.carts.models import Cart
+from apps.users.serializers import CustomTokenObtainPairSerializer
+from tests.factories import AdminUserFactory, UserFactory
+from utils.authentication import get_user_cache
+
+
+def bearer_client(user, token=None):
+    token = token or CustomTokenObtainPairSerializer.get_token(user).access_token
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def users_queries(queries):
+    return [query['sql'] for query in queries if 'FROM "users"' in query['sql']]
+
+
+@pytest.fixture(autouse=True)
+def empty_user_cache():
+    get_user_cache().clear()
+    yield
+    get_user_cache().clear()
+
+
+@pytest.mark.django_db
+@pytest.mark.api
+class TestClaimsAuthentication:
+    def test_cart_read_skips_user_lookup(self):
+        """Test a cart read authenticates from the token claims alone"""
+        user = UserFactory()
+        client = bearer_client(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/carts/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert users_queries(queries) == []
+        assert Cart.objects.filter(user=user, status='active').exists()
+
+    def test_admin_role_comes_from_claims(self):
+        """Test admin-only analytics use the role claim without a lookup"""
+        admin_client = bearer_client(AdminUserFactory())
+        customer_client = bearer_client(UserFactory())
+
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.get('/api/analytics/cache-stats/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert users_queries(queries) == []
+        assert customer_client.get('/api/analytics/cache-stats/').status_code == status.HTTP_403_FORBIDDEN
+
+    def test_profile_gets_cached_full_row(self):
+        """Test views needing the full user read it once per cache lifetime"""
+        user = UserFactory(username='shopper')
+        client = bearer_client(user)
+
+        first = client.get('/api/auth/profile/')
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get('/api/auth/profile/')
+
+        assert first.data['username'] == second.data['username'] == 'shopper'
+        assert second.data['created_at']
+        assert users_queries(queries) == []
+
+    def test_profile_update_refreshes_cached_row(self):
+        """Test saving a user drops its cached row"""
+        client = bearer_client(UserFactory(username='before'))
+        client.get('/api/auth/profile/')
+
+        client.patch('/api/auth/profile/', {'username': 'after'})
+
+        assert client.get('/api/auth/profile/').data['username'] == 'after'
+
+    def test_token_without_claims_loads_the_user(self):
+        """Test tokens issued before the claims still authenticate"""
+        user = UserFactory()
+        token = AccessToken.for_user(user)
+
+        response = bearer_client(user, token).get('/api/carts/')
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_deleted_user_with_full_row_view_is_rejected(self):
+        """Test the full row path still fails for users that are gone"""
+        user = UserFactory()
+        client = bearer_client(user)
+        user.delete()
+
+        response = client.get('/api/auth/profile/')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
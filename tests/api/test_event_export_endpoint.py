@@ -0,0 +1,135 @@
+import csv
+import io
+import json
+import pytest
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.utils import timezone
+from rest_framework import status
+
+from apps.analytics.archive import EventArchive
+from apps.analytics.export import EXPORT_FIELDS, EventExporter
+from apps.analytics.models import CartEvent
+from apps.users.serializers import CustomTokenObtainPairSerializer
+from tests.factories import AdminUserFactory, CartEventFactory
+
+URL = '/api/analytics/events/export/'
+
+
+def export_url(**params):
+    now = timezone.now()
+    params.setdefault('start', (now - timedelta(days=1)).isoformat())
+    params.setdefault('end', (now + timedelta(minutes=1)).isoformat())
+    return f'{URL}?{urlencode(params)}'
+
+
+def body(response):
+    return b''.join(response.streaming_content).decode()
+
+
+async def collect(iterator):
+    return [chunk async for chunk in iterator]
+
+
+@pytest.mark.django_db
+@pytest.mark.api
+class TestCartEventExport:
+    def test_export_requires_admin(self, authenticated_client):
+        """Test regular users cannot export events"""
+        response = authenticated_client.get(export_url())
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_ndjson_export_streams_range_in_order(self, admin_client):
+        """Test NDJSON holds one record per event of the range, oldest first"""
+        events = CartEventFactory.create_batch(3)
+        old = CartEventFactory()
+        CartEvent.objects.filter(pk=old.pk).update(timestamp=timezone.now() - timedelta(days=3))
+
+        response = admin_client.get(export_url())
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert 'attachment; filename="cart_events-' in response['Content-Disposition']
+        records = [json.loads(line) for line in body(response).splitlines()]
+        assert [record['id'] for record in records] == [
+            str(event.id) for event in sorted(events, key=lambda e: (e.timestamp, e.id))
+        ]
+        assert set(records[0]) == set(EXPORT_FIELDS)
+
+    def test_csv_export_with_filters(self, admin_client):
+        """Test CSV output applies the event type and user filters"""
+        added = CartEventFactory(event_type='added')
+        CartEventFactory(event_type='removed', user=added.user, cart=added.cart)
+        CartEventFactory(event_type='added')
+
+        response = admin_client.get(
+            export_url(file_format='csv', event_type='added', user=str(added.user_id))
+        )
+
+        assert response['Content-Type'] == 'text/csv'
+        rows = list(csv.reader(io.StringIO(body(response))))
+        assert rows[0] == list(EXPORT_FIELDS)
+        assert [row[0] for row in rows[1:]] == [str(added.id)]
+
+    def test_invalid_range_is_rejected(self, admin_client):
+        """Test a missing or inverted range returns 400"""
+        now = timezone.now()
+        assert admin_client.get(URL).status_code == status.HTTP_400_BAD_REQUEST
+        response = admin_client.get(
+            export_url(start=now.isoformat(), end=(now - timedelta(hours=1)).isoformat())
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'end' in response.data
+
+    def test_exporter_reads_tuples_in_bounded_blocks(self):
+        """Test rows are fetched as tuples and emitted in chunk sized blocks"""
+        CartEventFactory.create_batch(5)
+        now = timezone.now()
+        exporter = EventExporter(now - timedelta(days=1), now + timedelta(minutes=1), chunk_size=2)
+
+        assert all(isinstance(row, tuple) for row in exporter.rows())
+        blocks = list(exporter.ndjson())
+        assert [block.count('\n') for block in blocks] == [2, 2, 1]
+
+    def test_async_stream_matches_sync_blocks(self):
+        """Test the async iterator yields the same blocks as the sync one"""
+        CartEventFactory.create_batch(5)
+        now = timezone.now()
+        exporter = EventExporter(now - timedelta(days=1), now + timedelta(minutes=1), chunk_size=2)
+
+        for file_format in ('ndjson', 'csv'):
+            assert async_to_sync(collect)(exporter.astream(file_format)) == list(
+                exporter.stream(file_format)
+            )
+
+    def test_asgi_requests_stream_asynchronously(self):
+        """Test the export is served as an async iterator under ASGI"""
+        events = CartEventFactory.create_batch(3)
+        token = CustomTokenObtainPairSerializer.get_token(AdminUserFactory()).access_token
+
+        response = async_to_sync(AsyncClient().get)(
+            export_url(), headers={'Authorization': f'Bearer {token}'}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.is_async
+        lines = b''.join(async_to_sync(collect)(response.streaming_content)).splitlines()
+        assert {json.loads(line)['id'] for line in lines} == {str(event.id) for event in events}
+
+    def test_range_reaching_the_archive_is_rejected(self, admin_client, settings, tmp_path):
+        """Test a range that starts before the archive horizon returns 400"""
+        settings.ANALYTICS_ARCHIVE_DIR = str(tmp_path)
+        event = CartEventFactory()
+        old = timezone.now() - timedelta(days=400)
+        CartEvent.objects.filter(pk=event.pk).update(timestamp=old)
+        EventArchive().archive_month(timezone.localdate(old))
+
+        response = admin_client.get(export_url(start=old.isoformat()))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'start' in response.data
+        assert admin_client.get(export_url()).status_code == status.HTTP_200_OK
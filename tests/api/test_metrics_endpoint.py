@@ -0,0 +1,29 @@
+import pytest
+from rest_framework import status
+
+from utils.metrics import get_registry
+
+
+@pytest.mark.django_db
+@pytest.mark.api
+class TestMetricsEndpoint:
+    def test_metrics_admin_access(self, admin_client, authenticated_client):
+        """Test metrics endpoint requires admin access"""
+        response = authenticated_client.get('/api/metrics/')
+        assert response.status_code in [status.HTTP_403_FORBIDDEN, status.HTTP_401_UNAUTHORIZED]
+
+        response = admin_client.get('/api/metrics/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+
+    def test_requests_are_recorded_per_url_name(self, admin_client):
+        """Test the middleware records latency and queries per URL name"""
+        get_registry().reset()
+        admin_client.get('/api/analytics/time-metrics/')
+
+        output = admin_client.get('/api/metrics/').content.decode()
+
+        labels = 'view="analytics:time-metrics",method="GET"'
+        assert f'shoptrack_http_request_duration_seconds_count{{{labels}}} 1' in output
+        assert f'shoptrack_http_requests_total{{{labels},status="2xx"}} 1' in output
+        assert f'shoptrack_http_request_db_queries_bucket{{{labels},le="0"}} 0' in output
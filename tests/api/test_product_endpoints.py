@@ -1,4 +1,6 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from tests.factories import ProductFactory, AdminUserFactory
 
@@ -11,7 +13,7 @@ class TestProductEndpoints:
         
         response = api_client.get('/api/products/')
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) > 0
+        assert len(response.data['results']) > 0
     
     def test_get_product_detail(self, api_client):
         """Test retrieving specific product details"""
@@ -66,4 +68,125 @@ class TestProductEndpoints:
         
         # Admin should be allowed
         response = admin_client.delete(f'/api/products/{product.id}/delete/')
-        assert response.status_code in [status.HTTP_204_NO_CONTENT, status.HTTP_200_OK]
\ No newline at end of file
+        assert response.status_code in [status.HTTP_204_NO_CONTENT, status.HTTP_200_OK]
+
+
+@pytest.mark.django_db
+@pytest.mark.api
+class TestProductListPagination:
+    def test_cursor_walks_every_product_once(self, api_client):
+        """Test following next links returns each product once, newest first"""
+        products = ProductFactory.create_batch(7)
+        seen = []
+
+        url = '/api/products/?page_size=3'
+        while url:
+            response = api_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        assert sorted(seen) == sorted(str(product.id) for product in products)
+        assert len(seen) == len(set(seen))
+
+    def test_previous_link_returns_previous_page(self, api_client):
+        """Test the previous link of the second page returns the first page"""
+        ProductFactory.create_batch(5)
+        first = api_client.get('/api/products/?page_size=2')
+        second = api_client.get(first.data['next'])
+
+        previous = api_client.get(second.data['previous'])
+
+        assert previous.data['results'] == first.data['results']
+        assert first.data['previous'] is None
+
+    def test_invalid_cursor(self, api_client):
+        """Test a malformed cursor is rejected"""
+        response = api_client.get('/api/products/?cursor=not-a-cursor')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_sparse_fieldset(self, api_client):
+        """Test ?fields= prunes the output and the selected columns"""
+        ProductFactory.create_batch(2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get('/api/products/?fields=id,name,price')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data['results'][0]) == {'id', 'name', 'price'}
+        assert '"description"' not in queries[-1]['sql']
+
+    def test_unknown_sparse_field(self, api_client):
+        """Test unknown fields are rejected"""
+        response = api_client.get('/api/products/?fields=name,secret')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_search_is_ranked_and_paginated(self, api_client):
+        """Test search results come best match first across pages"""
+        ProductFactory(name='Desk Lamp', description='Works with any keyboard')
+        ProductFactory(name='Keyboard', description='Keyboard with keyboard keycaps')
+        ProductFactory(name='Coffee Mug', description='')
+
+        first = api_client.get('/api/products/?search=keyb&page_size=1')
+        second = api_client.get(first.data['next'])
+
+        assert first.data['results'][0]['name'] == 'Keyboard'
+        assert second.data['results'][0]['name'] == 'Desk Lamp'
+        assert second.data['next'] is None
+
+
+@pytest.mark.django_db
+@pytest.mark.api
+class TestProductCatalogCache:
+    def test_conditional_get_skips_the_database(self, api_client):
+        """Test a matching ETag returns 304 without any query"""
+        product = ProductFactory()
+        response = api_client.get(f'/api/products/{product.id}/')
+        etag = response['ETag']
+        assert response['Last-Modified']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(f'/api/products/{product.id}/', HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert len(queries) == 0
+
+    def test_cached_list_is_served_without_queries(self, api_client):
+        """Test a repeated list request is answered from the cache"""
+        ProductFactory.create_batch(3)
+        first = api_client.get('/api/products/?page_size=2')
+
+        with CaptureQueriesContext(connection) as queries:
+            second = api_client.get('/api/products/?page_size=2')
+
+        assert len(queries) == 0
+        assert second.content == first.content
+        assert second['ETag'] == first['ETag']
+
+    def test_product_update_bumps_version(self, api_client, admin_client):
+        """Test editing a product invalidates cached responses and validators"""
+        product = ProductFactory(name='Old Name')
+        url = f'/api/products/{product.id}/'
+        before = api_client.get(url)
+
+        admin_client.patch(f'/api/products/{product.id}/update/', {'name': 'New Name'})
+        after = api_client.get(url, HTTP_IF_NONE_MATCH=before['ETag'])
+
+        assert after.status_code == status.HTTP_200_OK
+        assert after.data['name'] == 'New Name'
+        assert after['ETag'] != before['ETag']
+
+    def test_if_modified_since(self, api_client):
+        """Test Last-Modified validators are honoured until the next change"""
+        product = ProductFactory()
+        response = api_client.get('/api/products/')
+        last_modified = response['Last-Modified']
+
+        response = api_client.get('/api/products/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        product.delete()
+        response = api_client.get('/api/products/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == status.HTTP_200_OK
+
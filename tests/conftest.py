@@ -1,8 +1,16 @@
 import pytest
 from django.conf import settings
+from django.core.cache import cache
 from rest_framework.test import APIClient
 from tests.factories import UserFactory, AdminUserFactory
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache"""
+    cache.clear()
+    yield
+    cache.clear()
+
 @pytest.fixture
 def api_client():
     """API client fixture for making requests"""
@@ -37,10 +37,10 @@ class TestCompleteUserJourney:
         ProductFactory.create_batch(3)  # Create some test products
         products_response = api_client.get('/api/products/')
         assert products_response.status_code == status.HTTP_200_OK
-        assert len(products_response.data) >= 3
+        assert len(products_response.data['results']) >= 3
         
         # 4. Add Items to Cart
-        products = products_response.data
+        products = products_response.data['results']
         for product in products[:2]:  # Add first 2 products to cart
             cart_data = {
                 'product': product['id'],
@@ -95,6 +95,6 @@ class TestCompleteUserJourney:
         # 5. List all products (admin can view product catalog)
         list_response = admin_client.get('/api/products/')
         assert list_response.status_code == status.HTTP_200_OK
-        assert len(list_response.data) > 0
+        assert len(list_response.data['results']) > 0
         
         # Admin workflow validated: can create, update, and view products
\ No newline at end of file
@@ -0,0 +1,16 @@
+import pytest
+
+from apps.analytics.benchmarks import PRESETS, AnalyticsBenchmark, SyntheticDataset
+
+
+@pytest.mark.django_db
+@pytest.mark.slow
+def test_analytics_benchmark_10k():
+    """Benchmark every analytics target on the 10k events preset"""
+    SyntheticDataset(PRESETS['10k']).seed()
+
+    report = AnalyticsBenchmark(repeat=3).run()
+
+    for name, result in sorted(report['results'].items()):
+        print(f"\n{name} queries={result['queries']} median_ms={result['median_ms']}")
+    assert report['results']['service.user_behavior']['queries'] == 3
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+from django.db import OperationalError, connection
+
+from apps.carts.models import Cart, CartItem
+from apps.carts.services import CartService
+from tests.factories import ProductFactory, UserFactory
+
+ADDS = 30
+STOCK = 20
+
+
+def add(user, product, outcomes, quantity=1):
+    """Add one unit of ``product``, retrying while the database is locked"""
+    try:
+        for attempt in range(50):
+            try:
+                CartService.add_item_to_cart(user, product, quantity)
+                outcomes.append('added')
+                return
+            except ValueError:
+                outcomes.append('rejected')
+                return
+            except OperationalError:
+                time.sleep(0.01 * (attempt + 1))
+        outcomes.append('gave_up')
+    finally:
+        connection.close()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.slow
+def test_parallel_adds_keep_every_unit():
+    """Stress parallel adds of one product by one user and check the total"""
+    user = UserFactory()
+    product = ProductFactory(stock_quantity=STOCK)
+
+    outcomes = []
+    threads = [
+        threading.Thread(target=add, args=(user, product, outcomes)) for _ in range(ADDS)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    added = outcomes.count('added')
+    print(f'\nparallel adds={ADDS} added={added} throughput={added / elapsed:.1f}/s')
+    assert outcomes.count('gave_up') == 0
+    assert added == STOCK
+    assert Cart.objects.filter(user=user, status='active').count() == 1
+    assert CartItem.objects.get().quantity == STOCK
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.slow
+def test_parallel_adds_of_different_products_keep_totals():
+    """Stress parallel adds of distinct products to one cart and check its totals"""
+    user = UserFactory()
+    products = [ProductFactory(stock_quantity=STOCK) for _ in range(10)]
+
+    outcomes = []
+    threads = [
+        threading.Thread(target=add, args=(user, product, outcomes, 2))
+        for product in products
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count('added') == len(products)
+    cart = Cart.objects.get(user=user, status='active')
+    assert cart.unique_items == len(products)
+    assert cart.items_count == 2 * len(products)
+    assert cart.total_price == sum(2 * product.price for product in products)
@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+from django.db import OperationalError, connection
+
+from apps.carts.models import Cart
+from apps.carts.services import CartService
+from apps.products.models import Product
+from tests.factories import ProductFactory, UserFactory
+
+BUYERS = 40
+STOCK = 25
+
+
+def checkout(user, outcomes):
+    """Check out ``user``'s cart, retrying while the database is locked"""
+    try:
+        for attempt in range(50):
+            try:
+                CartService.checkout_cart(user)
+                outcomes.append('purchased')
+                return
+            except ValueError:
+                outcomes.append('sold_out')
+                return
+            except OperationalError:
+                time.sleep(0.01 * (attempt + 1))
+        outcomes.append('gave_up')
+    finally:
+        connection.close()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.slow
+def test_concurrent_checkout_never_oversells():
+    """Stress concurrent checkouts of one scarce product and report throughput"""
+    popular = ProductFactory(stock_quantity=STOCK)
+    other = ProductFactory(stock_quantity=BUYERS)
+    users = UserFactory.create_batch(BUYERS)
+    for index, user in enumerate(users):
+        # Alternate the add order so carts list the products differently
+        for product in (popular, other) if index % 2 else (other, popular):
+            CartService.add_item_to_cart(user, product, 1)
+
+    outcomes = []
+    threads = [threading.Thread(target=checkout, args=(user, outcomes)) for user in users]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    purchased = outcomes.count('purchased')
+    print(
+        f'\ncheckout buyers={BUYERS} purchased={purchased} '
+        f'sold_out={outcomes.count("sold_out")} '
+        f'throughput={purchased / elapsed:.1f}/s'
+    )
+    popular.refresh_from_db()
+    assert outcomes.count('gave_up') == 0
+    assert purchased == STOCK
+    assert popular.stock_quantity == 0
+    assert Product.objects.get(pk=other.pk).stock_quantity == BUYERS - STOCK
+    assert Cart.objects.filter(status='purchased').count() == STOCK
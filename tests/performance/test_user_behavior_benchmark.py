@@ -0,0 +1,59 @@
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.analytics.models import CartEvent
+from apps.analytics.services import AnalyticsService
+from apps.carts.models import Cart, CartItem
+from tests.factories import ProductFactory, UserFactory
+
+EVENTS_PER_CART = 10
+
+
+def seed_user_history(user, products, total_events):
+    """Bulk insert a purchased cart history with ``total_events`` events"""
+    carts = Cart.objects.bulk_create(
+        Cart(user=user, status='purchased')
+        for _ in range(max(total_events // EVENTS_PER_CART, 1))
+    )
+    CartItem.objects.bulk_create(
+        CartItem(cart=cart, product=products[i % len(products)], quantity=2)
+        for i, cart in enumerate(carts)
+    )
+    CartEvent.objects.bulk_create(
+        (
+            CartEvent(
+                cart=carts[i % len(carts)],
+                user=user,
+                product=products[i % len(products)],
+                event_type='added',
+                quantity_changed=1,
+            )
+            for i in range(total_events)
+        ),
+        batch_size=5000,
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.slow
+@pytest.mark.parametrize('total_events', [10, 1000, 100000])
+def test_user_behavior_benchmark(total_events):
+    """Benchmark query count and latency of the user behavior profile"""
+    user = UserFactory()
+    products = ProductFactory.create_batch(20)
+    seed_user_history(user, products, total_events)
+
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        data = AnalyticsService.get_user_behavior_analytics(user.id)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(
+        f'\nuser_behavior events={total_events} '
+        f'queries={len(queries)} latency_ms={elapsed_ms:.1f}'
+    )
+    assert len(queries) == 3
+    assert data['total_interactions'] == total_events
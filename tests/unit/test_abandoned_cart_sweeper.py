@@ -0,0 +1,138 @@
+import pytest
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.analytics.models import CartEvent, ProductEventCounters
+from apps.carts.abandonment import AbandonedCartSweeper
+from apps.carts.models import Cart
+from apps.carts.services import CartService
+from tests.factories import CartFactory, ProductFactory, UserFactory
+
+
+def idle_cart(product, hours=48, quantity=1):
+    """Active cart holding ``product`` with no activity for ``hours``"""
+    user = UserFactory()
+    CartService.add_item_to_cart(user, product, quantity)
+    cart = Cart.objects.get(user=user, status='active')
+    Cart.objects.filter(pk=cart.pk).update(
+        updated_at=timezone.now() - timedelta(hours=hours)
+    )
+    return cart
+
+
+class RacingSweeper(AbandonedCartSweeper):
+    """Sweeper running ``race`` between its SELECT and its UPDATE"""
+
+    def __init__(self, race, **kwargs):
+        super().__init__(**kwargs)
+        self.race = race
+        self.selected = False
+
+    def candidates(self, cutoff):
+        if self.selected:
+            self.race()
+        self.selected = True
+        return super().candidates(cutoff)
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestAbandonedCartSweeper:
+    def test_sweep_abandons_idle_carts_only(self):
+        """Test idle carts with items are abandoned and the rest are kept"""
+        product = ProductFactory(stock_quantity=100)
+        idle = [idle_cart(product) for _ in range(5)]
+        recent = idle_cart(product, hours=1)
+        empty = CartFactory()
+        Cart.objects.filter(pk=empty.pk).update(
+            updated_at=timezone.now() - timedelta(days=3)
+        )
+
+        abandoned = AbandonedCartSweeper(idle=timedelta(hours=24), chunk_size=2).sweep()
+
+        assert abandoned == 5
+        assert set(Cart.objects.filter(status='abandoned')) == set(idle)
+        assert Cart.objects.get(pk=recent.pk).status == 'active'
+        assert Cart.objects.get(pk=empty.pk).status == 'active'
+        assert not Cart.objects.filter(status='abandoned', abandoned_at=None).exists()
+
+    def test_recently_edited_old_cart_is_kept(self):
+        """Test adding, updating and removing lines count as cart activity"""
+        mug, shirt = ProductFactory(stock_quantity=10), ProductFactory(stock_quantity=10)
+        cart = idle_cart(mug)
+        Cart.objects.filter(pk=cart.pk).update(created_at=timezone.now() - timedelta(days=2))
+        item = CartService.add_item_to_cart(cart.user, shirt, 1)
+        CartService.update_cart_item_quantity(cart.user, item.id, 2)
+
+        assert AbandonedCartSweeper(idle=timedelta(hours=24)).sweep() == 0
+        assert Cart.objects.get(pk=cart.pk).status == 'active'
+
+        Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        CartService.remove_item_from_cart(cart.user, item.id)
+
+        assert AbandonedCartSweeper(idle=timedelta(hours=24)).sweep() == 0
+
+    def test_carts_changed_after_the_select_are_left_alone(self):
+        """Test carts purchased or edited mid-sweep get no abandoned events or counts"""
+        product = ProductFactory(stock_quantity=100)
+        purchased, edited, idle = (idle_cart(product) for _ in range(3))
+
+        def race():
+            Cart.objects.filter(pk=purchased.pk).update(status='purchased')
+            Cart.objects.filter(pk=edited.pk).update(updated_at=timezone.now())
+
+        abandoned = RacingSweeper(race, idle=timedelta(hours=24)).sweep()
+
+        assert abandoned == 1
+        assert Cart.objects.get(pk=edited.pk).status == 'active'
+        assert set(
+            CartEvent.objects.filter(event_type='abandoned').values_list('cart_id', flat=True)
+        ) == {idle.pk}
+        assert ProductEventCounters.objects.get(pk=product.pk).abandoned == 1
+
+    def test_sweep_logs_one_event_per_line(self):
+        """Test abandoned events and counters cover every product of the cart"""
+        mug, shirt = ProductFactory(stock_quantity=10), ProductFactory(stock_quantity=10)
+        cart = idle_cart(mug)
+        CartService.add_item_to_cart(cart.user, shirt, 2)
+        Cart.objects.filter(pk=cart.pk).update(
+            updated_at=timezone.now() - timedelta(days=2)
+        )
+
+        AbandonedCartSweeper(idle=timedelta(hours=24)).sweep()
+
+        events = CartEvent.objects.filter(event_type='abandoned', cart=cart)
+        assert {event.product_id for event in events} == {mug.pk, shirt.pk}
+        assert ProductEventCounters.objects.get(pk=mug.pk).abandoned == 1
+
+    def test_chunks_resume_from_the_last_key(self):
+        """Test each chunk is bounded and the sweep resumes past it"""
+        product = ProductFactory(stock_quantity=100)
+        for hours in (30, 40, 50):
+            idle_cart(product, hours=hours)
+        sweeper = AbandonedCartSweeper(idle=timedelta(hours=24), chunk_size=2)
+        cutoff = timezone.now() - sweeper.idle
+
+        swept, last_key = sweeper.sweep_chunk(cutoff)
+        assert (swept, Cart.objects.filter(status='active').count()) == (2, 1)
+        assert last_key is not None
+
+        swept, last_key = sweeper.sweep_chunk(cutoff, last_key)
+        assert (swept, last_key) == (1, None)
+
+    def test_command_dry_run_and_sweep(self):
+        """Test the command reports and abandons idle carts"""
+        product = ProductFactory(stock_quantity=10)
+        idle_cart(product, hours=10)
+
+        out = StringIO()
+        call_command('sweep_abandoned_carts', '--idle-hours', '6', '--dry-run', stdout=out)
+        assert 'Would abandon 1 cart(s)' in out.getvalue()
+        assert Cart.objects.filter(status='active').count() == 1
+
+        call_command('sweep_abandoned_carts', '--idle-hours', '6', stdout=out)
+        assert 'Abandoned 1 cart(s)' in out.getvalue()
+        assert Cart.objects.filter(status='abandoned').count() == 1
@@ -0,0 +1,168 @@
+import pytest
+from datetime import timedelta
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.analytics.models import CartEvent
+from apps.carts.models import Cart
+from tests.factories import (
+    CartEventFactory,
+    CartFactory,
+    CartItemFactory,
+    ProductFactory,
+    UserFactory,
+)
+from utils.admin import EstimatedCountPaginator
+
+
+@pytest.fixture
+def staff_client():
+    client = Client()
+    client.force_login(UserFactory(is_staff=True, is_superuser=True))
+    return client
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestEstimatedCountPaginator:
+    def test_unfiltered_large_table_uses_estimate(self, monkeypatch):
+        """Test the planner estimate replaces COUNT(*) on a bare queryset"""
+        monkeypatch.setattr('utils.admin.estimated_row_count', lambda model, using: 5_000_000)
+        CartEventFactory()
+
+        with CaptureQueriesContext(connection) as queries:
+            count = EstimatedCountPaginator(CartEvent.objects.all(), 100).count
+
+        assert count == 5_000_000
+        assert len(queries) == 0
+
+    def test_filtered_queryset_uses_plan_estimate(self, monkeypatch):
+        """Test a filtered queryset is estimated from its plan, not the table"""
+        CartEventFactory.create_batch(2, event_type='added')
+        monkeypatch.setattr('utils.admin.estimated_row_count', lambda model, using: 10)
+        monkeypatch.setattr('utils.admin.estimated_query_count', lambda queryset: 3_000_000)
+        filtered = CartEvent.objects.filter(event_type='added')
+
+        assert EstimatedCountPaginator(filtered, 100).count == 3_000_000
+
+    def test_small_estimates_are_counted(self, monkeypatch):
+        """Test estimates below the threshold, or none at all, fall back to COUNT(*)"""
+        CartEventFactory.create_batch(2, event_type='added')
+        monkeypatch.setattr('utils.admin.estimated_row_count', lambda model, using: 10)
+        assert EstimatedCountPaginator(CartEvent.objects.all(), 100).count == 2
+
+        filtered = CartEvent.objects.filter(event_type='added')
+        assert EstimatedCountPaginator(filtered, 100).count == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestLargeTableChangelists:
+    def test_event_changelist_queries_do_not_grow_with_rows(self, staff_client):
+        """Test related objects of listed events are joined, not fetched per row"""
+        CartEventFactory.create_batch(3)
+        with CaptureQueriesContext(connection) as few:
+            assert staff_client.get('/admin/analytics/cartevent/').status_code == 200
+
+        CartEventFactory.create_batch(12)
+        with CaptureQueriesContext(connection) as many:
+            staff_client.get('/admin/analytics/cartevent/')
+
+        assert len(many) == len(few)
+
+    def test_item_changelist_queries_do_not_grow_with_rows(self, staff_client):
+        """Test item rows render their product and cart owner from one join"""
+        CartItemFactory.create_batch(3)
+        with CaptureQueriesContext(connection) as few:
+            assert staff_client.get('/admin/carts/cartitem/').status_code == 200
+
+        CartItemFactory.create_batch(12)
+        with CaptureQueriesContext(connection) as many:
+            staff_client.get('/admin/carts/cartitem/')
+
+        assert len(many) == len(few)
+
+    def test_bare_changelist_opens_on_current_month(self, staff_client):
+        """Test the date hierarchy narrows an unfiltered list to this month"""
+        recent = CartEventFactory()
+        old = CartEventFactory()
+        last_year = timezone.now() - timedelta(days=400)
+        CartEvent.objects.filter(pk=old.pk).update(timestamp=last_year)
+
+        response = staff_client.get('/admin/analytics/cartevent/')
+        assert list(response.context['cl'].result_list) == [recent]
+
+        response = staff_client.get(
+            f'/admin/analytics/cartevent/?timestamp__year={last_year.year}'
+        )
+        assert old in response.context['cl'].result_list
+
+    def test_all_dates_stays_reachable(self, staff_client):
+        """Test "All dates" lists every date, also on its later links"""
+        recent = CartEventFactory()
+        old = CartEventFactory()
+        CartEvent.objects.filter(pk=old.pk).update(timestamp=timezone.now() - timedelta(days=400))
+
+        narrowed = staff_client.get('/admin/analytics/cartevent/')
+        all_dates = narrowed.context['cl'].get_query_string(remove=['timestamp__'])
+        assert all_dates == '?all_dates=1'
+        assert b'?all_dates=1' in narrowed.content
+
+        response = staff_client.get(f'/admin/analytics/cartevent/{all_dates}')
+        cl = response.context['cl']
+        assert set(cl.result_list) == {recent, old}
+        assert 'all_dates=1' in cl.get_query_string({'p': 1})
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestPaginatedCartItemInline:
+    def test_cart_change_page_shows_one_page_of_items(self, staff_client):
+        """Test a big cart is edited one page of items at a time"""
+        cart = CartFactory()
+        for product in ProductFactory.create_batch(30):
+            CartItemFactory(cart=cart, product=product)
+        url = f'/admin/carts/cart/{cart.pk}/change/'
+
+        first = staff_client.get(url)
+        second = staff_client.get(f'{url}?cartitem_page=2')
+
+        def formset(response):
+            return response.context['inline_admin_formsets'][0].formset
+
+        assert first.status_code == 200
+        assert len(formset(first).initial_forms) == 25
+        assert len(formset(second).initial_forms) == 5
+        assert b'Page 1 of 2' in first.content
+
+    def test_saving_a_page_keeps_other_items(self, staff_client):
+        """Test posting one page of the inline leaves the other pages alone"""
+        cart = CartFactory()
+        for product in ProductFactory.create_batch(27):
+            CartItemFactory(cart=cart, product=product, quantity=1)
+        url = f'/admin/carts/cart/{cart.pk}/change/?cartitem_page=2'
+        formset = staff_client.get(url).context['inline_admin_formsets'][0].formset
+
+        data = {
+            'user': cart.user_id,
+            'status': 'active',
+            f'{formset.prefix}-TOTAL_FORMS': 2,
+            f'{formset.prefix}-INITIAL_FORMS': 2,
+            f'{formset.prefix}-MIN_NUM_FORMS': 0,
+            f'{formset.prefix}-MAX_NUM_FORMS': 1000,
+        }
+        for index, form in enumerate(formset.initial_forms):
+            data[f'{formset.prefix}-{index}-id'] = form.instance.pk
+            data[f'{formset.prefix}-{index}-cart'] = cart.pk
+            data[f'{formset.prefix}-{index}-product'] = form.instance.product_id
+            data[f'{formset.prefix}-{index}-quantity'] = 4
+
+        response = staff_client.post(url, data)
+
+        assert response.status_code == 302
+        assert cart.items.count() == 27
+        assert cart.items.filter(quantity=4).count() == 2
+        assert Cart.objects.get(pk=cart.pk).status == 'active'
@@ -0,0 +1,68 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.dashboard import REFRESH_LOCK_KEY, STATS_KEY, DashboardStats
+from tests.factories import CartFactory, ProductFactory, UserFactory
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestDashboardStats:
+    def test_compute_is_one_query_per_table(self):
+        """Test the statistics take a single aggregate per table"""
+        ProductFactory(stock_quantity=0)
+        ProductFactory(stock_quantity=5)
+        CartFactory(status='active')
+        CartFactory(status='purchased')
+        for _ in range(3):
+            CartFactory(status='abandoned')
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = DashboardStats.compute()
+
+        assert len(queries) == 3
+        assert stats['total_users'] == 5
+        assert (stats['in_stock_products'], stats['out_of_stock_products']) == (1, 1)
+        assert (stats['active_carts'], stats['abandoned_carts'], stats['purchased_carts']) == (1, 3, 1)
+        assert stats['abandonment_rate'] == 75.0
+
+    def test_abandonment_rate_without_closed_carts(self):
+        """Test open carts alone do not count as abandoned"""
+        CartFactory(status='active')
+
+        assert DashboardStats.compute()['abandonment_rate'] == 0
+
+    def test_fresh_stats_are_served_from_cache(self):
+        """Test a cached value skips the database"""
+        DashboardStats.get()
+
+        with CaptureQueriesContext(connection) as queries:
+            DashboardStats.get()
+
+        assert len(queries) == 0
+
+    def test_stale_stats_are_served_while_refreshing(self, monkeypatch):
+        """Test an expired value is returned and one refresh is started"""
+        cache.set(STATS_KEY, (0, {'total_users': 42}))
+        started = []
+        monkeypatch.setattr('threading.Thread.start', lambda thread: started.append(thread))
+
+        assert DashboardStats.get() == {'total_users': 42}
+        assert DashboardStats.get() == {'total_users': 42}
+        assert len(started) == 1
+        assert cache.get(REFRESH_LOCK_KEY)
+
+    def test_admin_index_renders_stats(self):
+        """Test the admin home page shows the cached statistics"""
+        admin = UserFactory(is_staff=True, is_superuser=True)
+        client = Client()
+        client.force_login(admin)
+        CartFactory(status='abandoned')
+
+        response = client.get('/admin/')
+
+        assert response.status_code == 200
+        assert response.context['abandonment_rate'] == 100.0
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.analytics.benchmarks import (
+    AnalyticsBenchmark,
+    SyntheticDataset,
+    compare_reports,
+)
+from apps.analytics.models import CartEvent, ProductEventCounters
+from apps.carts.models import Cart
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestSyntheticDataset:
+    def test_seeds_requested_number_of_events(self):
+        """Test the dataset holds at least the requested events and derived stores"""
+        counts = SyntheticDataset(500, days=30, chunk_size=100).seed()
+
+        assert counts['cart_events'] >= 500
+        assert CartEvent.objects.count() == counts['cart_events']
+        assert Cart.objects.count() == counts['carts']
+        assert ProductEventCounters.objects.exists()
+
+    def test_keeps_generated_timestamps(self):
+        """Test carts keep their historical creation time"""
+        SyntheticDataset(300, days=30).seed(derived=False)
+
+        created = Cart.objects.values_list('created_at', flat=True)
+        assert min(created) < max(created)
+        assert CartEvent.objects.filter(event_type='abandoned').exists()
+
+    def test_is_deterministic(self):
+        """Test the same seed produces the same dataset shape"""
+        first = SyntheticDataset(300, seed=7).seed(derived=False)
+        second = SyntheticDataset(300, seed=7).seed(derived=False)
+
+        assert first == second
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestAnalyticsBenchmark:
+    def test_report_covers_services_and_endpoints(self):
+        """Test every target is timed and its queries counted"""
+        SyntheticDataset(300).seed()
+
+        report = AnalyticsBenchmark(repeat=1).run()
+
+        assert 'service.user_behavior' in report['results']
+        assert 'api.time_metrics' in report['results']
+        for result in report['results'].values():
+            assert result['queries'] >= 0
+            assert result['median_ms'] >= 0
+
+    def test_compare_flags_regressions(self):
+        """Test slower medians and extra queries are reported"""
+        baseline = {'results': {'a': {'queries': 2, 'median_ms': 10.0}}}
+        slower = {'results': {'a': {'queries': 3, 'median_ms': 20.0}}}
+        noise = {'results': {'a': {'queries': 2, 'median_ms': 10.5}}}
+
+        metrics = {
+            regression['metric'] for regression in compare_reports(baseline, slower)
+        }
+
+        assert metrics == {'queries', 'median_ms'}
+        assert compare_reports(baseline, noise) == []
+
+    def test_command_fails_on_regression(self, tmp_path):
+        """Test the command writes a report and fails against a faster baseline"""
+        call_command('seed_analytics_dataset', events=300, stdout=StringIO())
+        report_path = tmp_path / 'report.json'
+        call_command(
+            'benchmark_analytics', repeat=1, output=str(report_path), stdout=StringIO()
+        )
+
+        baseline = json.loads(report_path.read_text())
+        for result in baseline['results'].values():
+            result['queries'] = 0
+        baseline_path = tmp_path / 'baseline.json'
+        baseline_path.write_text(json.dumps(baseline))
+
+        with pytest.raises(CommandError):
+            call_command(
+                'benchmark_analytics',
+                repeat=1,
+                baseline=str(baseline_path),
+                stdout=StringIO(),
+            )
@@ -0,0 +1,90 @@
+import pytest
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.analytics.cache import AnalyticsCache
+from apps.analytics.services import AnalyticsService
+from apps.carts.services import CartService
+from tests.factories import CartFactory, ProductFactory, UserFactory
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestAnalyticsCache:
+    def test_repeated_call_is_served_from_cache(self):
+        """Test a second identical call does not touch the database"""
+        AnalyticsCache.reset_stats()
+        AnalyticsService.get_time_based_metrics(days=7)
+
+        with CaptureQueriesContext(connection) as queries:
+            AnalyticsService.get_time_based_metrics(days=7)
+
+        assert len(queries) == 0
+        assert AnalyticsCache.stats()['hits'] == 1
+        assert AnalyticsCache.stats()['misses'] == 1
+
+    def test_arguments_are_part_of_the_key(self):
+        """Test different arguments are cached separately"""
+        CartFactory(status='abandoned')
+        AnalyticsService.calculate_abandonment_rate(days=7)
+
+        with CaptureQueriesContext(connection) as queries:
+            AnalyticsService.calculate_abandonment_rate(days=30)
+
+        assert len(queries) > 0
+
+    def test_cart_event_bumps_user_and_product_watermarks(self):
+        """Test writes through CartService are never served stale"""
+        user = UserFactory()
+        product = ProductFactory(stock_quantity=10)
+        other_user = UserFactory()
+
+        assert AnalyticsService.get_user_behavior_analytics(user.id)[
+            'total_interactions'
+        ] == 0
+        assert AnalyticsService.get_product_insights(product.id)['total_interactions'] == 0
+        AnalyticsService.get_user_behavior_analytics(other_user.id)
+
+        CartService.add_item_to_cart(user, product, 1)
+
+        assert AnalyticsService.get_user_behavior_analytics(user.id)[
+            'total_interactions'
+        ] == 1
+        assert AnalyticsService.get_product_insights(product.id)['total_interactions'] == 1
+
+        # Unrelated users keep their cached entry
+        with CaptureQueriesContext(connection) as queries:
+            AnalyticsService.get_user_behavior_analytics(other_user.id)
+        assert len(queries) == 0
+
+    def test_commit_retires_entries_cached_before_it(self, django_capture_on_commit_callbacks):
+        """Test results cached while the write was uncommitted are not served after it"""
+        user = UserFactory()
+        product = ProductFactory(stock_quantity=10)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            CartService.add_item_to_cart(user, product, 1)
+            AnalyticsService.get_user_behavior_analytics(user.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            AnalyticsService.get_user_behavior_analytics(user.id)
+        assert len(queries) > 0
+
+    def test_daily_metrics_follow_the_current_date(self, monkeypatch):
+        """Test the default date is resolved before the cache key is built"""
+        today = timezone.now()
+        assert AnalyticsService.get_daily_metrics()['date'] == today.date().isoformat()
+
+        monkeypatch.setattr(timezone, 'now', lambda: today + timedelta(days=1))
+
+        tomorrow = (today + timedelta(days=1)).date().isoformat()
+        assert AnalyticsService.get_daily_metrics()['date'] == tomorrow
+
+    def test_cache_stats_endpoint(self, admin_client):
+        """Test cache counters are exposed to admins"""
+        response = admin_client.get('/api/analytics/cache-stats/')
+        assert response.status_code == 200
+        assert {'hits', 'misses', 'hit_rate'} <= set(response.data)
@@ -0,0 +1,61 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.analytics.services import AnalyticsService
+from tests.factories import (
+    CartEventFactory,
+    CartFactory,
+    CartItemFactory,
+    ProductFactory,
+    UserFactory,
+)
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestUserBehaviorAnalytics:
+    def test_user_behavior_values(self):
+        """Test rates and average purchased cart value"""
+        user = UserFactory()
+        product = ProductFactory(price=Decimal('10.00'))
+        other = ProductFactory(price=Decimal('2.50'))
+
+        first = CartFactory(user=user, status='purchased')
+        CartItemFactory(cart=first, product=product, quantity=2)
+        CartItemFactory(cart=first, product=other, quantity=4)
+        second = CartFactory(user=user, status='purchased')
+        CartItemFactory(cart=second, product=product, quantity=1)
+        CartFactory(user=user, status='abandoned')
+        CartFactory(user=user, status='active')
+        CartEventFactory(cart=first, product=product, event_type='added')
+
+        data = AnalyticsService.get_user_behavior_analytics(user.id)
+
+        assert data['total_carts'] == 4
+        assert data['purchase_rate'] == 50.0
+        assert data['abandonment_rate'] == 25.0
+        # (20 + 10) and 10 over two purchased carts
+        assert data['average_cart_value'] == 20.0
+        assert data['total_interactions'] == 1
+        assert data['favorite_products'][0]['product__name'] == product.name
+
+    def test_user_behavior_query_count_is_constant(self):
+        """Test the profile costs the same number of queries at any history size"""
+        user = UserFactory()
+        cart = CartFactory(user=user, status='purchased')
+        CartItemFactory(cart=cart)
+
+        with CaptureQueriesContext(connection) as small:
+            AnalyticsService.get_user_behavior_analytics(user.id)
+
+        for _ in range(10):
+            cart = CartFactory(user=user, status='purchased')
+            CartItemFactory.create_batch(3, cart=cart)
+            CartEventFactory(cart=cart)
+
+        with CaptureQueriesContext(connection) as large:
+            AnalyticsService.get_user_behavior_analytics(user.id)
+
+        assert len(small) == len(large) == 3
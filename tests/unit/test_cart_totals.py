@@ -0,0 +1,60 @@
+import pytest
+from decimal import Decimal
+
+from apps.carts.models import Cart
+from apps.carts.services import CartService
+from tests.factories import ProductFactory, UserFactory
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestCartTotals:
+    def test_service_keeps_totals_current(self):
+        """Test add, update and remove refresh the denormalized totals"""
+        user = UserFactory()
+        shirt = ProductFactory(price=Decimal('20.00'), stock_quantity=10)
+        mug = ProductFactory(price=Decimal('5.50'), stock_quantity=10)
+
+        CartService.add_item_to_cart(user, shirt, 2)
+        mug_item = CartService.add_item_to_cart(user, mug, 1)
+        cart = Cart.objects.get(user=user, status='active')
+        assert cart.total_price == Decimal('45.50')
+        assert cart.items_count == 3
+        assert cart.unique_items == 2
+
+        CartService.update_cart_item_quantity(user, mug_item.id, 3)
+        cart.refresh_from_db()
+        assert cart.total_price == Decimal('56.50')
+        assert cart.items_count == 5
+
+        CartService.remove_item_from_cart(user, mug_item.id)
+        cart.refresh_from_db()
+        assert cart.total_price == Decimal('40.00')
+        assert cart.unique_items == 1
+
+    def test_price_change_updates_active_carts_only(self):
+        """Test repricing a product refreshes active carts and keeps closed ones"""
+        product = ProductFactory(price=Decimal('10.00'), stock_quantity=10)
+        buyer, shopper = UserFactory(), UserFactory()
+        CartService.add_item_to_cart(buyer, product, 1)
+        purchased = CartService.checkout_cart(buyer)
+        CartService.add_item_to_cart(shopper, product, 2)
+
+        product.price = Decimal('12.50')
+        product.save()
+
+        assert Cart.objects.get(user=shopper).total_price == Decimal('25.00')
+        purchased.refresh_from_db()
+        assert purchased.total_price == Decimal('10.00')
+
+    def test_product_delete_updates_active_carts(self):
+        """Test carts losing a deleted product are refreshed"""
+        user = UserFactory()
+        product = ProductFactory(price=Decimal('10.00'), stock_quantity=10)
+        CartService.add_item_to_cart(user, product, 1)
+
+        product.delete()
+
+        cart = Cart.objects.get(user=user)
+        assert cart.total_price == 0
+        assert cart.unique_items == 0
@@ -0,0 +1,99 @@
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.analytics.models import ProductPairCount
+from apps.carts.models import Cart, CartItem
+from apps.carts.services import CartService
+from tests.factories import CartFactory, ProductFactory, UserFactory
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestAddItemUpsert:
+    def test_repeat_add_accumulates_quantity(self):
+        """Test adding a product twice updates the same line"""
+        user = UserFactory()
+        product = ProductFactory(stock_quantity=10)
+
+        first = CartService.add_item_to_cart(user, product, 2)
+        second = CartService.add_item_to_cart(user, product, 3)
+
+        assert second.id == first.id
+        assert second.quantity == 5
+        assert second.added_at == first.added_at
+        assert second.product == product
+        assert CartItem.objects.get().quantity == 5
+        assert Cart.objects.get(user=user).items_count == 5
+
+    def test_repeat_add_is_one_item_write(self):
+        """Test a repeat add writes the line with a single statement"""
+        user = UserFactory()
+        product = ProductFactory(stock_quantity=10)
+        CartService.add_item_to_cart(user, product, 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            CartService.add_item_to_cart(user, product, 1)
+
+        item_statements = [
+            query['sql'] for query in queries
+            if 'cart_items' in query['sql'].split(' WHERE ')[0]
+            and 'SUM(' not in query['sql']
+        ]
+        assert len(item_statements) == 1
+        assert item_statements[0].startswith('INSERT INTO cart_items')
+        assert len(queries) <= 10
+
+    def test_stock_guard_rejects_without_writing(self):
+        """Test an add past the stock leaves the line untouched"""
+        user = UserFactory()
+        product = ProductFactory(stock_quantity=5)
+        CartService.add_item_to_cart(user, product, 4)
+
+        with pytest.raises(ValueError, match='Only 1 additional available'):
+            CartService.add_item_to_cart(user, product, 2)
+        assert CartItem.objects.get().quantity == 4
+
+    def test_stock_guard_uses_current_stock(self):
+        """Test the guard reads the stock row rather than a stale instance"""
+        user = UserFactory()
+        product = ProductFactory(stock_quantity=5)
+        stale = type(product).objects.get(pk=product.pk)
+        product.stock_quantity = 1
+        product.save()
+
+        with pytest.raises(ValueError, match='Only 1 items available'):
+            CartService.add_item_to_cart(user, stale, 3)
+        assert not CartItem.objects.exists()
+
+    def test_pairs_recorded_on_first_insert_only(self):
+        """Test co-occurrence counts a product once however often it is added"""
+        user = UserFactory()
+        first, second = ProductFactory(stock_quantity=10), ProductFactory(stock_quantity=10)
+        CartService.add_item_to_cart(user, first, 1)
+        CartService.add_item_to_cart(user, second, 1)
+        CartService.add_item_to_cart(user, second, 1)
+
+        assert ProductPairCount.objects.get(product=first).count == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestOneActiveCartPerUser:
+    def test_second_active_cart_is_rejected(self):
+        """Test the database refuses a second active cart for a user"""
+        user = UserFactory()
+        CartFactory(user=user)
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            CartFactory(user=user)
+
+    def test_closed_carts_are_not_limited(self):
+        """Test purchased and abandoned carts sit alongside the active one"""
+        user = UserFactory()
+        CartFactory(user=user, status='purchased')
+        CartFactory(user=user, status='abandoned')
+        CartFactory(user=user, status='purchased')
+
+        assert CartService.get_or_create_user_cart(user).status == 'active'
+        assert Cart.objects.filter(user=user).count() == 4
@@ -0,0 +1,47 @@
+import pytest
+
+from apps.analytics.models import CartEvent
+from apps.carts.models import Cart
+from apps.carts.services import CartService
+from tests.factories import ProductFactory, UserFactory
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestCheckout:
+    def test_checkout_decrements_stock(self):
+        """Test checkout takes the purchased quantities from stock"""
+        user = UserFactory()
+        mug, shirt = ProductFactory(stock_quantity=5), ProductFactory(stock_quantity=3)
+        CartService.add_item_to_cart(user, mug, 2)
+        CartService.add_item_to_cart(user, shirt, 3)
+
+        cart = CartService.checkout_cart(user)
+
+        mug.refresh_from_db()
+        shirt.refresh_from_db()
+        assert (mug.stock_quantity, shirt.stock_quantity) == (3, 0)
+        cart.refresh_from_db()
+        assert cart.status == 'purchased'
+        assert cart.purchased_at is not None
+        assert CartEvent.objects.filter(cart=cart, event_type='purchased').count() == 2
+
+    def test_checkout_never_oversells(self):
+        """Test a cart exceeding the remaining stock is refused and left active"""
+        product = ProductFactory(stock_quantity=3)
+        first, second = UserFactory(), UserFactory()
+        CartService.add_item_to_cart(first, product, 2)
+        CartService.add_item_to_cart(second, product, 2)
+        CartService.checkout_cart(first)
+
+        with pytest.raises(ValueError, match='Not enough stock'):
+            CartService.checkout_cart(second)
+
+        product.refresh_from_db()
+        assert product.stock_quantity == 1
+        assert Cart.objects.get(user=second).status == 'active'
+
+    def test_empty_cart(self):
+        """Test checking out without items fails"""
+        with pytest.raises(ValueError, match='empty cart'):
+            CartService.checkout_cart(UserFactory())
@@ -0,0 +1,68 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.analytics.cooccurrence import CooccurrenceService
+from apps.analytics.models import ProductPairCount
+from apps.carts.services import CartService
+from tests.factories import CartFactory, CartItemFactory, ProductFactory, UserFactory
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestCooccurrenceService:
+    def test_pairs_counted_as_items_are_added(self):
+        """Test each new cart product is paired with the cart's other products"""
+        first, second, third = ProductFactory.create_batch(3, stock_quantity=10)
+        for user in UserFactory.create_batch(2):
+            CartService.add_item_to_cart(user, first, 1)
+            CartService.add_item_to_cart(user, second, 1)
+            CartService.add_item_to_cart(user, second, 1)  # existing line
+        CartService.add_item_to_cart(user, third, 1)
+
+        top = CooccurrenceService.top_pairs(limit=1)[0]
+        assert {top['product_a']['id'], top['product_b']['id']} == {
+            first.id,
+            second.id,
+        }
+        assert top['frequency'] == 2
+
+        also_added = CooccurrenceService.also_added(third.id)
+        assert [row['frequency'] for row in also_added] == [1, 1]
+
+    def test_pairs_decremented_on_removal(self):
+        """Test removing a product unpairs it from the remaining items"""
+        user = UserFactory()
+        first, second = ProductFactory.create_batch(2, stock_quantity=10)
+        CartService.add_item_to_cart(user, first, 1)
+        item = CartService.add_item_to_cart(user, second, 1)
+        CartService.remove_item_from_cart(user, item.id)
+
+        assert CooccurrenceService.top_pairs() == []
+        assert CooccurrenceService.also_added(first.id) == []
+
+    def test_top_pairs_resolves_names_in_one_query(self):
+        """Test reading pairs costs a constant number of queries"""
+        cart = CartFactory()
+        for product in ProductFactory.create_batch(6):
+            CartItemFactory(cart=cart, product=product)
+        call_command('rebuild_product_pairs')
+
+        with CaptureQueriesContext(connection) as queries:
+            pairs = CooccurrenceService.top_pairs(limit=15)
+
+        assert len(pairs) == 15
+        assert len(queries) == 2
+
+    def test_rebuild_matches_cart_items(self):
+        """Test the rebuild stores both directions of each pair"""
+        product_a, product_b = ProductFactory.create_batch(2)
+        for cart in CartFactory.create_batch(3):
+            CartItemFactory(cart=cart, product=product_a)
+            CartItemFactory(cart=cart, product=product_b)
+
+        assert CooccurrenceService.rebuild() == 1
+        assert ProductPairCount.objects.get(
+            product=product_b, related_product=product_a
+        ).count == 3
@@ -0,0 +1,149 @@
+import gzip
+import json
+
+import pytest
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.analytics.archive import EventArchive, archivable_months
+from apps.analytics.counters import ProductCounterService
+from apps.analytics.models import CartEvent
+from apps.analytics.partitions import EventPartitionManager, add_months
+from apps.analytics.services import AnalyticsService
+from tests.factories import CartEventFactory, CartFactory
+
+
+def event_at(cart, moment):
+    event = CartEventFactory(cart=cart, event_type='added')
+    CartEvent.objects.filter(pk=event.pk).update(timestamp=moment)
+    return event
+
+
+@pytest.fixture
+def archive_dir(tmp_path, settings):
+    settings.ANALYTICS_ARCHIVE_DIR = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestEventArchive:
+    def test_archive_moves_old_months_to_segments(self, archive_dir):
+        """Test months past the retention horizon leave the live table"""
+        cart = CartFactory()
+        old = timezone.now() - timedelta(days=120)
+        for minutes in range(3):
+            event_at(cart, old + timedelta(minutes=minutes))
+        recent = CartEventFactory(cart=cart)
+
+        months = archivable_months(retention_months=2)
+        assert months == [timezone.localdate(old).replace(day=1)]
+
+        call_command('archive_cart_events', retention_months=2)
+
+        assert list(CartEvent.objects.values_list('id', flat=True)) == [recent.id]
+        manifest = json.loads((archive_dir / 'manifest.json').read_text())
+        segment = manifest['segments'][0]
+        assert segment['rows'] == 3
+        with gzip.open(archive_dir / segment['file'], 'rt') as segment_file:
+            assert len(segment_file.readlines()) == 3
+
+    def test_windows_reaching_back_read_the_archive(self, archive_dir, settings):
+        """Test sessions and counts include archived months transparently"""
+        settings.ANALYTICS_SESSION_GAP_SECONDS = 3600
+        cart = CartFactory()
+        old = timezone.now() - timedelta(days=100)
+        event_at(cart, old)
+        event_at(cart, old + timedelta(minutes=10))
+
+        before = AnalyticsService.get_time_based_metrics(days=365)
+        call_command('archive_cart_events', retention_months=1)
+        cache.clear()
+        after = AnalyticsService.get_time_based_metrics(days=365)
+
+        assert CartEvent.objects.count() == 0
+        assert EventArchive().reaches(old)
+        assert after['total_events'] == before['total_events'] == 2
+        assert after['total_sessions'] == before['total_sessions'] == 1
+        assert after['most_active_hour'] == before['most_active_hour']
+
+    def test_counter_rebuild_keeps_archived_events(self, archive_dir):
+        """Test rebuilding product counters after archiving counts archived events"""
+        cart = CartFactory()
+        old = event_at(cart, timezone.now() - timedelta(days=100))
+        CartEventFactory(cart=cart, product=old.product, event_type='added')
+        call_command('archive_cart_events', retention_months=1)
+
+        ProductCounterService.rebuild()
+
+        counts, recent = ProductCounterService.get_insights(old.product_id)
+        assert counts['added'] == 2
+        assert recent == 1
+
+    def test_user_behavior_includes_archived_events(self, archive_dir):
+        """Test user totals and favorite products read the archived months"""
+        cart = CartFactory()
+        old = event_at(cart, timezone.now() - timedelta(days=100))
+        CartEventFactory(cart=cart, user=cart.user, product=old.product, event_type='added')
+        call_command('archive_cart_events', retention_months=1)
+        cache.clear()
+
+        data = AnalyticsService.get_user_behavior_analytics(cart.user_id)
+
+        assert data['total_interactions'] == 2
+        assert data['favorite_products'] == [{'product__name': old.product.name, 'count': 2}]
+
+    def test_short_windows_skip_the_archive(self, archive_dir):
+        """Test windows after the archive horizon never open segments"""
+        cart = CartFactory()
+        event_at(cart, timezone.now() - timedelta(days=100))
+        call_command('archive_cart_events', retention_months=1)
+
+        assert not EventArchive().reaches(timezone.now() - timedelta(days=7))
+
+    def test_rearchiving_a_month_adds_a_part(self, archive_dir):
+        """Test late events of an archived month never overwrite its segment"""
+        cart = CartFactory()
+        old = timezone.now() - timedelta(days=120)
+        first = event_at(cart, old)
+        month = timezone.localdate(old).replace(day=1)
+        archive = EventArchive()
+        archive.archive_month(month)
+
+        late = event_at(cart, old + timedelta(minutes=5))
+        archive.archive_month(month)
+
+        manifest = json.loads((archive_dir / 'manifest.json').read_text())
+        assert [segment['rows'] for segment in manifest['segments']] == [1, 1]
+        assert len({segment['file'] for segment in manifest['segments']}) == 2
+        archived = {row['id'] for row in archive.iter_rows(old - timedelta(days=1), timezone.now())}
+        assert archived == {first.id, late.id}
+        assert archive.archived_months() == [month]
+        assert not CartEvent.objects.exists()
+
+    def test_events_written_during_export_stay_live(self, archive_dir, monkeypatch):
+        """Test only the rows written to the segment leave the table"""
+        cart = CartFactory()
+        old = timezone.now() - timedelta(days=120)
+        archived = event_at(cart, old)
+        write_segment = EventArchive._write_segment
+        arrivals = []
+
+        def write_then_insert(archive, *args):
+            result = write_segment(archive, *args)
+            arrivals.append(event_at(cart, old + timedelta(minutes=1)))
+            return result
+
+        monkeypatch.setattr(EventArchive, '_write_segment', write_then_insert)
+        assert EventArchive().archive_month(timezone.localdate(old).replace(day=1)) == 1
+
+        assert list(CartEvent.objects.values_list('id', flat=True)) == [arrivals[0].id]
+        assert not CartEvent.objects.filter(id=archived.id).exists()
+
+    def test_partition_management_is_a_no_op_without_postgres(self):
+        """Test other backends keep a single cart_events table"""
+        assert EventPartitionManager.ensure_partitions() == []
+        month = add_months(timezone.localdate(), -1)
+        assert add_months(month, 1) == timezone.localdate().replace(day=1)
@@ -0,0 +1,118 @@
+import pytest
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.analytics.models import CartEvent
+from apps.analytics.sinks import BufferedEventSink, SyncEventSink, get_event_sink
+from tests.factories import CartFactory
+
+
+def build_event(cart):
+    return CartEvent(cart=cart, user=cart.user, event_type='added', quantity_changed=1)
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestEventSinks:
+    def test_sync_sink_is_the_default(self):
+        """Test events are written immediately unless buffering is enabled"""
+        assert isinstance(get_event_sink(), SyncEventSink)
+
+    def test_buffered_sink_waits_for_commit(self, django_capture_on_commit_callbacks):
+        """Test events are queued on commit and written in one bulk insert"""
+        cart = CartFactory()
+        sink = BufferedEventSink(batch_size=100, background=False)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            for _ in range(3):
+                sink.submit(build_event(cart))
+            assert CartEvent.objects.count() == 0
+
+        assert CartEvent.objects.count() == 0
+        with CaptureQueriesContext(connection) as queries:
+            assert sink.flush() == 3
+        assert CartEvent.objects.count() == 3
+        assert len([q for q in queries if 'INSERT' in q['sql']]) == 1
+
+    def test_buffered_sink_flushes_by_size(self, django_capture_on_commit_callbacks):
+        """Test reaching the batch size writes the buffer"""
+        cart = CartFactory()
+        sink = BufferedEventSink(batch_size=2, background=False)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            for _ in range(5):
+                sink.submit(build_event(cart))
+
+        assert CartEvent.objects.count() == 4
+        sink.shutdown()
+        assert CartEvent.objects.count() == 5
+
+    def test_batches_are_queued_together(self, django_capture_on_commit_callbacks):
+        """Test submit_many writes a batch directly or queues it as a whole"""
+        cart = CartFactory()
+        SyncEventSink().submit_many([build_event(cart), build_event(cart)])
+        assert CartEvent.objects.count() == 2
+
+        sink = BufferedEventSink(batch_size=100, background=False)
+        with django_capture_on_commit_callbacks(execute=True):
+            sink.submit_many([build_event(cart) for _ in range(3)])
+        assert sink.flush() == 3
+        assert CartEvent.objects.count() == 5
+
+    def test_rolled_back_events_are_dropped(self, django_capture_on_commit_callbacks):
+        """Test events of a transaction that never commits are not written"""
+        cart = CartFactory()
+        sink = BufferedEventSink(batch_size=1, background=False)
+
+        with django_capture_on_commit_callbacks(execute=False):
+            sink.submit(build_event(cart))
+
+        assert sink.flush() == 0
+        assert CartEvent.objects.count() == 0
+
+    def test_buffered_sink_stamps_sessions_at_flush(self, django_capture_on_commit_callbacks):
+        """Test buffered events continue the session of stored and buffered events"""
+        cart = CartFactory()
+        start = timezone.now() - timedelta(minutes=10)
+        SyncEventSink().submit(CartEvent(cart=cart, user=cart.user, event_type='added', timestamp=start))
+        sink = BufferedEventSink(batch_size=100, background=False)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            for minutes in (2, 5):
+                event = build_event(cart)
+                event.timestamp = start + timedelta(minutes=minutes)
+                sink.submit(event)
+        sink.flush()
+
+        durations = list(
+            CartEvent.objects.order_by('timestamp').values_list('session_duration_seconds', flat=True)
+        )
+        assert durations == [0, 120, 300]
+
+    def test_failed_batches_are_retried_then_spilled(
+        self, django_capture_on_commit_callbacks, monkeypatch, tmp_path
+    ):
+        """Test a failing batch is kept for retries and then spilled for replay"""
+        cart = CartFactory()
+        sink = BufferedEventSink(batch_size=100, background=False, max_retries=2, spill_dir=tmp_path)
+        with django_capture_on_commit_callbacks(execute=True):
+            sink.submit_many([build_event(cart) for _ in range(3)])
+
+        def fail(*args, **kwargs):
+            raise DatabaseError('database is unavailable')
+
+        monkeypatch.setattr(CartEvent.objects, 'bulk_create', fail)
+        assert sink.flush() == 0
+        assert len(sink._buffer) == 3
+        assert sink.flush() == 0
+        assert sink._buffer == []
+        monkeypatch.undo()
+
+        [spilled] = tmp_path.iterdir()
+        call_command('load_cart_events', str(spilled), stdout=StringIO())
+        assert CartEvent.objects.count() == 3
@@ -0,0 +1,41 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from tests.factories import CartEventFactory
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestExplainAnalytics:
+    def test_every_query_shape_uses_an_index(self):
+        """Test no analytics query needs a sequential scan"""
+        CartEventFactory.create_batch(3)
+        out = StringIO()
+
+        call_command('explain_analytics', min_rows=1, fail_on_seq_scan=True, stdout=out)
+
+        assert '0 flagged' in out.getvalue()
+
+    def test_small_tables_are_not_flagged(self):
+        """Test scans of tables below the row threshold are ignored"""
+        out = StringIO()
+        call_command('explain_analytics', stdout=out, show_plans=True)
+        assert 'SEQ SCAN' not in out.getvalue()
+
+    def test_fail_on_seq_scan(self, monkeypatch):
+        """Test flagged scans can fail the command"""
+        from apps.analytics.management.commands import explain_analytics
+        from apps.carts.models import Cart
+
+        CartEventFactory()
+        monkeypatch.setattr(
+            explain_analytics,
+            'analytics_query_shapes',
+            lambda: [('all_carts', Cart.objects.all())],
+        )
+        with pytest.raises(CommandError):
+            call_command(
+                'explain_analytics', min_rows=1, fail_on_seq_scan=True, stdout=StringIO()
+            )
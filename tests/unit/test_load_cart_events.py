@@ -0,0 +1,155 @@
+import csv
+import gzip
+import pytest
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.utils import timezone
+
+from apps.analytics.archive import EventArchive
+from apps.analytics.export import EventExporter
+from apps.analytics.loading import EventLoader, deferred_indexes
+from apps.analytics.models import CartEvent, ProductEventCounters
+from apps.analytics.partitions import EventPartitionManager, partition_name
+from tests.factories import CartEventFactory, CartFactory, ProductFactory
+
+
+def event_indexes():
+    with connection.cursor() as cursor:
+        return {
+            index
+            for index, info in connection.introspection.get_constraints(
+                cursor, 'cart_events'
+            ).items()
+            if info['index'] and not info['primary_key']
+        }
+
+
+def index_definitions():
+    tables = ['cart_events'] + [
+        partition_name(month) for month in EventPartitionManager.list_partitions()
+    ]
+    with connection.cursor() as cursor:
+        return {
+            table: sorted(
+                (tuple(info['columns']), info['type'] or '')
+                for info in connection.introspection.get_constraints(cursor, table).values()
+                if info['index'] and not info['primary_key']
+            )
+            for table in tables
+        }
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestLoadCartEvents:
+    def test_exported_events_reload_unchanged(self, tmp_path):
+        """Test an NDJSON export loads back with the same rows"""
+        CartEventFactory.create_batch(5)
+        now = timezone.now()
+        exporter = EventExporter(now - timedelta(days=1), now + timedelta(minutes=1))
+        path = tmp_path / 'events.ndjson.gz'
+        with gzip.open(path, 'wt') as handle:
+            handle.writelines(exporter.ndjson())
+        original = set(CartEvent.objects.values_list('id', 'cart_id', 'event_type', 'timestamp'))
+        CartEvent.objects.all().delete()
+
+        out = StringIO()
+        call_command('load_cart_events', str(path), '--batch-size', '2', stdout=out)
+
+        assert set(CartEvent.objects.values_list('id', 'cart_id', 'event_type', 'timestamp')) == original
+        assert 'Loaded 5 event(s), skipped 0' in out.getvalue()
+        assert 'rows/s' in out.getvalue()
+
+    def test_csv_resolves_emails_and_names(self, tmp_path):
+        """Test CSV rows resolve users by email and products by name"""
+        cart = CartFactory()
+        product = ProductFactory(name='Blue Mug')
+        path = tmp_path / 'history.csv'
+        with open(path, 'w', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(['cart_id', 'user_email', 'product_name', 'event_type', 'quantity_changed', 'timestamp'])
+            writer.writerow([cart.id, cart.user.email, 'Blue Mug', 'added', 2, '2021-03-04T10:00:00'])
+            writer.writerow([cart.id, 'nobody@example.com', 'Blue Mug', 'added', 1, '2021-03-04T11:00:00'])
+            writer.writerow([CartFactory.build().id, cart.user.email, 'Blue Mug', 'added', 1, '2021-03-04T12:00:00'])
+
+        stats = EventLoader().load([path])
+
+        assert (stats['loaded'], stats['skipped']) == (1, 2)
+        event = CartEvent.objects.get()
+        assert (event.user_id, event.product_id, event.quantity_changed) == (cart.user_id, product.id, 2)
+        assert timezone.is_aware(event.timestamp)
+
+    def test_strict_load_aborts_on_unresolvable_record(self, tmp_path):
+        """Test --strict turns a skipped record into an error"""
+        path = tmp_path / 'bad.ndjson'
+        path.write_text('{"cart_id": "x", "user_email": "ghost@example.com"}\n')
+
+        with pytest.raises(CommandError, match='record 1'):
+            call_command('load_cart_events', str(path), '--strict', stdout=StringIO())
+
+    def test_indexes_are_rebuilt_after_the_load(self):
+        """Test deferred indexes are dropped during the load and restored"""
+        before = event_indexes()
+        assert before
+
+        with deferred_indexes('cart_events') as dropped:
+            assert set(dropped) == before
+            assert event_indexes() == set()
+
+        assert event_indexes() == before
+
+    def test_load_keeps_index_definitions(self, tmp_path):
+        """Test a load restores the same indexes on the table and its partitions"""
+        cart = CartFactory()
+        path = tmp_path / 'events.csv'
+        with open(path, 'w', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(['cart_id', 'user_id', 'event_type', 'timestamp'])
+            writer.writerow([cart.id, cart.user.id, 'added', timezone.now().isoformat()])
+        before = index_definitions()
+
+        EventLoader().load([path])
+
+        assert CartEvent.objects.count() == 1
+        assert index_definitions() == before
+
+    def test_derived_counters_are_rebuilt(self, tmp_path):
+        """Test product counters include the loaded events"""
+        cart = CartFactory()
+        product = ProductFactory()
+        path = tmp_path / 'events.ndjson'
+        path.write_text(
+            f'{{"cart_id": "{cart.id}", "user_id": "{cart.user_id}", '
+            f'"product_id": "{product.id}", "event_type": "purchased", '
+            f'"timestamp": "2022-01-01T00:00:00+00:00"}}\n'
+        )
+
+        call_command('load_cart_events', str(path), stdout=StringIO())
+
+        assert ProductEventCounters.objects.get(pk=product.pk).purchased == 1
+
+    def test_backfill_into_archived_month_keeps_archived_rows(self, tmp_path, settings):
+        """Test a backfilled archived month is re-archived as an extra part"""
+        settings.ANALYTICS_ARCHIVE_DIR = str(tmp_path / 'archive')
+        cart = CartFactory()
+        old = timezone.now() - timedelta(days=120)
+        archived = CartEventFactory(cart=cart, event_type='added')
+        CartEvent.objects.filter(pk=archived.pk).update(timestamp=old)
+        call_command('archive_cart_events', retention_months=1, stdout=StringIO())
+        path = tmp_path / 'late.csv'
+        with open(path, 'w', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(['cart_id', 'user_id', 'event_type', 'timestamp'])
+            writer.writerow([cart.id, cart.user_id, 'added', (old + timedelta(minutes=1)).isoformat()])
+
+        call_command('load_cart_events', str(path), stdout=StringIO())
+        call_command('archive_cart_events', retention_months=1, stdout=StringIO())
+
+        archive = EventArchive()
+        rows = list(archive.iter_rows(old - timedelta(days=1), old + timedelta(days=1)))
+        assert len(rows) == 2
+        assert archived.id in {row['id'] for row in rows}
+        assert not CartEvent.objects.exists()
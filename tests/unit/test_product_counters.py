@@ -0,0 +1,76 @@
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.analytics.counters import RING_DAYS, ProductCounterService
+from apps.analytics.models import ProductActivityBucket, ProductEventCounters
+from apps.analytics.services import AnalyticsService
+from apps.carts.services import CartService
+from tests.factories import CartEventFactory, ProductFactory, UserFactory
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestProductEventCounters:
+    def test_cart_service_maintains_counters(self):
+        """Test every cart mutation increments the product counters"""
+        user = UserFactory()
+        product = ProductFactory(stock_quantity=10)
+
+        item = CartService.add_item_to_cart(user, product, 1)
+        CartService.update_cart_item_quantity(user, item.id, 3)
+        CartService.checkout_cart(user)
+
+        counters = ProductEventCounters.objects.get(pk=product.pk)
+        assert (counters.added, counters.updated, counters.purchased) == (1, 1, 1)
+
+        CartService.add_item_to_cart(user, product, 1)
+        item = CartService.get_or_create_user_cart(user).items.get()
+        CartService.remove_item_from_cart(user, item.id)
+        counters.refresh_from_db()
+        assert (counters.added, counters.removed) == (2, 1)
+
+    def test_product_insights_is_a_single_query(self):
+        """Test insights are read from the counters row"""
+        user = UserFactory()
+        product = ProductFactory(stock_quantity=10)
+        CartService.add_item_to_cart(user, product, 2)
+        CartService.checkout_cart(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            insights = AnalyticsService.get_product_insights(product.id)
+
+        assert len(queries) == 1
+        assert insights['total_interactions'] == 2
+        assert insights['conversion_rate'] == 100.0
+        assert insights['recent_activity'] == 2
+
+    def test_ring_slot_resets_for_a_new_day(self):
+        """Test a ring slot reused after RING_DAYS days starts from zero"""
+        product = ProductFactory()
+        old_day = timezone.localdate() - timedelta(days=RING_DAYS)
+        ProductCounterService.record(product.pk, 'added', day=old_day)
+        ProductCounterService.record(product.pk, 'added', day=old_day)
+        ProductCounterService.record(product.pk, 'added')
+
+        bucket = ProductActivityBucket.objects.get(product=product)
+        assert (bucket.day, bucket.count) == (timezone.localdate(), 1)
+        assert ProductCounterService.get_insights(product.pk)[1] == 1
+
+    def test_rebuild_reconciles_with_raw_events(self):
+        """Test the rebuild command corrects drifted counters"""
+        product = ProductFactory()
+        CartEventFactory.create_batch(3, product=product, event_type='added')
+        CartEventFactory(product=product, event_type='abandoned')
+        ProductEventCounters.objects.create(product=product, removed=7)
+
+        call_command('rebuild_product_counters')
+
+        counts, recent = ProductCounterService.get_insights(product.pk)
+        assert counts['added'] == 3
+        assert counts['abandoned'] == 1
+        assert counts['removed'] == 0
+        assert recent == 4
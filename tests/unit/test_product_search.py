@@ -0,0 +1,53 @@
+import pytest
+
+from apps.products.models import Product
+from apps.products.search import ProductSearchService, search_tokens
+from tests.factories import ProductFactory
+
+
+def search(term):
+    return list(
+        ProductSearchService.search(Product.objects.all(), term)
+        .order_by('-search_rank')
+        .values_list('name', flat=True)
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestProductSearch:
+    def test_prefix_matching(self):
+        """Test partial words match as prefixes"""
+        ProductFactory(name='Wireless Keyboard', description='')
+        ProductFactory(name='Coffee Mug', description='')
+
+        assert search('keyb') == ['Wireless Keyboard']
+        assert search('wire key') == ['Wireless Keyboard']
+
+    def test_name_matches_rank_above_description_matches(self):
+        """Test the product name weighs more than its description"""
+        ProductFactory(name='Desk Lamp', description='Pairs well with a keyboard')
+        ProductFactory(name='Mechanical Keyboard', description='Clicky switches')
+
+        assert search('keyboard') == ['Mechanical Keyboard', 'Desk Lamp']
+
+    def test_index_follows_saves_and_deletes(self):
+        """Test the index is kept in sync with product changes"""
+        product = ProductFactory(name='Garden Hose', description='')
+        assert search('hose') == ['Garden Hose']
+
+        product.name = 'Garden Sprinkler'
+        product.save()
+        assert search('hose') == []
+        assert search('sprink') == ['Garden Sprinkler']
+
+        product.delete()
+        assert search('sprink') == []
+
+    def test_query_syntax_is_neutralized(self):
+        """Test operators in the search term are treated as plain words"""
+        ProductFactory(name='Wireless Keyboard', description='')
+
+        assert search_tokens('key" OR * -board') == ['key', 'or', 'board']
+        assert search('"keyboard"*') == ['Wireless Keyboard']
+        assert search('***') == []
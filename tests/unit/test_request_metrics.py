@@ -0,0 +1,33 @@
+import pytest
+
+from utils.metrics import OVERFLOW_VIEW, MetricsRegistry
+
+
+@pytest.mark.unit
+class TestMetricsRegistry:
+    def test_histogram_buckets_are_cumulative(self):
+        """Test latency observations land in cumulative le buckets"""
+        registry = MetricsRegistry()
+        registry.observe('carts:cart-detail', 'GET', 200, 0.004, 2, 0.001, 100)
+        registry.observe('carts:cart-detail', 'GET', 200, 0.3, 3, 0.002, 50)
+
+        output = registry.render()
+
+        labels = 'view="carts:cart-detail",method="GET"'
+        assert f'shoptrack_http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1' in output
+        assert f'shoptrack_http_request_duration_seconds_bucket{{{labels},le="0.5"}} 2' in output
+        assert f'shoptrack_http_request_duration_seconds_count{{{labels}}} 2' in output
+        assert f'shoptrack_http_request_db_queries_sum{{{labels}}} 5' in output
+        assert f'shoptrack_http_response_bytes_total{{{labels}}} 150' in output
+        assert f'shoptrack_http_requests_total{{{labels},status="2xx"}} 2' in output
+
+    def test_series_are_bounded(self):
+        """Test views beyond max_series are folded into one overflow series"""
+        registry = MetricsRegistry(max_series=2)
+        for index in range(10):
+            registry.observe(f'view-{index}', 'GET', 200, 0.01, 1, 0.001, 10)
+
+        output = registry.render()
+
+        assert len(registry._series) == 3
+        assert f'shoptrack_http_request_duration_seconds_count{{view="{OVERFLOW_VIEW}",method="GET"}} 8' in output
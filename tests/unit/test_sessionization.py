@@ -0,0 +1,85 @@
+import pytest
+from datetime import timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.analytics.models import CartEvent
+from apps.analytics.sessionization import SessionAnalyzer
+from apps.analytics.services import AnalyticsService
+from apps.carts.services import CartService
+from tests.factories import CartEventFactory, CartFactory, ProductFactory, UserFactory
+
+
+def event_at(cart, moment):
+    event = CartEventFactory(cart=cart, event_type='added')
+    CartEvent.objects.filter(pk=event.pk).update(timestamp=moment)
+    return event
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestSessionAnalyzer:
+    def test_sessions_split_by_inactivity_gap(self, settings):
+        """Test a gap longer than the threshold starts a new session"""
+        settings.ANALYTICS_SESSION_GAP_SECONDS = 600
+        base = timezone.now() - timedelta(hours=5)
+        cart = CartFactory()
+        for minutes in [0, 5, 8, 60, 62, 200]:
+            event_at(cart, base + timedelta(minutes=minutes))
+
+        durations = sorted(
+            SessionAnalyzer.iter_session_durations(base, timezone.now())
+        )
+        # 0-8 min and 60-62 min sessions; the lone event at 200 min is skipped
+        assert durations == [120.0, 480.0]
+
+    def test_sessions_are_per_user(self, settings):
+        """Test interleaved events of two users form separate sessions"""
+        settings.ANALYTICS_SESSION_GAP_SECONDS = 600
+        base = timezone.now() - timedelta(hours=1)
+        first, second = CartFactory(), CartFactory()
+        event_at(first, base)
+        event_at(second, base + timedelta(minutes=1))
+        event_at(first, base + timedelta(minutes=2))
+        event_at(second, base + timedelta(minutes=4))
+
+        stats = SessionAnalyzer.get_session_stats(base, timezone.now())
+        assert stats['total_sessions'] == 2
+        assert stats['mean'] == 150.0
+        assert stats['p95'] == 180.0
+
+    def test_time_metrics_query_count_is_constant(self, admin_user):
+        """Test session analysis does not issue queries per cart"""
+        for _ in range(5):
+            cart = CartFactory()
+            CartEventFactory.create_batch(2, cart=cart)
+
+        with CaptureQueriesContext(connection) as few:
+            AnalyticsService.get_time_based_metrics(days=1)
+
+        for _ in range(20):
+            cart = CartFactory()
+            CartEventFactory.create_batch(2, cart=cart)
+
+        with CaptureQueriesContext(connection) as many:
+            metrics = AnalyticsService.get_time_based_metrics(days=1)
+
+        assert len(many) == len(few)
+        assert 'median_session_duration_seconds' in metrics
+
+    def test_session_duration_stamped_at_write_time(self):
+        """Test logged events carry the elapsed duration of the session"""
+        user = UserFactory()
+        product = ProductFactory(stock_quantity=10)
+
+        CartService.add_item_to_cart(user, product, 1)
+        first = CartEvent.objects.get(user=user)
+        assert first.session_duration_seconds == 0
+
+        CartEvent.objects.filter(pk=first.pk).update(
+            timestamp=timezone.now() - timedelta(minutes=3)
+        )
+        CartService.add_item_to_cart(user, product, 1)
+        latest = CartEvent.objects.filter(user=user).order_by('-timestamp').first()
+        assert 179 <= latest.session_duration_seconds <= 181
@@ -0,0 +1,62 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.users.serializers import CustomTokenObtainPairSerializer
+from tests.factories import UserFactory
+from utils.authentication import ClaimsJWTAuthentication, UserCache
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestClaimsUser:
+    def test_claims_user_defers_other_fields(self):
+        """Test claim fields are loaded and others are fetched on access"""
+        user = UserFactory(username='buyer')
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+
+        claims_user = ClaimsJWTAuthentication().get_claims_user(user.pk, token)
+
+        assert (claims_user.pk, claims_user.email, claims_user.role) == (user.pk, user.email, 'customer')
+        assert claims_user.get_deferred_fields() >= {'username', 'password'}
+        with CaptureQueriesContext(connection) as queries:
+            assert claims_user.username == 'buyer'
+        assert len(queries) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestUserCache:
+    def test_hits_return_copies(self):
+        """Test a cached user is served without a query and as a copy"""
+        user = UserFactory()
+        cache = UserCache(max_size=10, ttl=60)
+        first = cache.get(user.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = cache.get(user.pk)
+
+        assert len(queries) == 0
+        assert second == first and second is not first
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test the cache keeps at most max_size users"""
+        first, second, third = UserFactory.create_batch(3)
+        cache = UserCache(max_size=2, ttl=60)
+        cache.get(first.pk)
+        cache.get(second.pk)
+        cache.get(first.pk)
+        cache.get(third.pk)
+
+        assert list(cache._entries) == [first.pk, third.pk]
+
+    def test_expired_entries_are_reloaded(self):
+        """Test entries past their TTL hit the database again"""
+        user = UserFactory()
+        cache = UserCache(max_size=10, ttl=0)
+        cache.get(user.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            cache.get(user.pk)
+
+        assert len(queries) == 1
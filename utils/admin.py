@@ -0,0 +1,155 @@
+import json
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms.models import BaseInlineFormSet
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+# Query parameter of a changelist explicitly showing every date
+ALL_DATES_VAR = "all_dates"
+
+ESTIMATE_SQL = (
+    "SELECT coalesce(sum(greatest(c.reltuples, 0)), 0) FROM pg_class c "
+    "WHERE c.oid = to_regclass(%s) OR c.oid IN "
+    "(SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(%s))"
+)
+
+
+def estimated_query_count(queryset):
+    """Planner row estimate for ``queryset``, None off PostgreSQL"""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimated_row_count(model, using="default"):
+    """Row count of ``model``'s table from the planner statistics
+
+    Partitions are summed into their parent. Returns None where the
+    database keeps no such statistics.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(ESTIMATE_SQL, [table, table])
+        return int(cursor.fetchone()[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that trusts planner statistics for large result sets
+
+    Unfiltered querysets use the table statistics, filtered ones the row
+    estimate of their plan. Estimates below ADMIN_ESTIMATED_COUNT_THRESHOLD
+    rows are replaced by an exact count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if queryset.query.where:
+            estimate = estimated_query_count(queryset)
+        else:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+        if estimate and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+        return super().count
+
+
+class LargeTableChangeList(ChangeList):
+    """ChangeList whose links leaving the date drill-down ask for all dates
+
+    ``all_dates`` is no filter, but stays on the page, sorting and filter
+    links, so a list opened on "All dates" is not narrowed again.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(ALL_DATES_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        if self.date_hierarchy and f"{self.date_hierarchy}__" in (remove or []):
+            new_params = {**(new_params or {}), ALL_DATES_VAR: "1"}
+        return super().get_query_string(new_params, remove)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables with millions of rows
+
+    Counts are estimated and the full result count is skipped. The
+    ``list_select_related`` joins apply to every view, since the models'
+    ``__str__`` follow them. When ``date_hierarchy`` is set, a bare
+    changelist opens on the current month, so neither the list nor the
+    hierarchy scans the whole table; "All dates" still lists everything.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    narrow_to_current_month = True
+
+    def get_changelist(self, request, **kwargs):
+        return LargeTableChangeList
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.list_select_related and self.list_select_related is not True:
+            queryset = queryset.select_related(*self.list_select_related)
+        return queryset
+
+    def changelist_view(self, request, extra_context=None):
+        if (
+            self.date_hierarchy
+            and self.narrow_to_current_month
+            and not set(request.GET) - {"o", "p"}
+        ):
+            today = timezone.localdate()
+            request.GET = request.GET.copy()
+            request.GET[f"{self.date_hierarchy}__year"] = str(today.year)
+            request.GET[f"{self.date_hierarchy}__month"] = str(today.month)
+        return super().changelist_view(request, extra_context)
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Inline formset editing one page of the related objects"""
+
+    per_page = 25
+    page_number = 1
+
+    def get_queryset(self):
+        if not hasattr(self, "page"):
+            queryset = super().get_queryset()
+            self.page = Paginator(queryset, self.per_page).get_page(self.page_number)
+            self._queryset = self.page.object_list
+        return self._queryset
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    """Tabular inline that shows ``per_page`` rows at a time"""
+
+    formset = PaginatedInlineFormSet
+    template = "admin/edit_inline/paginated_tabular.html"
+    per_page = 25
+
+    @property
+    def page_param(self):
+        return f"{self.opts.model_name}_page"
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.page_number = request.GET.get(self.page_param, 1)
+        formset.page_param = self.page_param
+        return formset
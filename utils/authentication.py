@@ -0,0 +1,135 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+# Token claims copied onto the user; email and role are required
+CLAIM_FIELDS = ("email", "role", "is_staff")
+REQUIRED_CLAIMS = ("email", "role")
+
+
+class UserCache:
+    """Per-process LRU cache of full user rows with a time to live
+
+    Callers get copies, so a request mutating its user never leaks into
+    another. Entries are dropped when the user is saved or deleted in this
+    process; other processes see the change once the TTL runs out.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, pk):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(pk)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(pk)
+                return copy.copy(entry[1])
+
+        user = get_user_model().objects.get(pk=pk)
+        with self._lock:
+            self._entries[pk] = (now + self.ttl, user)
+            self._entries.move_to_end(pk)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return copy.copy(user)
+
+    def invalidate(self, pk):
+        with self._lock:
+            self._entries.pop(pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_user_cache = None
+_user_cache_lock = threading.Lock()
+
+
+def get_user_cache():
+    """Return the process-wide cache sized by the JWT_USER_CACHE_* settings"""
+    global _user_cache
+    if _user_cache is None:
+        with _user_cache_lock:
+            if _user_cache is None:
+                _user_cache = UserCache(
+                    settings.JWT_USER_CACHE_SIZE, settings.JWT_USER_CACHE_TTL
+                )
+    return _user_cache
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    if _user_cache is not None:
+        _user_cache.invalidate(instance.pk)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication that builds the user from the token claims
+
+    The user is a regular model instance holding the id and the claimed
+    ``email``, ``role`` and ``is_staff``; every other field is deferred and
+    loaded on first access. It can be passed to the ORM like any user, so
+    most requests authenticate without touching the users table. Views
+    setting ``requires_full_user = True``, and tokens issued without the
+    claims, get the full row through the per-process UserCache instead.
+
+    Being stateless, a deactivated user keeps access until the token
+    expires.
+    """
+
+    def authenticate(self, request):
+        self.view = (
+            request.parser_context.get("view") if request.parser_context else None
+        )
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if getattr(self.view, "requires_full_user", False) or any(
+            claim not in validated_token for claim in REQUIRED_CLAIMS
+        ):
+            return self.get_full_user(user_id)
+        return self.get_claims_user(user_id, validated_token)
+
+    def get_claims_user(self, user_id, validated_token):
+        model = self.user_model
+        fields = {
+            model._meta.pk.attname: model._meta.pk.to_python(user_id),
+            "is_active": True,
+        }
+        for claim in CLAIM_FIELDS:
+            if claim in validated_token:
+                fields[claim] = validated_token[claim]
+        # from_db expects the loaded fields in model field order
+        names = [f.attname for f in model._meta.concrete_fields if f.attname in fields]
+        return model.from_db("default", names, [fields[name] for name in names])
+
+    def get_full_user(self, user_id):
+        try:
+            user = get_user_cache().get(self.user_model._meta.pk.to_python(user_id))
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
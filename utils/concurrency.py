@@ -0,0 +1,39 @@
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection
+
+
+def _in_transaction():
+    return connection.in_atomic_block
+
+
+def _on_own_connection(func):
+    @functools.wraps(func)
+    def wrapper():
+        try:
+            return func()
+        finally:
+            # Honours CONN_MAX_AGE, like the end of a request would
+            close_old_connections()
+
+    return wrapper
+
+
+async def run_query(func):
+    """Run the blocking ORM callable ``func`` without blocking the event loop
+
+    Outside a transaction it runs in a worker thread on its own database
+    connection, so several calls gathered together hit the database in
+    parallel. Inside one it runs on the caller's connection, the only one
+    that can see the transaction's uncommitted rows.
+    """
+    if await sync_to_async(_in_transaction)():
+        return await sync_to_async(func)()
+    return await sync_to_async(_on_own_connection(func), thread_sensitive=False)()
+
+
+async def gather_queries(*funcs):
+    """Run independent ORM callables concurrently; returns their results"""
+    return await asyncio.gather(*(run_query(func) for func in funcs))
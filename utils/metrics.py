@@ -0,0 +1,185 @@
+import bisect
+import threading
+
+# Upper bounds of the histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+UNMATCHED_VIEW = "<unmatched>"
+OVERFLOW_VIEW = "<other>"
+
+
+class Histogram:
+    """Cumulative-on-export histogram with fixed bucket bounds"""
+
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        """Yield ``(le, count)`` pairs ending with ``+Inf``"""
+        running = 0
+        for bound, count in zip(self.bounds + ("+Inf",), self.counts):
+            running += count
+            yield bound, running
+
+
+class RequestSeries:
+    """Every metric of one (view, method) pair"""
+
+    __slots__ = (
+        "latency",
+        "queries",
+        "db_seconds",
+        "response_bytes",
+        "statuses",
+    )
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_seconds = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+
+class MetricsRegistry:
+    """Process-local request metrics keyed by URL name and method
+
+    At most ``max_series`` distinct (view, method) pairs are tracked; later
+    pairs are folded into the ``<other>`` view, so memory stays bounded no
+    matter how many URLs are hit. Each process keeps its own registry.
+    """
+
+    def __init__(self, max_series=500):
+        self.max_series = max_series
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, view, method, status, seconds, queries, db_seconds, size):
+        status_class = f"{status // 100}xx"
+        with self._lock:
+            series = self._series.get((view, method))
+            if series is None:
+                if len(self._series) >= self.max_series:
+                    view = OVERFLOW_VIEW
+                series = self._series.setdefault((view, method), RequestSeries())
+            series.latency.observe(seconds)
+            series.queries.observe(queries)
+            series.db_seconds += db_seconds
+            series.response_bytes += size
+            series.statuses[status_class] = series.statuses.get(status_class, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """Return every series in the Prometheus text exposition format"""
+        with self._lock:
+            snapshot = [
+                (view, method, series)
+                for (view, method), series in self._series.items()
+            ]
+            lines = []
+            self._render_histogram(
+                lines,
+                snapshot,
+                "shoptrack_http_request_duration_seconds",
+                "Request latency in seconds",
+                "latency",
+            )
+            self._render_histogram(
+                lines,
+                snapshot,
+                "shoptrack_http_request_db_queries",
+                "Database queries per request",
+                "queries",
+            )
+            self._render_counter(
+                lines,
+                "shoptrack_http_requests_total",
+                "Requests by response status class",
+                (
+                    (_labels(view, method, status=status), count)
+                    for view, method, series in snapshot
+                    for status, count in sorted(series.statuses.items())
+                ),
+            )
+            self._render_counter(
+                lines,
+                "shoptrack_http_request_db_seconds_total",
+                "Time spent in database queries in seconds",
+                (
+                    (_labels(view, method), round(series.db_seconds, 6))
+                    for view, method, series in snapshot
+                ),
+            )
+            self._render_counter(
+                lines,
+                "shoptrack_http_response_bytes_total",
+                "Response body bytes",
+                (
+                    (_labels(view, method), series.response_bytes)
+                    for view, method, series in snapshot
+                ),
+            )
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histogram(lines, snapshot, name, help_text, attribute):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for view, method, series in snapshot:
+            histogram = getattr(series, attribute)
+            for bound, count in histogram.cumulative():
+                labels = _labels(view, method, le=bound)
+                lines.append(f"{name}_bucket{labels} {count}")
+            labels = _labels(view, method)
+            lines.append(f"{name}_sum{labels} {round(histogram.total, 6)}")
+            lines.append(f"{name}_count{labels} {histogram.count}")
+
+    @staticmethod
+    def _render_counter(lines, name, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in samples:
+            lines.append(f"{name}{labels} {value}")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(view, method, **extra):
+    pairs = {"view": view, "method": method, **extra}
+    return (
+        "{"
+        + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs.items())
+        + "}"
+    )
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the process-wide registry sized by METRICS_MAX_SERIES"""
+    global _registry
+    if _registry is None:
+        from django.conf import settings
+
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry(max_series=settings.METRICS_MAX_SERIES)
+    return _registry
@@ -0,0 +1,111 @@
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metrics import UNMATCHED_VIEW, get_registry
+
+# QueryTimer of the request being handled, if any
+_request_timer = ContextVar("request_query_timer", default=None)
+
+
+class QueryTimer:
+    """``connection.execute_wrapper`` that counts queries and their time"""
+
+    __slots__ = ("count", "seconds", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.seconds += elapsed
+                self.count += 1
+
+
+def time_request_queries(execute, sql, params, many, context):
+    """Execute wrapper feeding the QueryTimer of the current request
+
+    Async views run their queries on several threads and connections, even
+    under the sync handler, so the timer travels in a context variable
+    rather than being installed on one connection.
+    """
+    timer = _request_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_request_timer(sender, connection, **kwargs):
+    if time_request_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_request_queries)
+
+
+class RequestMetricsMiddleware:
+    """Records latency, DB queries, DB time and response size per URL name"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.registry = get_registry()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        # The request thread's connection may predate the receiver above
+        install_request_timer(sender=None, connection=connection)
+        timer = QueryTimer()
+        token = _request_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_timer.reset(token)
+        self.observe(request, response, time.perf_counter() - started, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        token = _request_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_timer.reset(token)
+        self.observe(request, response, time.perf_counter() - started, timer)
+        return response
+
+    def observe(self, request, response, elapsed, timer):
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match and match.view_name else UNMATCHED_VIEW
+        if response.streaming:
+            size = int(response.get("Content-Length") or 0)
+        else:
+            size = len(response.content)
+
+        self.registry.observe(
+            view,
+            request.method,
+            response.status_code,
+            elapsed,
+            timer.count,
+            timer.seconds,
+            size,
+        )
@@ -0,0 +1,54 @@
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsetMixin:
+    """Honour ``?fields=a,b`` on list views
+
+    Unrequested serializer fields are dropped from the output and the
+    queryset loads only the columns backing the requested ones, plus
+    ``always_loaded_fields`` (e.g. the keys used by pagination).
+    """
+
+    fields_query_param = "fields"
+    always_loaded_fields = ("id",)
+
+    def get_sparse_fields(self):
+        """Return the requested field names, or None for every field"""
+        if hasattr(self, "_sparse_fields"):
+            return self._sparse_fields
+
+        raw = self.request.query_params.get(self.fields_query_param, "")
+        fields = [name.strip() for name in raw.split(",") if name.strip()] or None
+        if fields:
+            available = self.get_serializer_class()().fields
+            unknown = sorted(set(fields) - set(available))
+            if unknown:
+                raise ValidationError(
+                    {self.fields_query_param: f"Unknown fields: {', '.join(unknown)}"}
+                )
+        self._sparse_fields = fields
+        return fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_sparse_fields()
+        if not fields:
+            return queryset
+
+        serializer_fields = self.get_serializer_class()().fields
+        model_fields = {field.name for field in queryset.model._meta.concrete_fields}
+        columns = set(self.always_loaded_fields)
+        for name in fields:
+            source = serializer_fields[name].source
+            if source in model_fields:
+                columns.add(source)
+        return queryset.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields:
+            target = getattr(serializer, "child", serializer)
+            for name in set(target.fields) - set(fields):
+                target.fields.pop(name)
+        return serializer
@@ -0,0 +1,161 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _encode_value(value):
+    """JSON-safe key value; datetimes keep their full microsecond precision"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (int, float, str)) or value is None:
+        return value
+    return str(value)
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on a unique ordering, ``(created_at, id)`` by default
+
+    Each page is fetched with a range condition on the last seen key
+    instead of an OFFSET, so every page costs the same index range scan no
+    matter how deep it is. Cursors are opaque base64 encoded keys. Views
+    can page on another ordering by defining ``get_keyset_ordering()``; its
+    last field must be unique.
+    """
+
+    page_size = 20
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.keys = self.get_ordering(view)
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor["reverse"])
+
+        if cursor:
+            queryset = queryset.filter(self.after(cursor["values"], reverse))
+        ordering = [self.flip(key) if reverse else key for key in self.keys]
+        results = list(queryset.order_by(*ordering)[: page_size + 1])
+
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def get_ordering(self, view):
+        if view is not None and hasattr(view, "get_keyset_ordering"):
+            return tuple(view.get_keyset_ordering())
+        return self.ordering
+
+    @staticmethod
+    def flip(key):
+        return key[1:] if key.startswith("-") else f"-{key}"
+
+    def after(self, values, reverse):
+        """Condition selecting rows past ``values`` in the page direction"""
+        condition = Q()
+        for index, key in enumerate(self.keys):
+            name = key.lstrip("-")
+            descending = key.startswith("-") != reverse
+            step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[index]})
+            for previous, value in zip(self.keys[:index], values):
+                step &= Q(**{previous.lstrip("-"): value})
+            condition |= step
+        return condition
+
+    def get_page_size(self, request):
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            raw_values = payload["v"]
+            if len(raw_values) != len(self.keys):
+                raise ValueError
+            values = []
+            for key, value in zip(self.keys, raw_values):
+                try:
+                    field = model._meta.get_field(key.lstrip("-"))
+                except FieldDoesNotExist:
+                    values.append(value)
+                else:
+                    values.append(field.to_python(value))
+            return {"values": values, "reverse": bool(payload.get("r"))}
+        except (
+            binascii.Error,
+            ValueError,
+            KeyError,
+            TypeError,
+            UnicodeDecodeError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        payload = {
+            "v": [_encode_value(getattr(obj, key.lstrip("-"))) for key in self.keys]
+        }
+        if reverse:
+            payload["r"] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
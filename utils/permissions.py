@@ -0,0 +1,12 @@
+from rest_framework import permissions
+
+
+class AdminOnlyPermission(permissions.BasePermission):
+    """Custom permission to only allow admin users"""
+
+    def has_permission(self, request, view):
+        return (
+            request.user
+            and request.user.is_authenticated
+            and request.user.role == "admin"
+        )
@@ -0,0 +1,54 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.views import APIView
+
+from .metrics import get_registry
+from .permissions import AdminOnlyPermission
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsView(APIView):
+    """Per-endpoint request metrics in Prometheus text format - Admin only"""
+
+    permission_classes = [permissions.IsAuthenticated, AdminOnlyPermission]
+    swagger_schema = None
+
+    def get(self, request):
+        return HttpResponse(
+            get_registry().render(), content_type=PROMETHEUS_CONTENT_TYPE
+        )
+
+
+class AsyncAPIView(APIView):
+    """APIView whose method handlers are coroutines
+
+    Django serves it natively under ASGI. Authentication, permissions and
+    throttling still run synchronously, in the request's sync thread, as
+    authentication may read the user; rendering happens as usual.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if hasattr(response, "__await__"):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response